@@ -1,4 +1,3 @@
-from PIL import Image
 from ultralytics import YOLO
 from vipipe.handlers.base import HandlerABC
 from vipipe.handlers.drawer import Drawer
@@ -23,7 +22,7 @@ class CowDetectHandler(HandlerABC):
             logger.debug("Buffer meta is None, skipping message")
             return message
 
-        image = Image.frombuffer("RGB", (message.buffer_meta.width, message.buffer_meta.height), message.buffer)
+        image = message.as_image()
         try:
             results = self.model.predict(image)
             if results is None or len(results) == 0:
@@ -41,7 +40,7 @@ class CowDetectHandler(HandlerABC):
 
         self.drawer.draw_bboxes(image, boxes, probs)
 
-        message.buffer = image.tobytes()
+        message.write_image(image)
         return message
 
 
@@ -1,5 +1,4 @@
 from facenet_pytorch import MTCNN
-from PIL import Image
 from vipipe.handlers import Drawer, HandlerABC
 from vipipe.logging import get_logger
 from vipipe.transport.gstreamer import BufferMessage, GstMessage, GstReader, GstWriter
@@ -19,14 +18,14 @@ class FacenetHandler(HandlerABC):
             logger.debug("Buffer meta is None, skipping message")
             return message
 
-        image = Image.frombuffer("RGB", (message.buffer_meta.width, message.buffer_meta.height), message.buffer)
+        image = message.as_image()
 
         boxes, probs = self.model.detect(image)  # type: ignore
         self.drawer.draw_bboxes(image, boxes, probs)  # type: ignore
 
-        logger.debug(f"Detected {len(boxes)} faces")
+        logger.debug("Detected %d faces", len(boxes))
 
-        message.buffer = image.tobytes()
+        message.write_image(image)
         return message
 
 
@@ -1,16 +1,15 @@
-from PIL import Image
 from ultralytics import YOLO
-from vipipe.handlers.base import HandlerABC
+from vipipe.handlers.batch import BatchHandlerABC
 from vipipe.logging import get_logger
 from vipipe.transport.gstreamer import BufferMessage, GstMessage, GstReader, GstWriter
-from vipipe.transport.gstreamer.entity import ObjectsMetaMessage
+from vipipe.transport.gstreamer.objects import ObjectsArrayMetaMessage
 from vipipe.transport.zeromq import ZeroMQReader, ZeroMQWriter
 from vipipe.transport.zeromq.utils.cli import parse_zmq_config_cli
 
 logger = get_logger("vipipe.handler.metadetect.detector")
 
 
-class ObjectDetectorHandler(HandlerABC):
+class ObjectDetectorHandler(BatchHandlerABC):
     def on_startup(self):
         # Загрузка модели YOLOv5 для обнаружения объектов
         self.model = YOLO("/app/models/yolov5s.pt")
@@ -19,54 +18,42 @@ class ObjectDetectorHandler(HandlerABC):
 
         logger.info("Модель детектора инициализирована")
 
-    def handle_buffer_message(self, message: BufferMessage) -> GstMessage | None:
-        if message.buffer_meta is None:
-            logger.debug("Buffer meta is None, skipping message")
-            return message
+    def handle_buffer_batch(self, messages: list[BufferMessage]) -> list[GstMessage | None]:
+        images = []
+        detected = []
+        for message in messages:
+            if message.buffer_meta is None:
+                logger.debug("Buffer meta is None, skipping message")
+                continue
 
-        img_width = message.buffer_meta.width
-        img_height = message.buffer_meta.height
-        try:
-            image = Image.frombuffer("RGB", (img_width, img_height), message.buffer)
-        except Exception as exc:
-            logger.error(f"Ошибка создания изображения: {exc}")
-            return message
-
-        try:
-            results = self.model.predict(image, conf=self.conf_threshold)
-
-            objects_meta = ObjectsMetaMessage(metadata={"objects": []})
+            try:
+                images.append(message.as_image())
+                detected.append(message)
+            except Exception as exc:
+                logger.error(f"Ошибка создания изображения: {exc}")
 
-            if results and len(results) > 0:
-                for result in results:
-                    if result.boxes is None or len(result.boxes) == 0:
-                        continue
+        if not images:
+            return list(messages)
 
-                    for _, box in enumerate(result.boxes):  # type: ignore
-                        bbox = box.xyxy[0].tolist()  # [x1, y1, x2, y2]
-                        conf = float(box.conf[0]) if box.conf is not None else 0.0
-                        class_id = int(box.cls[0]) if box.cls is not None else -1
-                        label = result.names[class_id] if class_id in result.names else f"class_{class_id}"
-
-                        logger.debug(f"Обнаружен объект: {label} с вероятностью {conf}, координаты: {bbox}")
+        try:
+            # Вся пачка кадров обрабатывается моделью за один вызов
+            results = self.model.predict(images, conf=self.conf_threshold)
+        except Exception as exc:
+            logger.error(f"Ошибка обработки изображений: {exc}")
+            return list(messages)
 
-                        # Добавляем объект в метаданные
-                        objects_meta.add_object(
-                            bbox=tuple(bbox),
-                            conf=conf,
-                            class_id=class_id,
-                            label=label,
-                            attributes={"detection_source": "yolov5"},
-                        )
+        for message, result in zip(detected, results):
+            objects_meta = ObjectsArrayMetaMessage(metadata={"detection_source": "yolov5"}, codec="columnar")
 
-                logger.debug(f"Обнаружено {len(objects_meta.objects)} объектов")
+            if result.boxes is not None and len(result.boxes) > 0:
+                # Добавляем все объекты кадра разом, без обхода по одному боксу
+                boxes = result.boxes.cpu().numpy()
+                objects_meta.add_objects(boxes.xyxy, boxes.conf, boxes.cls, names=result.names)
 
+            logger.debug("Обнаружено %d объектов", len(objects_meta.objects))
             message.custom_meta = objects_meta
 
-        except Exception as exc:
-            logger.error(f"Ошибка обработки изображения: {exc}")
-
-        return message
+        return list(messages)
 
 
 def main():
@@ -79,7 +66,7 @@ def main():
     reader = GstReader(ZeroMQReader(reader_config))
     writer = GstWriter(ZeroMQWriter(writer_config))
 
-    ObjectDetectorHandler(reader=reader, writer=writer).run()
+    ObjectDetectorHandler(reader=reader, writer=writer, batch_size=4, batch_timeout=100, pipelined=True).run()
     logger.info("Работа детектора завершена")
 
 
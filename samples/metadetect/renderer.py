@@ -1,6 +1,5 @@
-from PIL import Image
 from vipipe.handlers.base import HandlerABC
-from vipipe.handlers.drawer import Drawer
+from vipipe.handlers.drawer import ArrayDrawer
 from vipipe.logging import get_logger
 from vipipe.transport.gstreamer import BufferMessage, GstMessage, GstReader, GstWriter
 from vipipe.transport.gstreamer.entity import ObjectsMetaMessage
@@ -12,7 +11,7 @@ logger = get_logger("vipipe.handler.metadetect.renderer")
 
 class ObjectRendererHandler(HandlerABC):
     def on_startup(self):
-        self.drawer = Drawer(thickness=4)
+        self.drawer = ArrayDrawer(thickness=4)
         logger.info("Рендерер инициализирован")
 
     def handle_buffer_message(self, message: BufferMessage) -> GstMessage | None:
@@ -22,22 +21,17 @@ class ObjectRendererHandler(HandlerABC):
 
         objects_meta = message.custom_meta and ObjectsMetaMessage(message.custom_meta.metadata)
         if objects_meta and len(objects_meta.objects) > 0:
-            logger.debug(f"Получено {len(objects_meta.objects)} объектов для отрисовки")
+            logger.debug("Получено %d объектов для отрисовки", len(objects_meta.objects))
         else:
             logger.debug("Нет метаданных объектов для отрисовки")
             return message
 
-        img_width = message.buffer_meta.width
-        img_height = message.buffer_meta.height
         try:
-            image = Image.frombuffer("RGB", (img_width, img_height), message.buffer)
+            # Рисуем прямо в кадре, без промежуточного изображения
+            self.drawer.draw_message(message, objects_meta.objects)
         except Exception as e:
-            logger.error(f"Ошибка создания изображения: {e}")
-            return message
-
-        self.drawer.draw_objects(image, objects_meta.objects)
+            logger.error(f"Ошибка отрисовки кадра: {e}")
 
-        message.buffer = image.tobytes()
         return message
 
 
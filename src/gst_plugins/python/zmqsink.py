@@ -1,7 +1,10 @@
 import gi
 import zmq
-from vipipe.logging import get_logger
+from vipipe.logging import ThrottledLogger, get_logger
+from vipipe.metrics import DROPPED_BUFFERS, start_metrics_server
 from vipipe.transport.gstreamer import BufferMessage, BufferMetaMessage, CapsMessage, CustomMetaMessage, GstWriter
+from vipipe.transport.gstreamer.payload import get_payload_codec
+from vipipe.transport.shm import ShmWriter, ShmWriterConfig
 from vipipe.transport.zeromq import ZeroMQWriter, ZeroMQWriterConfig
 
 gi.require_version("Gst", "1.0")
@@ -12,6 +15,8 @@ from gi.repository import GLib, GObject, Gst, GstBase  # type: ignore
 Gst.init(None)
 
 logger = get_logger("vipipe.gst_plugins.zmqsink")
+frame_logger = ThrottledLogger(logger)
+"""Логгер для сообщений, которые пишутся на каждом кадре"""
 
 
 class GstZeroMQSink(GstBase.BaseSink):
@@ -35,6 +40,20 @@ class GstZeroMQSink(GstBase.BaseSink):
             "",
             GObject.ParamFlags.READWRITE,
         ),
+        "socket-type": (
+            str,
+            "Socket Type",
+            "ZeroMQ socket type: PUB (all receivers get every buffer) or PUSH (buffers are distributed between receivers)",
+            "PUB",
+            GObject.ParamFlags.READWRITE,
+        ),
+        "topic": (
+            str,
+            "Topic",
+            "Stream id sent as the first frame of every message, receivers subscribe by it (empty - no topic frame)",
+            "",
+            GObject.ParamFlags.READWRITE,
+        ),
         "buffer-length": (
             int,
             "Buffer Length",
@@ -92,12 +111,92 @@ class GstZeroMQSink(GstBase.BaseSink):
             False,  # Default
             GObject.ParamFlags.READWRITE,
         ),
+        "zero-copy": (
+            bool,
+            "Zero Copy",
+            "Send frames without copying, buffers are held until sent (upstream pool must have spare buffers)",
+            False,  # Default
+            GObject.ParamFlags.READWRITE,
+        ),
+        "packed-meta": (
+            bool,
+            "Packed Meta",
+            "Send buffer meta in the compact binary format (receivers must support it)",
+            False,  # Default
+            GObject.ParamFlags.READWRITE,
+        ),
+        "caps-interval": (
+            int,
+            "Caps Interval",
+            "With packed-meta, repeat full caps in buffer meta every N buffers so late receivers can start",
+            1,
+            GLib.MAXINT,
+            30,  # Default
+            GObject.ParamFlags.READWRITE,
+        ),
+        "shm-name": (
+            str,
+            "Shared Memory Name",
+            "Name of the shared memory segment for frame payloads (empty - send frames through the socket)",
+            "",
+            GObject.ParamFlags.READWRITE,
+        ),
+        "shm-slots": (
+            int,
+            "Shared Memory Slots",
+            "Number of frame slots in the shared memory ring",
+            2,
+            GLib.MAXINT,
+            16,  # Default
+            GObject.ParamFlags.READWRITE,
+        ),
+        "shm-slot-size": (
+            int,
+            "Shared Memory Slot Size",
+            "Size of one shared memory slot in bytes",
+            1,
+            GLib.MAXINT,
+            1024 * 1024 * 8,  # Default 8MB
+            GObject.ParamFlags.READWRITE,
+        ),
+        "payload-codec": (
+            str,
+            "Payload Codec",
+            "Compress frame payloads on the wire: jpeg or png (empty - send raw frames)",
+            "",
+            GObject.ParamFlags.READWRITE,
+        ),
+        "meta-address": (
+            str,
+            "Meta Socket Address",
+            "Address of a second socket that carries buffer metadata without payloads (empty - disabled)",
+            "",
+            GObject.ParamFlags.READWRITE,
+        ),
+        "split-meta": (
+            bool,
+            "Split Meta",
+            "With meta-address, send custom meta only on the meta socket instead of duplicating it",
+            True,  # Default
+            GObject.ParamFlags.READWRITE,
+        ),
+        "metrics-port": (
+            int,
+            "Metrics Port",
+            "Port of the HTTP server with Prometheus/OpenMetrics metrics (0 - disabled)",
+            0,
+            65535,
+            0,  # Default
+            GObject.ParamFlags.READWRITE,
+        ),
     }
 
     def __init__(self):
         super(GstZeroMQSink, self).__init__()
 
         self.address = ""
+        self.socket_type = "PUB"
+        self.topic = ""
         self.buffer_length = 10
         self.buffer_size_os = 1024 * 1024 * 30
         self.send_timeout = 100
@@ -105,6 +204,16 @@ class GstZeroMQSink(GstBase.BaseSink):
         self.conflate = False
         self.linger = 500
         self.dontwait = False
+        self.zero_copy = False
+        self.packed_meta = False
+        self.caps_interval = 30
+        self.shm_name = ""
+        self.shm_slots = 16
+        self.shm_slot_size = 1024 * 1024 * 8
+        self.payload_codec = ""
+        self.meta_address = ""
+        self.split_meta = True
+        self.metrics_port = 0
 
         # caps params
         self.caps_str = None
@@ -114,12 +223,18 @@ class GstZeroMQSink(GstBase.BaseSink):
         self.fps_n = None
         self.fps_d = None
         self.framerate = None
+        self.caps_id = 0
+        self.buffers_since_caps = 0
 
         self.writer = None
 
     def do_get_property(self, prop):
         if prop.name == "address":
             return self.address
+        elif prop.name == "socket-type":
+            return self.socket_type
+        elif prop.name == "topic":
+            return self.topic
         elif prop.name == "buffer-length":
             return self.buffer_length
         elif prop.name == "buffer-size-os":
@@ -134,12 +249,36 @@ class GstZeroMQSink(GstBase.BaseSink):
             return self.linger
         elif prop.name == "dontwait":
             return self.dontwait
+        elif prop.name == "zero-copy":
+            return self.zero_copy
+        elif prop.name == "packed-meta":
+            return self.packed_meta
+        elif prop.name == "caps-interval":
+            return self.caps_interval
+        elif prop.name == "shm-name":
+            return self.shm_name
+        elif prop.name == "shm-slots":
+            return self.shm_slots
+        elif prop.name == "shm-slot-size":
+            return self.shm_slot_size
+        elif prop.name == "payload-codec":
+            return self.payload_codec
+        elif prop.name == "meta-address":
+            return self.meta_address
+        elif prop.name == "split-meta":
+            return self.split_meta
+        elif prop.name == "metrics-port":
+            return self.metrics_port
         else:
             raise AttributeError(f"Unknown property {prop.name}")
 
     def do_set_property(self, prop, value):
         if prop.name == "address":
             self.address = value
+        elif prop.name == "socket-type":
+            self.socket_type = value
+        elif prop.name == "topic":
+            self.topic = value
         elif prop.name == "buffer-length":
             self.buffer_length = value
         elif prop.name == "buffer-size-os":
@@ -154,6 +293,26 @@ class GstZeroMQSink(GstBase.BaseSink):
             self.linger = value
         elif prop.name == "dontwait":
             self.dontwait = value
+        elif prop.name == "zero-copy":
+            self.zero_copy = value
+        elif prop.name == "packed-meta":
+            self.packed_meta = value
+        elif prop.name == "caps-interval":
+            self.caps_interval = value
+        elif prop.name == "shm-name":
+            self.shm_name = value
+        elif prop.name == "shm-slots":
+            self.shm_slots = value
+        elif prop.name == "shm-slot-size":
+            self.shm_slot_size = value
+        elif prop.name == "payload-codec":
+            self.payload_codec = value
+        elif prop.name == "meta-address":
+            self.meta_address = value
+        elif prop.name == "split-meta":
+            self.split_meta = value
+        elif prop.name == "metrics-port":
+            self.metrics_port = value
         else:
             raise AttributeError(f"Unknown property {prop.name}")
 
@@ -161,22 +320,54 @@ class GstZeroMQSink(GstBase.BaseSink):
         if self.writer:
             self.writer.stop()
 
-        self.writer = GstWriter(
-            ZeroMQWriter(
+        socket_type = zmq.SocketType.__members__.get(self.socket_type.upper())
+        if socket_type not in (zmq.SocketType.PUB, zmq.SocketType.PUSH):
+            Gst.error(f"Unsupported socket type: {self.socket_type}")
+            return False
+
+        transport = ZeroMQWriter(
+            ZeroMQWriterConfig(
+                address=self.address,
+                socket_type=socket_type,
+                buffer_length=self.buffer_length,
+                buffer_size_os=self.buffer_size_os,
+                send_timeout=self.send_timeout,
+                immediate=self.immediate,
+                conflate=self.conflate,
+                linger=self.linger,
+                zero_copy=self.zero_copy,
+                topic=self.topic,
+            )
+        )
+
+        if self.shm_name:
+            transport = ShmWriter(
+                ShmWriterConfig(name=self.shm_name, slots=self.shm_slots, slot_size=self.shm_slot_size),
+                transport,
+            )
+
+        meta_transport = None
+        if self.meta_address:
+            # Метаданные небольшие, поэтому отправляются с копированием и без shm
+            meta_transport = ZeroMQWriter(
                 ZeroMQWriterConfig(
-                    address=self.address,
+                    address=self.meta_address,
                     socket_type=zmq.SocketType.PUB,
                     buffer_length=self.buffer_length,
-                    buffer_size_os=self.buffer_size_os,
                     send_timeout=self.send_timeout,
                     immediate=self.immediate,
-                    conflate=self.conflate,
                     linger=self.linger,
+                    topic=self.topic,
                 )
             )
-        )
+
+        self.writer = GstWriter(transport, meta_writer=meta_transport, split_meta=self.split_meta)
 
         try:
+            if self.payload_codec:
+                get_payload_codec(self.payload_codec)
+            if self.metrics_port:
+                start_metrics_server(self.metrics_port)
             self.writer.start()
             return True
         except Exception as e:
@@ -221,6 +412,9 @@ class GstZeroMQSink(GstBase.BaseSink):
         self._parse_caps(caps)
         assert self.caps_str is not None
 
+        self.caps_id += 1
+        self.buffers_since_caps = 0
+
         try:
             self.writer.write(
                 CapsMessage(
@@ -231,6 +425,7 @@ class GstZeroMQSink(GstBase.BaseSink):
                     fps_d=self.fps_d,
                     framerate=self.framerate,
                     caps_str=self.caps_str,
+                    caps_id=self.caps_id if self.packed_meta else None,
                 )
             )
             logger.debug("Отправили капсы")
@@ -239,6 +434,15 @@ class GstZeroMQSink(GstBase.BaseSink):
 
         return True
 
+    def _buffer_caps_str(self) -> str | None:
+        """В бинарном формате полные капсы передаются только периодически, в остальных буферах - caps_id."""
+        if not self.packed_meta:
+            return self.caps_str
+
+        send_caps = self.buffers_since_caps % self.caps_interval == 0
+        self.buffers_since_caps += 1
+        return self.caps_str if send_caps else None
+
     def do_render(self, buffer):
         if self.writer is None:
             logger.error("Сокет для публикации не инициализирован")
@@ -249,13 +453,19 @@ class GstZeroMQSink(GstBase.BaseSink):
             logger.error("Ошибка при чтении буфера")
             return Gst.FlowReturn.ERROR
 
+        # После передачи буфера транспорту его освобождает транспорт через on_release
+        handed_off = False
+
         try:
             # Извлекаем пользовательские метаданные, если они есть
             custom_meta_data = buffer.get_custom_meta("VipipeCustomMeta") or None
-            logger.info(f"custom_meta_data: {custom_meta_data}")
             custom_meta_data = custom_meta_data and custom_meta_data.get_structure().get_value("vipipe_custom_meta")
-            logger.info(f"custom_meta_data: {custom_meta_data}")
-            custom_meta = custom_meta_data and CustomMetaMessage.from_json(custom_meta_data)
+            custom_meta = None
+            if isinstance(custom_meta_data, str):
+                custom_meta = CustomMetaMessage.from_json(custom_meta_data)
+            elif custom_meta_data is not None:
+                # Метаданные в кодеке, отличном от json, хранятся в GLib.Bytes вместе с тегом кодека
+                custom_meta = CustomMetaMessage.from_bytes(custom_meta_data.get_data())
 
             buffer_meta = BufferMetaMessage(
                 pts=buffer.pts,
@@ -264,27 +474,34 @@ class GstZeroMQSink(GstBase.BaseSink):
                 width=self.width,  # type: ignore
                 height=self.height,  # type: ignore
                 flags=buffer.get_flags(),
-                caps_str=self.caps_str,
+                caps_str=self._buffer_caps_str(),
+                caps_id=self.caps_id if self.packed_meta else None,
+                packed=self.packed_meta,
+                payload_codec=self.payload_codec or None,
             )
 
             buffer_message = BufferMessage(
-                buffer=bytes(map_info.data),
+                buffer=map_info.data,
                 buffer_meta=buffer_meta,
                 custom_meta=custom_meta,
+                payload_format=self.format,
             )
 
-            self.writer.write(buffer_message)
-            logger.debug("Буфер отправлен pts: %d", buffer_meta.pts)
+            handed_off = True
+            self.writer.write(buffer_message, on_release=lambda: buffer.unmap(map_info))
+            frame_logger.debug("Буфер отправлен pts: %d", buffer_meta.pts)
 
             return Gst.FlowReturn.OK
         except zmq.Again:
-            logger.warning("Передача буфера отклонена (zmq.Again)")
+            DROPPED_BUFFERS.labels("send_again").inc()  # type: ignore
+            frame_logger.warning("Передача буфера отклонена (zmq.Again)")
             return Gst.FlowReturn.OK
         except Exception as e:
             logger.error("Ошибка публикации буфера: %s", e)
             return Gst.FlowReturn.ERROR
         finally:
-            buffer.unmap(map_info)
+            if not handed_off:
+                buffer.unmap(map_info)
 
 
 # register plugin
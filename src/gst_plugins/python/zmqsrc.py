@@ -1,7 +1,10 @@
 import gi
 import zmq
-from vipipe.logging import get_logger
+from vipipe.logging import ThrottledLogger, get_logger
+from vipipe.metrics import DROPPED_BUFFERS, start_metrics_server
 from vipipe.transport.gstreamer import GST_MESSAGE_TYPES, BufferMessage, GstReader
+from vipipe.transport.gstreamer.codecs import JsonCodec
+from vipipe.transport.shm import ShmReader, ShmReaderConfig
 from vipipe.transport.zeromq import ZeroMQReader, ZeroMQReaderConfig
 
 gi.require_version("Gst", "1.0")
@@ -13,6 +16,8 @@ Gst.init(None)
 
 
 logger = get_logger("vipipe.gst_plugins.zmqsrc")
+frame_logger = ThrottledLogger(logger)
+"""Логгер для сообщений, которые пишутся на каждом кадре"""
 
 
 class GstZeroMQSrc(GstBase.BaseSrc):
@@ -36,6 +41,13 @@ class GstZeroMQSrc(GstBase.BaseSrc):
             "",
             GObject.ParamFlags.READWRITE,
         ),
+        "topic": (
+            str,
+            "Topic",
+            "Receive only the stream published with this topic (zmqsink topic), empty - untagged stream",
+            "",
+            GObject.ParamFlags.READWRITE,
+        ),
         "buffer-length": (
             int,
             "Buffer Length",
@@ -77,6 +89,56 @@ class GstZeroMQSrc(GstBase.BaseSrc):
             False,  # Default
             GObject.ParamFlags.READWRITE,
         ),
+        "shm-name": (
+            str,
+            "Shared Memory Name",
+            "Name of the shared memory segment created by zmqsink (empty - frames come through the socket)",
+            "",
+            GObject.ParamFlags.READWRITE,
+        ),
+        "shm-slot-size": (
+            int,
+            "Shared Memory Slot Size",
+            "Size of one shared memory slot in bytes, must match zmqsink",
+            1,
+            GLib.MAXINT,
+            1024 * 1024 * 8,  # Default 8MB
+            GObject.ParamFlags.READWRITE,
+        ),
+        "buffer-pool": (
+            bool,
+            "Buffer Pool",
+            "Reuse output buffers from a pool sized from the caps (raw video only)",
+            True,  # Default
+            GObject.ParamFlags.READWRITE,
+        ),
+        "pool-min-buffers": (
+            int,
+            "Pool Min Buffers",
+            "Number of buffers preallocated in the pool",
+            1,
+            GLib.MAXINT,
+            4,  # Default
+            GObject.ParamFlags.READWRITE,
+        ),
+        "heartbeat-interval": (
+            int,
+            "Heartbeat Interval",
+            "While no data arrives, push a GAP event downstream every N ms (0 - disabled)",
+            0,
+            GLib.MAXINT,
+            0,  # Default
+            GObject.ParamFlags.READWRITE,
+        ),
+        "metrics-port": (
+            int,
+            "Metrics Port",
+            "Port of the HTTP server with Prometheus/OpenMetrics metrics (0 - disabled)",
+            0,
+            65535,
+            0,  # Default
+            GObject.ParamFlags.READWRITE,
+        ),
     }
 
     def __init__(self):
@@ -85,11 +147,18 @@ class GstZeroMQSrc(GstBase.BaseSrc):
         self.set_live(True)
 
         self.address = ""
+        self.topic = ""
         self.buffer_length = 10
         self.buffer_size_os = 1024 * 1024 * 30
         self.read_timeout = 5000
         self.conflate = False
         self.dontwait = False
+        self.shm_name = ""
+        self.shm_slot_size = 1024 * 1024 * 8
+        self.buffer_pool = True
+        self.pool_min_buffers = 4
+        self.heartbeat_interval = 0
+        self.metrics_port = 0
 
         # caps params
         self.caps_str = None
@@ -99,8 +168,18 @@ class GstZeroMQSrc(GstBase.BaseSrc):
         self.fps_n = None
         self.fps_d = None
         self.framerate = None
+        self.caps_id = None
 
+        # Окончание последнего отправленного буфера, от него отсчитываются GAP-события
+        self.next_timestamp = None
+
+        self.transport = None
+        self.shm_transport = None
         self.reader = None
+        self.flushing = False
+
+        self.pool = None
+        self.pool_size = 0
 
     def do_is_seekable(self):
         return False
@@ -108,6 +187,8 @@ class GstZeroMQSrc(GstBase.BaseSrc):
     def do_get_property(self, prop):
         if prop.name == "address":
             return self.address
+        elif prop.name == "topic":
+            return self.topic
         elif prop.name == "buffer-length":
             return self.buffer_length
         elif prop.name == "buffer-size-os":
@@ -118,12 +199,26 @@ class GstZeroMQSrc(GstBase.BaseSrc):
             return self.conflate
         elif prop.name == "dontwait":
             return self.dontwait
+        elif prop.name == "shm-name":
+            return self.shm_name
+        elif prop.name == "shm-slot-size":
+            return self.shm_slot_size
+        elif prop.name == "buffer-pool":
+            return self.buffer_pool
+        elif prop.name == "pool-min-buffers":
+            return self.pool_min_buffers
+        elif prop.name == "heartbeat-interval":
+            return self.heartbeat_interval
+        elif prop.name == "metrics-port":
+            return self.metrics_port
         else:
             raise AttributeError(f"Unknown property {prop.name}")
 
     def do_set_property(self, prop, value):
         if prop.name == "address":
             self.address = value
+        elif prop.name == "topic":
+            self.topic = value
         elif prop.name == "buffer-length":
             self.buffer_length = value
         elif prop.name == "buffer-size-os":
@@ -134,6 +229,18 @@ class GstZeroMQSrc(GstBase.BaseSrc):
             self.conflate = value
         elif prop.name == "dontwait":
             self.dontwait = value
+        elif prop.name == "shm-name":
+            self.shm_name = value
+        elif prop.name == "shm-slot-size":
+            self.shm_slot_size = value
+        elif prop.name == "buffer-pool":
+            self.buffer_pool = value
+        elif prop.name == "pool-min-buffers":
+            self.pool_min_buffers = value
+        elif prop.name == "heartbeat-interval":
+            self.heartbeat_interval = value
+        elif prop.name == "metrics-port":
+            self.metrics_port = value
         else:
             raise AttributeError(f"Unknown property {prop.name}")
 
@@ -141,20 +248,30 @@ class GstZeroMQSrc(GstBase.BaseSrc):
         if self.reader:
             self.reader.stop()
 
-        self.reader = GstReader(
-            ZeroMQReader(
-                ZeroMQReaderConfig(
-                    address=self.address,
-                    socket_type=zmq.SocketType.SUB,
-                    buffer_length=self.buffer_length,
-                    buffer_size_os=self.buffer_size_os,
-                    read_timeout=self.read_timeout,
-                    conflate=self.conflate,
-                )
+        self.transport = ZeroMQReader(
+            ZeroMQReaderConfig(
+                address=self.address,
+                socket_type=zmq.SocketType.SUB,
+                topic=self.topic,
+                buffer_length=self.buffer_length,
+                buffer_size_os=self.buffer_size_os,
+                read_timeout=self.read_timeout,
+                conflate=self.conflate,
             )
         )
 
+        transport = self.transport
+        self.shm_transport = None
+        if self.shm_name:
+            transport = self.shm_transport = ShmReader(
+                ShmReaderConfig(name=self.shm_name, slot_size=self.shm_slot_size), transport
+            )
+
+        self.reader = GstReader(transport)
+
         try:
+            if self.metrics_port:
+                start_metrics_server(self.metrics_port)
             self.reader.start()
             return True
         except Exception as e:
@@ -162,11 +279,14 @@ class GstZeroMQSrc(GstBase.BaseSrc):
             return False
 
     def do_stop(self):
+        self._release_pool()
+
         if not self.reader:
             return True
         try:
             self.reader.stop()
             self.reader = None
+            self.transport = None
         except Exception as e:
             Gst.error(f"Failed to stop ZeroMQ reader: {e}")
             return False
@@ -179,6 +299,7 @@ class GstZeroMQSrc(GstBase.BaseSrc):
             return
 
         self.caps_str = caps_str
+        self._release_pool()
 
         caps = Gst.Caps.from_string(caps_str)
         self.srcpad.push_event(Gst.Event.new_caps(caps))
@@ -201,15 +322,29 @@ class GstZeroMQSrc(GstBase.BaseSrc):
 
         logger.debug("Получили капсы %s", caps_str)
 
+    def _has_caps_for(self, message: BufferMessage) -> bool:
+        """Проверяет, известны ли капсы, к которым относится буфер."""
+        assert message.buffer_meta is not None, "Buffer is None"
+
+        if message.buffer_meta.caps_str:
+            self.caps_id = message.buffer_meta.caps_id
+            return True
+
+        if message.buffer_meta.caps_id is None:
+            return True
+
+        # В бинарном формате буфер ссылается на капсы по идентификатору
+        return self.caps_str is not None and message.buffer_meta.caps_id == self.caps_id
+
     def handle_buffer_message(self, message: BufferMessage):
-        logger.debug("Получили буффер размера %d", len(message.buffer))
+        frame_logger.debug("Получили буффер размера %d", len(message.buffer))
 
         assert message.buffer_meta is not None, "Buffer is None"
 
         if message.buffer_meta.caps_str and message.buffer_meta.caps_str != self.caps_str:
             self._parse_caps(message.buffer_meta.caps_str)
 
-        buffer = Gst.Buffer.new_allocate(None, len(message.buffer), None)
+        buffer = self._allocate(len(message.buffer))
         if buffer is None:
             return Gst.FlowReturn.ERROR, None
 
@@ -221,34 +356,133 @@ class GstZeroMQSrc(GstBase.BaseSrc):
         if message.buffer_meta.flags is not None:
             buffer.set_flags(Gst.BufferFlags(message.buffer_meta.flags))
 
+        if message.buffer_meta.pts is not None:
+            self.next_timestamp = message.buffer_meta.pts + (message.buffer_meta.duration or 0)
+
         # Добавляем пользовательские метаданные, если они есть
         if message.custom_meta is not None:
             custom_meta = buffer.add_custom_meta("VipipeCustomMeta")
             struct = custom_meta.get_structure()
-            struct.set_value("vipipe_custom_meta", message.custom_meta.to_json())
-            logger.info(f"structure: {struct.to_string()}")
-            logger.info(f"custom_meta: {custom_meta}")
+            if message.custom_meta.codec == JsonCodec.NAME:
+                struct.set_value("vipipe_custom_meta", message.custom_meta.to_json())
+            else:
+                # Не перекодируем в JSON, храним данные кодека вместе с тегом
+                struct.set_value("vipipe_custom_meta", GLib.Bytes.new(message.custom_meta.tobytes()))
 
-        buffer.fill(0, message.buffer)
+        if not self._fill(buffer, message.buffer):
+            return Gst.FlowReturn.ERROR, None
         return Gst.FlowReturn.OK, buffer
 
+    def _release_pool(self):
+        if self.pool is not None:
+            self.pool.set_active(False)
+            self.pool = None
+            self.pool_size = 0
+
+    def _create_pool(self, size: int):
+        """Создает пул буферов заданного размера для текущих капсов."""
+        pool = Gst.BufferPool.new()
+        config = pool.get_config()
+        Gst.BufferPool.config_set_params(config, Gst.Caps.from_string(self.caps_str), size, self.pool_min_buffers, 0)
+        if not pool.set_config(config) or not pool.set_active(True):
+            logger.warning("Не удалось создать пул буферов размера %d, буферы будут выделяться на каждый кадр", size)
+            return
+
+        self.pool = pool
+        self.pool_size = size
+        logger.debug("Создан пул буферов размера %d", size)
+
+    def _allocate(self, size: int):
+        """
+        Получает буфер для кадра.
+
+        Кадры несжатого видео одного размера, поэтому для них буферы берутся из пула и переиспользуются.
+        Размер сжатых кадров меняется от кадра к кадру, для них буфер выделяется каждый раз.
+        """
+        if self.buffer_pool and self.caps_str is not None and self.caps_str.startswith("video/x-raw"):
+            if self.pool is None or self.pool_size != size:
+                self._release_pool()
+                self._create_pool(size)
+
+            if self.pool is not None:
+                ret, buffer = self.pool.acquire_buffer(None)
+                if ret == Gst.FlowReturn.OK:
+                    return buffer
+
+        return Gst.Buffer.new_allocate(None, size, None)
+
+    def _fill(self, buffer, data) -> bool:
+        """Копирует данные кадра в буфер одним копированием через память отображенного буфера."""
+        success, map_info = buffer.map(Gst.MapFlags.WRITE)
+        if not success:
+            logger.error("Ошибка при записи в буфер")
+            return False
+
+        try:
+            map_info.data[: len(data)] = data
+        except TypeError:
+            # Старые версии gst-python отдают память только для чтения
+            buffer.unmap(map_info)
+            buffer.fill(0, bytes(data))
+            return True
+
+        buffer.unmap(map_info)
+        return True
+
+    def do_unlock(self):
+        """Прерывает ожидание данных в do_create при остановке или сбросе конвейера."""
+        self.flushing = True
+        if self.transport is not None:
+            self.transport.interrupt()
+        return True
+
+    def do_unlock_stop(self):
+        self.flushing = False
+        return True
+
+    def _push_gap(self):
+        """Сообщает элементам ниже по потоку, что данных за интервал ожидания не будет."""
+        if self.next_timestamp is None:
+            return
+
+        duration = self.heartbeat_interval * Gst.MSECOND
+        self.srcpad.push_event(Gst.Event.new_gap(self.next_timestamp, duration))
+        self.next_timestamp += duration
+
     def do_create(self, offset, size, amount):
-        if self.reader is None:
+        if self.reader is None or self.transport is None:
             return Gst.FlowReturn.ERROR
 
-        logger.debug("Trying to read message from ZeroMQ")
-
         while True:
+            if self.flushing:
+                return Gst.FlowReturn.FLUSHING, None
+
+            # Без данных поток спит в poll, его будит сообщение или do_unlock
+            if not self.transport.poll(self.heartbeat_interval or None):
+                if not self.flushing and self.heartbeat_interval:
+                    frame_logger.debug("Нет данных %d мс, отправляем GAP", self.heartbeat_interval)
+                    self._push_gap()
+                continue
+
             message = self.reader.read()
             if message is None:
-                logger.debug("No message received")
                 continue
 
             match message.MESSAGE_TYPE:
                 case GST_MESSAGE_TYPES.BUFFER:
-                    return self.handle_buffer_message(message)  # type: ignore
+                    if not self._has_caps_for(message):  # type: ignore
+                        frame_logger.debug("Капсы буфера еще не получены, пропускаем буфер")
+                        continue
+                    flow, buffer = self.handle_buffer_message(message)  # type: ignore
+                    # Кадр копируется из слота разделяемой памяти: проверяем, что его не перезаписали во время копирования
+                    if buffer is not None and self.shm_transport is not None and not self.shm_transport.is_valid():
+                        DROPPED_BUFFERS.labels("shm_overwritten").inc()  # type: ignore
+                        frame_logger.warning("Слот разделяемой памяти перезаписан во время копирования, кадр пропущен")
+                        continue
+                    return flow, buffer
                 case GST_MESSAGE_TYPES.CAPS:
                     self._parse_caps(message.caps_str)  # type: ignore
+                    self.caps_id = message.caps_id  # type: ignore
                 case GST_MESSAGE_TYPES.EOS:
                     return Gst.FlowReturn.EOS, None
                 case _:
@@ -1,7 +1,22 @@
+from .admission import AdmissionPolicy, AdmissionQueue
+from .asyncio import AsyncHandlerABC
 from .base import HandlerABC
-from .drawer import Drawer
+from .batch import BatchHandlerABC
+from .drawer import ArrayDrawer, Drawer
+from .pool import HandlerPool, HandlerPoolConfig, LatePolicy
+from .streams import MultiStreamHandlerABC, StreamState
 
 __all__ = [
     "HandlerABC",
+    "AsyncHandlerABC",
+    "BatchHandlerABC",
+    "MultiStreamHandlerABC",
+    "StreamState",
     "Drawer",
+    "ArrayDrawer",
+    "AdmissionPolicy",
+    "AdmissionQueue",
+    "HandlerPool",
+    "HandlerPoolConfig",
+    "LatePolicy",
 ]
@@ -0,0 +1,137 @@
+import queue
+import threading
+from collections import deque
+from dataclasses import dataclass, field
+from enum import Enum
+
+from vipipe.logging import get_logger
+from vipipe.metrics import DROPPED_BUFFERS
+from vipipe.transport.gstreamer import BufferMessage, GstMessage
+
+logger = get_logger("vipipe.handler.admission")
+
+
+class AdmissionPolicy(Enum):
+    """Политика приема кадров, когда обработчик не успевает за входным потоком."""
+
+    BLOCK = "block"
+    """Не отбрасывать кадры, чтение ждет обработчик (очередь сокета растет до buffer_length)"""
+
+    DROP_OLDEST = "drop_oldest"
+    """При переполнении отбрасывать самый старый кадр в очереди"""
+
+    DROP_NEWEST = "drop_newest"
+    """При переполнении отбрасывать пришедший кадр"""
+
+    LATEST_ONLY = "latest_only"
+    """Хранить только последний кадр: обработчик всегда получает самый свежий"""
+
+    EVERY_NTH = "every_nth"
+    """Пропускать только каждый N-й кадр, остальные отбрасывать сразу"""
+
+
+@dataclass
+class AdmissionQueue:
+    """
+    Очередь между потоком чтения и обработчиком с политикой отбрасывания кадров.
+
+    Отбрасываются только BufferMessage: остальные сообщения (капсы, конец потока)
+    принимаются всегда, даже сверх maxsize. Интерфейс put/get совместим с queue.Queue.
+    """
+
+    policy: AdmissionPolicy = AdmissionPolicy.BLOCK
+    maxsize: int = 4
+    """Максимальное количество кадров в очереди"""
+
+    every_nth: int = 1
+    """Шаг прореживания для EVERY_NTH"""
+
+    dropped: int = field(init=False, default=0)
+    """Количество отброшенных кадров"""
+
+    received: int = field(init=False, default=0)
+    """Количество принятых от читателя кадров"""
+
+    items: deque[GstMessage] = field(init=False, default_factory=deque)
+    buffers: int = field(init=False, default=0)
+    """Количество кадров в очереди"""
+
+    condition: threading.Condition = field(init=False, default_factory=threading.Condition)
+
+    def __post_init__(self):
+        if self.maxsize < 1:
+            raise ValueError("maxsize должен быть больше 0")
+        if self.every_nth < 1:
+            raise ValueError("every_nth должен быть больше 0")
+
+    def _drop_buffers(self, count: int) -> None:
+        """Отбрасывает count самых старых кадров, не трогая остальные сообщения."""
+        kept: deque[GstMessage] = deque()
+        while self.items and count > 0:
+            item = self.items.popleft()
+            if isinstance(item, BufferMessage):
+                count -= 1
+                self.buffers -= 1
+                self._dropped()
+            else:
+                kept.append(item)
+        kept.extend(self.items)
+        self.items = kept
+
+    def _dropped(self) -> None:
+        self.dropped += 1
+        DROPPED_BUFFERS.labels("admission").inc()  # type: ignore
+
+    def _full(self) -> bool:
+        return self.buffers >= self.maxsize
+
+    def put(self, item: GstMessage, timeout: float | None = None) -> None:
+        """
+        Кладет сообщение в очередь согласно политике.
+
+        Raises:
+            queue.Full: Для BLOCK и EVERY_NTH, если место не освободилось за timeout
+        """
+        with self.condition:
+            if not isinstance(item, BufferMessage):
+                self.items.append(item)
+                self.condition.notify_all()
+                return
+
+            self.received += 1
+            match self.policy:
+                case AdmissionPolicy.EVERY_NTH if (self.received - 1) % self.every_nth != 0:
+                    self._dropped()
+                    return
+                case AdmissionPolicy.DROP_NEWEST if self._full():
+                    self._dropped()
+                    return
+                case AdmissionPolicy.DROP_OLDEST if self._full():
+                    self._drop_buffers(self.buffers - self.maxsize + 1)
+                case AdmissionPolicy.LATEST_ONLY:
+                    self._drop_buffers(self.buffers)
+                case AdmissionPolicy.BLOCK | AdmissionPolicy.EVERY_NTH:
+                    if not self.condition.wait_for(lambda: not self._full(), timeout):
+                        self.received -= 1
+                        raise queue.Full
+
+            self.items.append(item)
+            self.buffers += 1
+            self.condition.notify_all()
+
+    def get(self, timeout: float | None = None) -> GstMessage:
+        """
+        Извлекает самое старое сообщение.
+
+        Raises:
+            queue.Empty: Если сообщений не появилось за timeout
+        """
+        with self.condition:
+            if not self.condition.wait_for(lambda: len(self.items) > 0, timeout):
+                raise queue.Empty
+
+            item = self.items.popleft()
+            if isinstance(item, BufferMessage):
+                self.buffers -= 1
+            self.condition.notify_all()
+            return item
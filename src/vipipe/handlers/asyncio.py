@@ -0,0 +1,111 @@
+from abc import ABC
+from dataclasses import dataclass
+
+from vipipe.logging import get_logger
+from vipipe.transport.gstreamer import (
+    BufferMessage,
+    BufferMetaMessage,
+    CapsMessage,
+    CustomMetaMessage,
+    EndOfStreamMessage,
+    GstMessage,
+)
+from vipipe.transport.gstreamer.asyncio import AsyncGstReader, AsyncGstWriter
+
+logger = get_logger("vipipe.handler.asyncio")
+
+
+@dataclass
+class AsyncHandlerABC(ABC):
+    """
+    Асинхронный вариант HandlerABC.
+
+    Обработчики методов - корутины, поэтому во время ожидания сети (запись в S3/Postgres,
+    чтение второго потока) event loop обслуживает другие обработчики. Несколько потоков
+    в одном процессе запускаются как asyncio.gather(handler1.run(), handler2.run()).
+    """
+
+    reader: AsyncGstReader
+    writer: AsyncGstWriter | None
+    is_running: bool = False
+
+    async def on_startup(self):
+        pass
+
+    async def on_shutdown(self):
+        pass
+
+    def set_stop(self):
+        self.is_running = False
+
+    async def _start(self):
+        await self.reader.start()
+        if self.writer is not None:
+            await self.writer.start()
+
+        await self.on_startup()
+        self.is_running = True
+
+    async def _stop(self):
+        await self.reader.stop()
+        if self.writer is not None:
+            await self.writer.write(EndOfStreamMessage())
+            await self.writer.stop()
+
+        await self.on_shutdown()
+        self.is_running = False
+
+    async def handle_buffer_message(self, message: BufferMessage) -> GstMessage | None:
+        return message
+
+    async def handle_custom_meta_message(self, message: CustomMetaMessage) -> GstMessage | None:
+        return message
+
+    async def handle_buffer_meta_message(self, message: BufferMetaMessage) -> GstMessage | None:
+        return message
+
+    async def handle_caps_message(self, message: CapsMessage) -> GstMessage | None:
+        return message
+
+    async def handle_eos_message(self, message: EndOfStreamMessage) -> GstMessage | None:
+        self.set_stop()
+        return message
+
+    async def handle_message(self, message: GstMessage) -> GstMessage | None:
+        match message.MESSAGE_TYPE:
+            case EndOfStreamMessage.MESSAGE_TYPE:
+                return await self.handle_eos_message(message)  # type: ignore
+            case CapsMessage.MESSAGE_TYPE:
+                return await self.handle_caps_message(message)  # type: ignore
+            case BufferMessage.MESSAGE_TYPE:
+                return await self.handle_buffer_message(message)  # type: ignore
+            case CustomMetaMessage.MESSAGE_TYPE:
+                return await self.handle_custom_meta_message(message)  # type: ignore
+            case BufferMetaMessage.MESSAGE_TYPE:
+                return await self.handle_buffer_meta_message(message)  # type: ignore
+            case _:
+                raise ValueError(f"Unknown message type: {message.MESSAGE_TYPE}")
+
+    async def __aenter__(self) -> "AsyncHandlerABC":
+        await self._start()
+        return self
+
+    async def __aexit__(self, type, value, traceback) -> None:
+        if type is not None:
+            logger.exception("Exception: %s", value)
+        await self._stop()
+
+    async def _write(self, message: GstMessage | None) -> None:
+        if message is not None and self.writer is not None:
+            await self.writer.write(message)
+
+    async def run(self) -> None:
+        async with self:
+            async for gst_message in self.reader.iread():
+                if gst_message is None:
+                    continue
+
+                await self._write(await self.handle_message(gst_message))
+
+                if not self.is_running:
+                    break
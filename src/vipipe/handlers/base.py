@@ -1,7 +1,12 @@
+import queue
+import threading
+import time
 from abc import ABC
-from dataclasses import dataclass
+from dataclasses import dataclass, field
+from typing import Iterator
 
 from vipipe.logging import get_logger
+from vipipe.metrics import HANDLE_TIME, WAIT_TIME, Histogram, start_metrics_server
 from vipipe.transport.gstreamer import (
     BufferMessage,
     BufferMetaMessage,
@@ -12,6 +17,9 @@ from vipipe.transport.gstreamer import (
     GstReader,
     GstWriter,
 )
+from vipipe.transport.gstreamer.tracing import TraceRecord, carry_trace, get_trace, stage_record
+
+from .admission import AdmissionPolicy, AdmissionQueue
 
 logger = get_logger("vipipe.handler")
 
@@ -22,6 +30,39 @@ class HandlerABC(ABC):
     writer: GstWriter | None
     is_running: bool = False
 
+    pipelined: bool = False
+    """Конвейерный режим: чтение с разбором, обработка и сериализация с отправкой выполняются
+    в отдельных потоках, поэтому задержка определяется самым медленным этапом, а не их суммой"""
+
+    queue_size: int = 4
+    """Размер очередей между этапами (в кадрах) в конвейерном режиме и при отбрасывании кадров"""
+
+    admission: AdmissionPolicy = AdmissionPolicy.BLOCK
+    """Политика приема кадров. При любой политике, кроме BLOCK, сокет вычитывается в отдельном потоке,
+    а обработчик получает кадры согласно политике. Капсы и конец потока не отбрасываются"""
+
+    every_nth: int = 1
+    """Шаг прореживания кадров для AdmissionPolicy.EVERY_NTH"""
+
+    trace_stage: str | None = None
+    """Имя этапа трассировки. Если задано, в кадры добавляются записи с временем получения, ожидания,
+    обработки и отправки (см. vipipe.transport.gstreamer.tracing)"""
+
+    metrics_port: int | None = None
+    """Порт HTTP-сервера метрик в формате Prometheus/OpenMetrics (None - не запускать)"""
+
+    handle_time: Histogram = field(init=False, default_factory=lambda: HANDLE_TIME.labels(), repr=False)  # type: ignore
+    """Длительность обработки кадров (в мс)"""
+
+    wait_time: Histogram = field(init=False, default_factory=lambda: WAIT_TIME.labels(), repr=False)  # type: ignore
+    """Время ожидания кадров перед обработкой (в мс), только при трассировке"""
+
+    _received: AdmissionQueue | None = field(init=False, default=None, repr=False)
+    _to_send: queue.Queue | None = field(init=False, default=None, repr=False)
+    _stages: list[threading.Thread] = field(init=False, default_factory=list, repr=False)
+    _stages_stop: threading.Event = field(init=False, default_factory=threading.Event, repr=False)
+    _stage_error: BaseException | None = field(init=False, default=None, repr=False)
+
     def on_startup(self):
         pass
 
@@ -32,6 +73,14 @@ class HandlerABC(ABC):
         self.is_running = False
 
     def _start(self):
+        if self.metrics_port is not None:
+            start_metrics_server(self.metrics_port)
+
+        if self.trace_stage is not None:
+            self.reader.trace_stage = self.reader.trace_stage or self.trace_stage
+            if self.writer is not None:
+                self.writer.trace_stage = self.writer.trace_stage or self.trace_stage
+
         self.reader.start()
         if self.writer is not None:
             self.writer.start()
@@ -39,7 +88,13 @@ class HandlerABC(ABC):
         self.on_startup()
         self.is_running = True
 
+        if self._staged:
+            self._start_stages()
+
     def _stop(self):
+        if self._staged:
+            self._stop_stages()
+
         self.reader.stop()
         if self.writer is not None:
             self.writer.write(EndOfStreamMessage())
@@ -85,19 +140,166 @@ class HandlerABC(ABC):
 
     def __exit__(self, type, value, traceback) -> None:
         if type is not None:
-            logger.exception(f"Exception: {value}")
+            logger.exception("Exception: %s", value)
         self._stop()
 
+    @property
+    def _staged(self) -> bool:
+        """Чтение выполняется в отдельном потоке."""
+        return self.pipelined or self.admission != AdmissionPolicy.BLOCK
+
+    def _start_stages(self) -> None:
+        self._received = AdmissionQueue(self.admission, self.queue_size, self.every_nth)
+        self._to_send = queue.Queue(self.queue_size) if self.pipelined else None
+        self._stages_stop.clear()
+        self._stage_error = None
+
+        self._stages = [threading.Thread(target=self._receive_stage, name="vipipe-handler-receive", daemon=True)]
+        if self._to_send is not None and self.writer is not None:
+            self._stages.append(threading.Thread(target=self._send_stage, name="vipipe-handler-send", daemon=True))
+
+        for stage in self._stages:
+            stage.start()
+
+    def _stop_stages(self) -> None:
+        # Сначала дожидаемся отправки результатов: после остановки в writer пишет только основной поток
+        if self._to_send is not None and self.writer is not None:
+            self._put(self._to_send, None)
+
+        self._stages_stop.set()
+        for stage in self._stages:
+            stage.join()
+        self._stages.clear()
+
+        if self._stage_error is not None:
+            logger.error("Ошибка в потоке конвейера: %r", self._stage_error)
+        if self._received is not None and self._received.dropped:
+            logger.info("Отброшено кадров: %d из %d", self._received.dropped, self._received.received)
+
+    def _put(self, stage_queue: queue.Queue | AdmissionQueue, item: GstMessage | None) -> bool:
+        """Кладет элемент в очередь, пока конвейер не остановлен. Возвращает False при остановке."""
+        while not self._stages_stop.is_set():
+            try:
+                stage_queue.put(item, timeout=0.1)
+                return True
+            except queue.Full:
+                continue
+        return False
+
+    def _receive_stage(self) -> None:
+        """Поток чтения: получает и разбирает сообщения."""
+        assert self._received is not None
+
+        try:
+            for gst_message in self.reader.iread():
+                if self._stages_stop.is_set():
+                    break
+                if gst_message is not None and not self._put(self._received, gst_message):
+                    break
+        except BaseException as e:
+            self._stage_error = e
+            self._stages_stop.set()
+
+    def _send_stage(self) -> None:
+        """Поток отправки: сериализует и отправляет результаты обработки."""
+        assert self._to_send is not None
+        assert self.writer is not None
+
+        try:
+            while True:
+                try:
+                    gst_message = self._to_send.get(timeout=0.1)
+                except queue.Empty:
+                    if self._stages_stop.is_set():
+                        break
+                    continue
+
+                # Признак остановки конвейера: все результаты до него уже отправлены
+                if gst_message is None:
+                    break
+
+                self.writer.write(gst_message)
+        except BaseException as e:
+            self._stage_error = e
+            self._stages_stop.set()
+
+    def _iread(self) -> Iterator[GstMessage | None]:
+        """Сообщения для обработки: напрямую из reader или из очереди потока чтения."""
+        if not self._staged:
+            yield from self.reader.iread()
+            return
+
+        assert self._received is not None
+        while True:
+            if self._stage_error is not None:
+                raise RuntimeError("Поток конвейера завершился с ошибкой") from self._stage_error
+            try:
+                yield self._received.get(timeout=0.1)
+            except queue.Empty:
+                yield None
+
+    def _traces(self, messages: list[GstMessage]) -> list[list[TraceRecord] | None]:
+        """Снимает записи трассировки кадров до обработки: обработчик может заменить кастомные метаданные."""
+        if self.trace_stage is None:
+            return [None] * len(messages)
+        return [get_trace(message) for message in messages]
+
+    def _observe(
+        self,
+        messages: list[GstMessage],
+        results: list[GstMessage | None],
+        started: float,
+        traces: list[list[TraceRecord] | None],
+    ) -> None:
+        """
+        Учитывает длительность обработки кадров, начатой в момент started (time.perf_counter()).
+
+        traces - записи трассировки кадров, снятые до обработки (см. _traces).
+        """
+        handle_time = (time.perf_counter() - started) * 1000
+        handle_started_at = time.time() - handle_time / 1000
+
+        for message, result, trace in zip(messages, results, traces):
+            if not isinstance(message, BufferMessage):
+                continue
+
+            self.handle_time.observe(handle_time)
+            if self.trace_stage is None:
+                continue
+
+            carry_trace(trace, result)
+            record = stage_record(result, self.trace_stage, create=True)
+            if record is None:
+                continue
+
+            record["handle"] = handle_time
+            if "recv" in record:
+                record["wait"] = max(0.0, (handle_started_at - record["recv"]) * 1000 - record.get("parse", 0.0))
+                self.wait_time.observe(record["wait"])
+
+    def _handle(self, message: GstMessage) -> GstMessage | None:
+        traces = self._traces([message])
+        started = time.perf_counter()
+        result = self.handle_message(message)
+        self._observe([message], [result], started, traces)
+        return result
+
+    def _write(self, message: GstMessage | None) -> None:
+        if message is None or self.writer is None:
+            return
+
+        if self._to_send is not None:
+            self._put(self._to_send, message)
+        else:
+            self.writer.write(message)
+
     def run(self) -> None:
         with self:
-            for gst_message in self.reader.iread():
+            for gst_message in self._iread():
                 if gst_message is None:
                     continue
 
-                message = self.handle_message(gst_message)
-
-                if message is not None and self.writer is not None:
-                    self.writer.write(message)
+                self._write(self._handle(gst_message))
 
                 if not self.is_running:
                     break
@@ -0,0 +1,77 @@
+import time
+from dataclasses import dataclass
+
+from vipipe.transport.gstreamer import BufferMessage, GstMessage
+
+from .base import HandlerABC
+
+
+@dataclass
+class BatchHandlerABC(HandlerABC):
+    """
+    Обработчик, собирающий BufferMessage в пачки для пакетного инференса.
+
+    Пачка обрабатывается, когда в ней набралось batch_size сообщений или с прихода первого
+    сообщения пачки прошло batch_timeout мс. Остальные сообщения (капсы, конец потока)
+    обрабатываются после текущей пачки, поэтому порядок сообщений на выходе сохраняется.
+
+    Время ожидания проверяется между чтениями, поэтому фактическая задержка может превысить
+    batch_timeout на время ожидания чтения (read_timeout читателя).
+    """
+
+    batch_size: int = 8
+    """Максимальное количество сообщений в пачке"""
+
+    batch_timeout: int = 50
+    """Максимальное время (в мс) ожидания заполнения пачки"""
+
+    def handle_buffer_batch(self, messages: list[BufferMessage]) -> list[GstMessage | None]:
+        """
+        Обрабатывает пачку сообщений с медиаданными.
+
+        Args:
+            messages: Сообщения в порядке получения
+        Returns:
+            Результаты обработки в том же порядке, по одному на каждое сообщение (None - не отправлять)
+        """
+        return [self.handle_buffer_message(message) for message in messages]
+
+    def _flush(self, batch: list[BufferMessage]) -> None:
+        if not batch:
+            return
+
+        traces = self._traces(batch)  # type: ignore
+        started = time.perf_counter()
+        results = self.handle_buffer_batch(batch)
+        if len(results) != len(batch):
+            raise ValueError(f"Несоответствие размера пачки: отправлено {len(batch)}, получено {len(results)}")
+        self._observe(batch, results, started, traces)  # type: ignore
+
+        for message in results:
+            self._write(message)
+
+        batch.clear()
+
+    def run(self) -> None:
+        with self:
+            batch: list[BufferMessage] = []
+            deadline = 0.0
+
+            for gst_message in self._iread():
+                if gst_message is None:
+                    pass
+                elif gst_message.MESSAGE_TYPE == BufferMessage.MESSAGE_TYPE:
+                    if not batch:
+                        deadline = time.monotonic() + self.batch_timeout / 1000
+                    batch.append(gst_message)  # type: ignore
+                else:
+                    self._flush(batch)
+                    self._write(self._handle(gst_message))
+
+                if batch and (len(batch) >= self.batch_size or time.monotonic() >= deadline):
+                    self._flush(batch)
+
+                if not self.is_running:
+                    break
+
+            self._flush(batch)
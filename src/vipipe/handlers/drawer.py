@@ -1,9 +1,14 @@
-from dataclasses import dataclass
-from typing import Sequence
+import math
+from dataclasses import dataclass, field
+from typing import Any, Sequence
 
+import numpy as np
+from PIL import Image as ImageModule
+from PIL import ImageFont
 from PIL.Image import Image
 from PIL.ImageDraw import Draw
-from vipipe.transport.gstreamer.entity import ObjectMeta
+from vipipe.transport.gstreamer.entity import BufferMessage, ObjectMeta
+from vipipe.transport.gstreamer.objects import ObjectsArray
 
 
 @dataclass
@@ -45,9 +50,237 @@ class Drawer:
             draw.polygon([int(p) for p in polygon], outline=self.color, fill=None)
 
     def draw_objects(self, image: Image, objects: Sequence[ObjectMeta]) -> None:
+        if isinstance(objects, ObjectsArray):
+            # Берем поля прямо из массивов, не создавая словари объектов
+            confs = [None if np.isnan(conf) else conf for conf in objects.confs.tolist()]
+            return self.draw_bboxes(image, objects.bboxes.tolist(), objects.label_list(), confs)
+
         return self.draw_bboxes(
             image,
             [object["bbox"] for object in objects],
             [object["label"] for object in objects],
             [object["conf"] for object in objects],
         )
+
+
+def _ragged_arange(starts: np.ndarray, lengths: np.ndarray) -> np.ndarray:
+    """Склеивает диапазоны [start, start + length) в один массив без цикла по диапазонам."""
+    lengths = np.maximum(lengths, 0)
+    total = int(lengths.sum())
+    if total == 0:
+        return np.empty(0, dtype=np.int64)
+    offsets = np.repeat(np.cumsum(lengths) - lengths, lengths)
+    return np.repeat(starts, lengths) + np.arange(total) - offsets
+
+
+@dataclass
+class GlyphAtlas:
+    """Кэш масок символов и готовых надписей шрифта по умолчанию PIL."""
+
+    max_texts: int = 1024
+    """Максимальное количество закэшированных надписей"""
+
+    font: Any = field(init=False, default_factory=ImageFont.load_default)
+    height: int = field(init=False)
+    glyphs: dict[str, np.ndarray] = field(init=False, default_factory=dict)
+    texts: dict[str, np.ndarray] = field(init=False, default_factory=dict)
+
+    def __post_init__(self):
+        self.height = int(self.font.getbbox("Ay|")[3]) + 1
+
+    def glyph(self, char: str) -> np.ndarray:
+        mask = self.glyphs.get(char)
+        if mask is None:
+            image = ImageModule.new("L", (max(1, math.ceil(self.font.getlength(char))), self.height))
+            Draw(image).text((0, 0), char, font=self.font, fill=255)
+            mask = self.glyphs[char] = np.asarray(image) > 127
+        return mask
+
+    def text(self, text: str) -> np.ndarray:
+        """Возвращает маску надписи H x W (bool)."""
+        mask = self.texts.get(text)
+        if mask is None:
+            if len(self.texts) >= self.max_texts:
+                self.texts.clear()
+            mask = self.texts[text] = np.hstack([self.glyph(char) for char in text] or [self.glyph(" ")])
+        return mask
+
+
+@dataclass
+class ArrayDrawer:
+    """
+    Рисует рамки, многоугольники и подписи прямо в кадре numpy (см. BufferMessage.as_array).
+
+    Пиксели всех рамок вычисляются одним набором операций numpy, подписи собираются из кэша масок символов,
+    поэтому стоимость отрисовки пропорциональна количеству закрашенных пикселей, а изображение PIL
+    на каждом кадре не создается.
+    """
+
+    color: tuple[int, int, int] = (0, 255, 0)
+    text_color: tuple[int, int, int] = (255, 255, 255)
+    thickness: int = 2
+
+    atlas: GlyphAtlas = field(default_factory=GlyphAtlas, repr=False)
+
+    @staticmethod
+    def _pixel(color: tuple[int, int, int], frame: np.ndarray, format: str) -> np.ndarray | int:
+        """Переводит цвет RGB в значение пикселя кадра."""
+        if frame.ndim == 2:
+            # GRAY8: яркость по ITU-R BT.601
+            return round(0.299 * color[0] + 0.587 * color[1] + 0.114 * color[2])
+
+        pixel = list(color[::-1] if format.startswith("BGR") else color)
+        pixel.extend([255] * (frame.shape[2] - 3))
+        return np.array(pixel, dtype=frame.dtype)
+
+    def _fill_segments(
+        self,
+        frame: np.ndarray,
+        fixed: np.ndarray,
+        starts: np.ndarray,
+        ends: np.ndarray,
+        vertical: bool,
+        pixel: np.ndarray | int,
+    ) -> None:
+        """Закрашивает горизонтальные (строка fixed) или вертикальные (столбец fixed) отрезки [start, end]."""
+        height, width = frame.shape[:2]
+        limit = height if vertical else width
+
+        inside = (fixed >= 0) & (fixed < (width if vertical else height)) & (ends >= 0) & (starts < limit)
+        fixed, starts, ends = fixed[inside], np.maximum(starts[inside], 0), np.minimum(ends[inside], limit - 1)
+        lengths = ends - starts + 1
+
+        moving = _ragged_arange(starts, lengths)
+        fixed = np.repeat(fixed, lengths)
+        if vertical:
+            frame[moving, fixed] = pixel
+        else:
+            frame[fixed, moving] = pixel
+
+    def draw_rectangles(self, frame: np.ndarray, bboxes: Any, format: str = "RGB") -> None:
+        """
+        Рисует рамки.
+
+        Args:
+            frame: Кадр H x W x C или H x W
+            bboxes: Координаты [x1, y1, x2, y2], N x 4
+            format: Формат кадра (порядок каналов)
+        """
+        boxes = np.asarray(bboxes, dtype=np.float32).reshape(-1, 4)
+        if len(boxes) == 0:
+            return
+
+        x1, y1, x2, y2 = np.round(boxes).astype(np.int64).T
+        offsets = np.arange(self.thickness)
+        pixel = self._pixel(self.color, frame, format)
+
+        # Каждая рамка - thickness горизонтальных и thickness вертикальных отрезков с каждой стороны
+        rows = np.concatenate([(y1[:, None] + offsets).ravel(), (y2[:, None] - offsets).ravel()])
+        self._fill_segments(
+            frame,
+            rows,
+            np.tile(np.repeat(x1, self.thickness), 2),
+            np.tile(np.repeat(x2, self.thickness), 2),
+            False,
+            pixel,
+        )
+
+        columns = np.concatenate([(x1[:, None] + offsets).ravel(), (x2[:, None] - offsets).ravel()])
+        self._fill_segments(
+            frame,
+            columns,
+            np.tile(np.repeat(y1, self.thickness), 2),
+            np.tile(np.repeat(y2, self.thickness), 2),
+            True,
+            pixel,
+        )
+
+    def draw_polygons(self, frame: np.ndarray, polygons: Sequence[Sequence[float | int]], format: str = "RGB") -> None:
+        """
+        Рисует контуры многоугольников.
+
+        Args:
+            frame: Кадр H x W x C или H x W
+            polygons: Многоугольники в виде [x1, y1, x2, y2, ...]
+            format: Формат кадра (порядок каналов)
+        """
+        edges = []
+        for polygon in polygons:
+            points = np.asarray(polygon, dtype=np.float32).reshape(-1, 2)
+            if len(points) > 1:
+                edges.append(np.hstack([points, np.roll(points, -1, axis=0)]))
+        if not edges:
+            return
+
+        x0, y0, x1, y1 = np.concatenate(edges).T
+        steps = np.maximum(np.abs(x1 - x0), np.abs(y1 - y0)).astype(np.int64) + 1
+
+        # Точки всех ребер: t пробегает [0, 1] с шагом в пиксель по большей стороне ребра
+        index = _ragged_arange(np.zeros_like(steps), steps)
+        t = index / np.repeat(np.maximum(steps - 1, 1), steps)
+        xs = np.round(np.repeat(x0, steps) + np.repeat(x1 - x0, steps) * t).astype(np.int64)
+        ys = np.round(np.repeat(y0, steps) + np.repeat(y1 - y0, steps) * t).astype(np.int64)
+
+        if self.thickness > 1:
+            offsets = np.arange(self.thickness) - self.thickness // 2
+            dx, dy = (axis.ravel() for axis in np.meshgrid(offsets, offsets))
+            xs = (xs[:, None] + dx).ravel()
+            ys = (ys[:, None] + dy).ravel()
+
+        height, width = frame.shape[:2]
+        inside = (xs >= 0) & (xs < width) & (ys >= 0) & (ys < height)
+        frame[ys[inside], xs[inside]] = self._pixel(self.color, frame, format)
+
+    def draw_text(self, frame: np.ndarray, x: int, y: int, text: str, format: str = "RGB") -> None:
+        """Рисует надпись, левый верхний угол - (x, y). Части за границами кадра обрезаются."""
+        mask = self.atlas.text(text)
+        height, width = frame.shape[:2]
+
+        top, left = max(y, 0), max(x, 0)
+        bottom, right = min(y + mask.shape[0], height), min(x + mask.shape[1], width)
+        if top >= bottom or left >= right:
+            return
+
+        region = frame[top:bottom, left:right]
+        region[mask[top - y : bottom - y, left - x : right - x]] = self._pixel(self.text_color, frame, format)
+
+    def draw_bboxes(
+        self,
+        frame: np.ndarray,
+        bboxes: Any,
+        labels: Sequence[str | None] | None = None,
+        confs: Any | None = None,
+        format: str = "RGB",
+    ) -> None:
+        """Рисует рамки с уверенностью над рамкой и меткой в нижнем левом углу (как Drawer.draw_bboxes)."""
+        boxes = np.asarray(bboxes, dtype=np.float32).reshape(-1, 4)
+        self.draw_rectangles(frame, boxes, format)
+
+        corners = np.round(boxes).astype(np.int64).tolist()
+        text_height = self.atlas.height
+
+        if confs is not None and len(confs) == len(boxes):
+            # NaN (или None) - уверенности нет, как в Drawer такие объекты рисуются без нее
+            confs = np.asarray(confs, dtype=np.float32)
+            for (x1, y1, _, _), conf, known in zip(corners, confs.tolist(), np.isfinite(confs).tolist()):
+                if known:
+                    self.draw_text(frame, x1, y1 - text_height, f"{conf:.2f}", format)
+
+        if labels is not None and len(labels) == len(boxes):
+            for (x1, _, _, y2), label in zip(corners, labels):
+                if label is not None:
+                    self.draw_text(frame, x1, y2 - text_height, label, format)
+
+    def draw_objects(self, frame: np.ndarray, objects: Sequence[ObjectMeta], format: str = "RGB") -> None:
+        """Рисует объекты. ObjectsArray рисуется прямо из массивов, без словарей объектов."""
+        if not isinstance(objects, ObjectsArray):
+            objects = ObjectsArray.from_objects(objects)
+        self.draw_bboxes(frame, objects.bboxes, objects.label_list(), objects.confs, format)
+
+    def draw_message(self, message: BufferMessage, objects: Sequence[ObjectMeta]) -> None:
+        """Рисует объекты в кадре сообщения на месте (см. BufferMessage.as_array)."""
+        format = message.frame_format
+        if format is None:
+            # Без формата порядок каналов пришлось бы угадывать, и цвета рисовались бы неверно
+            raise ValueError("Неизвестен формат кадра: укажите payload_format, caps_str или caps")
+        self.draw_objects(message.as_array(format, writable=True), objects, format)
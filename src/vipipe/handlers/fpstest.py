@@ -45,7 +45,7 @@ class FPSCounter:
         current_time = time.time()
         if current_time - self.last_fps_report_time >= self.report_interval:
             fps = self.get_fps()
-            logger.info(f"Текущий FPS: {fps:.2f}")
+            logger.info("Текущий FPS: %.2f", fps)
             self.last_fps_report_time = current_time
 
 
@@ -68,4 +68,4 @@ class FPSTestHandler(HandlerABC):
 
     def on_shutdown(self) -> None:
         """Действия при завершении работы обработчика."""
-        logger.info(f"FPS тестовый обработчик завершен. Средний FPS: {self.fps_counter.get_fps():.2f}")
+        logger.info("FPS тестовый обработчик завершен. Средний FPS: %.2f", self.fps_counter.get_fps())
@@ -0,0 +1,263 @@
+import math
+import os
+import time
+from abc import ABC
+from dataclasses import dataclass, field
+from typing import Any
+
+import numpy as np
+
+from vipipe.handlers.base import HandlerABC
+from vipipe.logging import get_logger
+from vipipe.transport.gstreamer import BufferMessage, GstMessage
+from vipipe.transport.gstreamer.objects import ObjectsArrayMetaMessage
+
+try:
+    import pyarrow
+    import pyarrow.parquet
+except ImportError:  # pragma: no cover
+    pyarrow = None
+
+logger = get_logger("vipipe.handler.metasink")
+
+Columns = dict[str, Any]
+"""Пачка объектов в виде столбцов: имя столбца - массив numpy или список."""
+
+METADATA_COLUMNS = ("stream", "pts", "index", "x1", "y1", "x2", "y2", "conf", "class_id", "label")
+"""Столбцы пачки объектов."""
+
+
+def objects_columns(message: BufferMessage, stream: str) -> Columns | None:
+    """
+    Извлекает объекты кадра в виде столбцов, не трогая медиаданные.
+
+    Args:
+        message: Кадр с объектами в кастомных метаданных (см. ObjectsMetaMessage)
+        stream: Идентификатор потока
+    Returns:
+        Столбцы METADATA_COLUMNS или None, если объектов нет
+    """
+    custom_meta = message.custom_meta
+    if custom_meta is None or not custom_meta.metadata.get("objects"):
+        return None
+
+    objects = ObjectsArrayMetaMessage.from_custom_meta(custom_meta).objects
+    count = len(objects)
+    pts = message.buffer_meta.pts if message.buffer_meta is not None else -1
+
+    return {
+        "stream": [stream] * count,
+        "pts": np.full(count, pts, dtype=np.int64),
+        "index": np.arange(count, dtype=np.int32),
+        "x1": objects.bboxes[:, 0],
+        "y1": objects.bboxes[:, 1],
+        "x2": objects.bboxes[:, 2],
+        "y2": objects.bboxes[:, 3],
+        "conf": objects.confs,
+        "class_id": objects.class_ids,
+        "label": objects.label_list(),
+    }
+
+
+def concat_columns(batches: list[Columns]) -> Columns:
+    """Склеивает пачки столбцов в одну."""
+    result = {}
+    for name in METADATA_COLUMNS:
+        values = [batch[name] for batch in batches]
+        if isinstance(values[0], np.ndarray):
+            result[name] = np.concatenate(values)
+        else:
+            result[name] = [value for chunk in values for value in chunk]
+    return result
+
+
+def columns_to_rows(columns: Columns) -> list[dict[str, Any]]:
+    """Переводит столбцы в строки для PostgresWriter.write_rows."""
+    names = list(columns)
+    values = [column.tolist() if isinstance(column, np.ndarray) else column for column in columns.values()]
+    rows = [dict(zip(names, row)) for row in zip(*values)]
+    for row in rows:
+        if row["class_id"] is not None and row["class_id"] < 0:
+            row["class_id"] = None
+        if row["conf"] is not None and math.isnan(row["conf"]):
+            row["conf"] = None
+    return rows
+
+
+def _require_pyarrow() -> Any:
+    if pyarrow is None:
+        raise ImportError("Для записи пачек объектов в Parquet/Arrow требуется пакет pyarrow")
+    return pyarrow
+
+
+def columns_to_arrow(columns: Columns) -> Any:
+    """Переводит столбцы в pyarrow.RecordBatch без поэлементного обхода числовых столбцов."""
+    pa = _require_pyarrow()
+    class_ids = columns["class_id"]
+    confs = columns["conf"]
+    arrays = {
+        **columns,
+        "conf": pa.array(confs, mask=np.isnan(confs)),
+        "class_id": pa.array(class_ids, mask=class_ids < 0),
+    }
+    return pa.RecordBatch.from_pydict(arrays)
+
+
+class MetaSinkABC(ABC):
+    """Получатель пачек объектов. Владеет writer'ами, в которые пишет: запускает их в start и останавливает в close."""
+
+    def start(self) -> None:
+        pass
+
+    def write_batch(self, columns: Columns) -> None:
+        raise NotImplementedError
+
+    def close(self) -> None:
+        pass
+
+
+@dataclass
+class RowsMetaSink(MetaSinkABC):
+    """Передает объекты строками в PostgresWriter (или любой writer с методом write_rows)."""
+
+    writer: Any
+    """PostgresWriter"""
+
+    table: Any
+    """Таблица или класс модели со столбцами METADATA_COLUMNS"""
+
+    def start(self) -> None:
+        self.writer.start()
+
+    def write_batch(self, columns: Columns) -> None:
+        self.writer.write_rows(self.table, columns_to_rows(columns))
+
+    def close(self) -> None:
+        # Дожидается записи строк из очереди фонового потока
+        self.writer.stop()
+
+
+@dataclass
+class ArrowMetaSink(MetaSinkABC):
+    """
+    Записывает каждую пачку объектов отдельным файлом Parquet или Arrow IPC:
+    в каталог или, если задан s3_writer, в S3 (S3Writer) с ключом prefix + имя файла.
+    """
+
+    directory: str = "."
+    """Каталог для файлов (без s3_writer)"""
+
+    format: str = "parquet"
+    """Формат файлов: parquet или arrow"""
+
+    s3_writer: Any | None = None
+    """S3Writer для загрузки файлов вместо записи в каталог"""
+
+    prefix: str = ""
+    """Префикс ключей S3"""
+
+    sequence: int = field(init=False, default=0)
+
+    def start(self) -> None:
+        if self.s3_writer is not None:
+            self.s3_writer.start()
+
+    def close(self) -> None:
+        # Дожидается загрузки объектов из очереди фоновых потоков
+        if self.s3_writer is not None:
+            self.s3_writer.stop()
+
+    def _serialize(self, batch: Any) -> bytes:
+        pa = _require_pyarrow()
+        output = pa.BufferOutputStream()
+        if self.format == "parquet":
+            pa.parquet.write_table(pa.Table.from_batches([batch]), output)
+        elif self.format == "arrow":
+            with pa.ipc.new_file(output, batch.schema) as writer:
+                writer.write_batch(batch)
+        else:
+            raise ValueError(f"Неподдерживаемый формат пачки объектов: {self.format}")
+        return output.getvalue().to_pybytes()
+
+    def write_batch(self, columns: Columns) -> None:
+        batch = columns_to_arrow(columns)
+        pts = columns["pts"]
+        name = f"{columns['stream'][0]}-{int(pts[0])}-{int(pts[-1])}-{self.sequence:06d}.{self.format}"
+        self.sequence += 1
+
+        data = self._serialize(batch)
+        if self.s3_writer is not None:
+            from vipipe.transport.s3.writer import S3Object
+
+            self.s3_writer.write(S3Object(key=self.prefix + name, message=data))
+            return
+
+        os.makedirs(self.directory, exist_ok=True)
+        with open(os.path.join(self.directory, name), "wb") as file:
+            file.write(data)
+
+
+@dataclass
+class MetaSinkHandler(HandlerABC):
+    """
+    Сохраняет объекты из кастомных метаданных кадров (ObjectsMetaMessage), не трогая медиаданные.
+
+    Части BufferMessage разбираются лениво, поэтому обработчик декодирует только кастомные метаданные
+    и метаданные буфера, а кадр не распаковывается и не копируется. Объекты копятся пачками
+    и передаются в sink целиком, с ключом (stream, pts).
+    """
+
+    sink: MetaSinkABC | None = None
+    """Получатель пачек объектов. Обработчик запускает его в on_startup и закрывает в on_shutdown"""
+
+    stream: str = ""
+    """Идентификатор потока в строках для кадров без темы (GstMessage.stream)"""
+
+    batch_rows: int = 10000
+    """Количество объектов, при котором пачка передается в sink"""
+
+    flush_interval: float = 5.0
+    """Максимальное время (в секундах) накопления пачки"""
+
+    passthrough: bool = False
+    """Передавать кадры дальше в writer (обработчик в середине конвейера). Иначе обработчик - конечный этап"""
+
+    batches: list[Columns] = field(init=False, default_factory=list)
+    rows: int = field(init=False, default=0)
+    first_batch_time: float | None = field(init=False, default=None)
+
+    def flush(self) -> None:
+        """Передает накопленные объекты в sink."""
+        if not self.batches or self.sink is None:
+            return
+
+        columns = concat_columns(self.batches)
+        self.batches, self.rows, self.first_batch_time = [], 0, None
+        try:
+            self.sink.write_batch(columns)
+        except Exception as e:
+            logger.error("Ошибка записи %d объектов: %s", len(columns["pts"]), e)
+
+    def handle_buffer_message(self, message: BufferMessage) -> GstMessage | None:
+        columns = objects_columns(message, message.stream or self.stream)
+        if columns is not None:
+            self.batches.append(columns)
+            self.rows += len(columns["pts"])
+            if self.first_batch_time is None:
+                self.first_batch_time = time.monotonic()
+
+        if self.rows >= self.batch_rows or (
+            self.first_batch_time is not None and time.monotonic() - self.first_batch_time >= self.flush_interval
+        ):
+            self.flush()
+
+        return message if self.passthrough else None
+
+    def on_startup(self) -> None:
+        if self.sink is not None:
+            self.sink.start()
+
+    def on_shutdown(self) -> None:
+        self.flush()
+        if self.sink is not None:
+            self.sink.close()
@@ -0,0 +1,474 @@
+import multiprocessing
+import os
+import tempfile
+import threading
+import time
+from dataclasses import dataclass, field
+from enum import Enum
+from typing import Any, Callable
+
+import zmq
+
+from vipipe.logging import ThrottledLogger, get_logger
+from vipipe.metrics import DROPPED_BUFFERS
+from vipipe.transport.gstreamer import (
+    GST_MESSAGE_TYPES,
+    BufferMessage,
+    CapsMessage,
+    EndOfStreamMessage,
+    GstMessage,
+    GstReader,
+    GstWriter,
+)
+from vipipe.transport.interface import decode_topic, split_topic
+from vipipe.transport.zeromq import ZeroMQReader, ZeroMQReaderConfig, ZeroMQWriter, ZeroMQWriterConfig
+
+from .base import HandlerABC
+from .batch import BatchHandlerABC
+
+logger = get_logger("vipipe.handler.pool")
+frame_logger = ThrottledLogger(logger)
+
+SEQUENCE_BYTES = 8
+"""Размер номера последовательности в служебной части сообщения."""
+
+READY_SEQUENCE = 2 ** (8 * SEQUENCE_BYTES) - 1
+"""Служебный номер: воркер запущен и готов принимать сообщения."""
+
+STOP_SEQUENCE = READY_SEQUENCE - 1
+"""Служебный номер: воркеру пора завершаться."""
+
+
+class LatePolicy(Enum):
+    """Что делать с результатом, который пришел после того, как его место в порядке было пропущено."""
+
+    DROP = "drop"
+    """Отбросить результат"""
+
+    PASS = "pass"
+    """Отправить результат сразу при получении, вне порядка"""
+
+
+@dataclass
+class HandlerPoolConfig:
+    workers: int = field(default_factory=lambda: os.cpu_count() or 1)
+    """Количество процессов-воркеров"""
+
+    reorder_window: int = 16
+    """Максимальное количество сообщений, ожидающих отправки в исходном порядке (окно переупорядочивания)"""
+
+    late_timeout: int = 1000
+    """Время (в мс), после которого неготовое сообщение в голове окна пропускается"""
+
+    late_policy: LatePolicy = LatePolicy.DROP
+    """Что делать с результатами, пришедшими после пропуска"""
+
+    read_timeout: int = 100
+    """Максимальное время ожидания (в мс) для чтения из внутренних сокетов"""
+
+    startup_timeout: int = 60000
+    """Максимальное время (в мс) ожидания запуска воркеров (загрузки моделей в on_startup)"""
+
+    start_method: str = "spawn"
+    """Способ запуска процессов multiprocessing"""
+
+
+@dataclass(slots=True)
+class _PendingMessage:
+    dispatched_at: float
+    parts: list[bytes] | None = None
+    done: bool = False
+
+
+@dataclass
+class ReorderBuffer:
+    """Восстанавливает исходный порядок результатов по номерам последовательности."""
+
+    late_timeout: float
+    """Время (в секундах), после которого неготовое сообщение в голове пропускается"""
+
+    late_policy: LatePolicy = LatePolicy.DROP
+
+    next_sequence: int = 0
+    """Номер следующего сообщения на отправку"""
+
+    pending: dict[int, _PendingMessage] = field(default_factory=dict)
+    skipped: int = 0
+    """Количество пропущенных по таймауту сообщений"""
+
+    late: int = 0
+    """Количество результатов, пришедших после пропуска"""
+
+    def add(self, sequence: int, parts: list[bytes] | None = None) -> None:
+        """
+        Регистрирует отправленное сообщение.
+
+        Args:
+            sequence: Номер сообщения
+            parts: Готовый результат (для сообщений, которые не обрабатываются воркерами)
+        """
+        self.pending[sequence] = _PendingMessage(time.monotonic(), parts, done=parts is not None)
+
+    def complete(self, sequence: int, parts: list[bytes]) -> list[list[bytes]]:
+        """
+        Сохраняет результат обработки сообщения (пустой список - сообщение не отправляется).
+
+        Returns:
+            Результаты, которые нужно отправить вне порядка (согласно late_policy)
+        """
+        message = self.pending.get(sequence)
+        if message is None:
+            self.late += 1
+            if self.late_policy == LatePolicy.PASS and parts:
+                return [parts]
+            return []
+
+        message.parts = parts
+        message.done = True
+        return []
+
+    def pop_ready(self, now: float) -> list[list[bytes]]:
+        """Извлекает результаты, готовые к отправке в исходном порядке."""
+        ready = []
+        while self.next_sequence in self.pending:
+            message = self.pending[self.next_sequence]
+            if not message.done:
+                if now - message.dispatched_at < self.late_timeout:
+                    break
+                self.skipped += 1
+                DROPPED_BUFFERS.labels("late").inc()  # type: ignore
+                frame_logger.warning("Результат сообщения %d не получен вовремя, пропускаем", self.next_sequence)
+            elif message.parts:
+                ready.append(message.parts)
+
+            del self.pending[self.next_sequence]
+            self.next_sequence += 1
+
+        return ready
+
+
+def _parse_caps(data: bytes, cache: dict[bytes, CapsMessage]) -> CapsMessage:
+    data = bytes(data)
+    caps = cache.get(data)
+    if caps is None:
+        cache.clear()
+        caps = cache[data] = CapsMessage.parse([CapsMessage.MESSAGE_TYPE.value.to_bytes(1, "big"), data])  # type: ignore
+    return caps
+
+
+def _read_batch(tasks: ZeroMQReader, batch_size: int, batch_timeout: float) -> list[list[bytes]]:
+    parts = tasks.read_multipart()
+    if parts is None:
+        return []
+
+    batch = [parts]
+    deadline = time.monotonic() + batch_timeout
+    while len(batch) < batch_size and time.monotonic() < deadline:
+        parts = tasks.read_multipart()
+        if parts is not None:
+            batch.append(parts)
+
+    return batch
+
+
+def _worker_main(
+    handler_class: type[HandlerABC],
+    handler_kwargs: dict[str, Any],
+    tasks_address: str,
+    results_address: str,
+    read_timeout: int,
+) -> None:
+    """Точка входа процесса-воркера: обрабатывает BufferMessage и возвращает результат с номером сообщения."""
+    is_batch = issubclass(handler_class, BatchHandlerABC)
+    if is_batch:
+        read_timeout = min(read_timeout, handler_kwargs.get("batch_timeout", BatchHandlerABC.batch_timeout))
+
+    tasks = ZeroMQReader(ZeroMQReaderConfig(tasks_address, zmq.SocketType.PULL, read_timeout=read_timeout))
+    results = ZeroMQWriter(
+        ZeroMQWriterConfig(results_address, zmq.SocketType.PUSH, send_timeout=-1, immediate=False, bind=False)
+    )
+    handler = handler_class(reader=GstReader(tasks), writer=GstWriter(results), **handler_kwargs)
+
+    tasks.start()
+    results.start()
+    handler.on_startup()
+    handler.is_running = True
+    results.write_multipart([READY_SEQUENCE.to_bytes(SEQUENCE_BYTES, "big")])
+
+    # Капсы меняются редко, разбираем их один раз
+    caps_cache: dict[bytes, CapsMessage] = {}
+
+    batch_size = handler.batch_size if isinstance(handler, BatchHandlerABC) else 1
+    batch_timeout = handler.batch_timeout / 1000 if isinstance(handler, BatchHandlerABC) else 0.0
+
+    try:
+        while handler.is_running:
+            batch = _read_batch(tasks, batch_size, batch_timeout)
+
+            if any(int.from_bytes(parts[0], "big") == STOP_SEQUENCE for parts in batch):
+                handler.set_stop()
+                batch = [parts for parts in batch if int.from_bytes(parts[0], "big") != STOP_SEQUENCE]
+            if not batch:
+                continue
+
+            sequences = [parts[0] for parts in batch]
+            # Задача: номер, тема (пустая - без темы), данные капсов потока (пустые - капсов нет), части сообщения
+            topics = [parts[1] for parts in batch]
+
+            try:
+                messages = [GstMessage.parse(parts[3:]) for parts in batch]
+                for message, topic, caps_data in zip(messages, topics, (parts[2] for parts in batch)):
+                    if topic:
+                        message.set_stream(decode_topic(topic) or None)
+                    if caps_data and isinstance(message, BufferMessage):
+                        message.caps = _parse_caps(caps_data, caps_cache)
+                # Как в обычном обработчике: учитываются длительности, записи трассировки переносятся в результат
+                if isinstance(handler, BatchHandlerABC):
+                    traces = handler._traces(messages)
+                    started = time.perf_counter()
+                    outputs = handler.handle_buffer_batch(messages)  # type: ignore
+                    handler._observe(messages, outputs, started, traces)
+                else:
+                    outputs = [handler._handle(message) for message in messages]
+            except Exception:
+                logger.exception("Ошибка обработки сообщений воркером %d", os.getpid())
+                outputs = [None] * len(batch)
+
+            for sequence, topic, output in zip(sequences, topics, outputs):
+                # Результат уходит с темой исходного кадра
+                output_parts = [*([topic] if topic else []), *output.toparts()] if output is not None else []
+                results.write_multipart([sequence, *output_parts])
+    finally:
+        handler.on_shutdown()
+        tasks.stop()
+        results.stop()
+
+
+@dataclass
+class HandlerPool:
+    """
+    Запускает несколько процессов с одним и тем же обработчиком.
+
+    BufferMessage из reader раздаются воркерам, результаты собираются и отправляются в writer
+    в исходном порядке. Остальные сообщения (капсы, конец потока) в воркеры не попадают
+    и проходят без изменений на своем месте в потоке. Сообщения пересылаются без разбора
+    (GstReader.read_parts и GstWriter.write_parts), поэтому боковой канал, тема, трассировка
+    и метрики reader и writer работают так же, как у обычного обработчика.
+
+    Воркер создает обработчик как handler_class(reader=..., writer=..., **handler_kwargs),
+    вызывает on_startup и handle_message (для BatchHandlerABC - handle_buffer_batch).
+    """
+
+    reader: GstReader
+    writer: GstWriter | None
+    handler_class: type[HandlerABC]
+    handler_kwargs: dict[str, Any] = field(default_factory=dict)
+    config: HandlerPoolConfig = field(default_factory=HandlerPoolConfig)
+    is_running: bool = False
+
+    def __post_init__(self):
+        prefix = os.path.join(tempfile.gettempdir(), f"vipipe-pool-{os.getpid()}-{id(self)}")
+        self.tasks_address = f"ipc://{prefix}-tasks.ipc"
+        self.results_address = f"ipc://{prefix}-results.ipc"
+
+        self.tasks = ZeroMQWriter(
+            ZeroMQWriterConfig(
+                self.tasks_address,
+                zmq.SocketType.PUSH,
+                buffer_length=self.config.reorder_window,
+                send_timeout=self.config.late_timeout,
+                linger=0,
+            )
+        )
+        self.results = ZeroMQReader(
+            ZeroMQReaderConfig(
+                self.results_address,
+                zmq.SocketType.PULL,
+                buffer_length=self.config.reorder_window,
+                read_timeout=self.config.read_timeout,
+                bind=True,
+            )
+        )
+
+        self.reorder = ReorderBuffer(late_timeout=self.config.late_timeout / 1000, late_policy=self.config.late_policy)
+        self.condition = threading.Condition()
+        self.sequence = 0
+        self.caps: dict[bytes, bytes] = {}
+        """Данные последних капсов каждого потока (по теме)"""
+        self.eos_sent = False
+        self.workers: list[multiprocessing.process.BaseProcess] = []
+        self.collector: threading.Thread | None = None
+
+    def set_stop(self):
+        self.is_running = False
+
+    def _wait_workers_ready(self) -> None:
+        ready = 0
+        deadline = time.monotonic() + self.config.startup_timeout / 1000
+        while ready < len(self.workers):
+            if time.monotonic() > deadline:
+                raise RuntimeError(f"Запущено {ready} из {len(self.workers)} воркеров за отведенное время")
+            if not all(worker.is_alive() for worker in self.workers):
+                raise RuntimeError("Воркер завершился при запуске")
+
+            parts = self.results.read_multipart()
+            if parts is not None and int.from_bytes(parts[0], "big") == READY_SEQUENCE:
+                ready += 1
+
+        logger.info("Запущено воркеров: %d", ready)
+
+    def _start(self):
+        # Остановка уже запущенного, если запуск прервется
+        started: list[Callable[[], None]] = []
+        try:
+            if self.writer is not None:
+                self.writer.start()
+                started.append(self.writer.stop)
+            self.results.start()
+            started.append(self.results.stop)
+            self.tasks.start()
+            started.append(self.tasks.stop)
+            started.append(self._terminate_workers)
+
+            context = multiprocessing.get_context(self.config.start_method)
+            for _ in range(self.config.workers):
+                worker = context.Process(
+                    target=_worker_main,
+                    args=(
+                        self.handler_class,
+                        self.handler_kwargs,
+                        self.tasks_address,
+                        self.results_address,
+                        self.config.read_timeout,
+                    ),
+                    daemon=True,
+                )
+                worker.start()
+                self.workers.append(worker)
+
+            self._wait_workers_ready()
+
+            self.reader.start()
+        except Exception:
+            for stop in reversed(started):
+                try:
+                    stop()
+                except Exception:
+                    logger.exception("Ошибка остановки после неудачного запуска пула")
+            raise
+
+        self.is_running = True
+        self.collector = threading.Thread(target=self._collect, name="vipipe-pool-collector", daemon=True)
+        self.collector.start()
+
+    def _terminate_workers(self) -> None:
+        for worker in self.workers:
+            if worker.is_alive():
+                worker.terminate()
+        for worker in self.workers:
+            worker.join()
+        self.workers.clear()
+
+    def _stop(self):
+        self.is_running = False
+        if self.collector is not None:
+            self.collector.join()
+
+        self.reader.stop()
+
+        for _ in self.workers:
+            try:
+                self.tasks.write_multipart([STOP_SEQUENCE.to_bytes(SEQUENCE_BYTES, "big")])
+            except zmq.Again:
+                break
+        for worker in self.workers:
+            worker.join(timeout=self.config.late_timeout / 1000)
+            if worker.is_alive():
+                worker.terminate()
+
+        self.tasks.stop()
+        self.results.stop()
+
+        if self.writer is not None:
+            if not self.eos_sent:
+                self.writer.write(EndOfStreamMessage())
+            self.writer.stop()
+
+        logger.info("Пропущено по таймауту: %d, опоздавших результатов: %d", self.reorder.skipped, self.reorder.late)
+
+    def __enter__(self) -> "HandlerPool":
+        self._start()
+        return self
+
+    def __exit__(self, type, value, traceback) -> None:
+        if type is not None:
+            logger.exception("Exception: %s", value)
+        self._stop()
+
+    def _emit(self, messages: list[list[bytes]]) -> None:
+        for parts in messages:
+            _, message_parts = split_topic(parts)
+            if GstMessage.decode_message_type(message_parts[0]) == GST_MESSAGE_TYPES.EOS:
+                self.eos_sent = True
+            if self.writer is not None:
+                self.writer.write_parts(parts)
+
+    def _collect(self) -> None:
+        """Поток сборки: получает результаты воркеров и отправляет их в исходном порядке."""
+        while True:
+            parts = self.results.read_multipart()
+
+            with self.condition:
+                late = []
+                if parts is not None:
+                    late = self.reorder.complete(int.from_bytes(parts[0], "big"), parts[1:])
+                ready = self.reorder.pop_ready(time.monotonic())
+                finished = not self.is_running and not self.reorder.pending
+                self.condition.notify_all()
+
+            self._emit(late)
+            self._emit(ready)
+
+            if finished:
+                break
+
+    def _dispatch(self, parts: list[bytes]) -> None:
+        sequence = self.sequence
+        self.sequence += 1
+        topic, message_parts = split_topic(parts)
+        message_type = GstMessage.decode_message_type(message_parts[0])
+        if message_type == GST_MESSAGE_TYPES.CAPS:
+            # Капсы в воркеры не попадают, поэтому передаются вместе с каждым кадром потока
+            # (в бинарном формате метаданных буфера формат кадра известен только по капсам)
+            self.caps[topic] = message_parts[1]
+
+        with self.condition:
+            while len(self.reorder.pending) >= self.config.reorder_window:
+                self.condition.wait(self.config.read_timeout / 1000)
+
+            if message_type != GST_MESSAGE_TYPES.BUFFER:
+                self.reorder.add(sequence, parts)
+                return
+
+            self.reorder.add(sequence)
+
+        try:
+            self.tasks.write_multipart(
+                [sequence.to_bytes(SEQUENCE_BYTES, "big"), topic, self.caps.get(topic, b""), *message_parts]
+            )
+        except zmq.Again:
+            frame_logger.warning("Воркеры не принимают сообщения, сообщение %d пропущено", sequence)
+            with self.condition:
+                self.reorder.complete(sequence, [])
+
+    def run(self) -> None:
+        with self:
+            while self.is_running:
+                parts = self.reader.read_parts()
+                if parts is None:
+                    continue
+
+                self._dispatch(parts)
+
+                if GstMessage.decode_message_type(split_topic(parts)[1][0]) == GST_MESSAGE_TYPES.EOS:
+                    self.set_stop()
@@ -0,0 +1,105 @@
+import time
+from dataclasses import dataclass, field
+
+from vipipe.logging import get_logger
+from vipipe.transport.gstreamer import BufferMessage, CapsMessage, EndOfStreamMessage, GstMessage
+from vipipe.transport.gstreamer.tracing import TraceRecord
+
+from .base import HandlerABC
+
+logger = get_logger("vipipe.handler.streams")
+
+
+@dataclass
+class StreamState:
+    """Состояние одного потока. Обработчики хранят в наследнике свои данные потока (трекер, счетчики и т.п.)."""
+
+    stream: str | None
+    """Идентификатор потока (GstMessage.stream)"""
+
+    caps: CapsMessage | None = None
+    """Последние капсы потока"""
+
+    frames: int = 0
+    """Количество полученных кадров"""
+
+    last_seen: float = field(default_factory=time.monotonic)
+    """Время (time.monotonic()) последнего сообщения потока"""
+
+
+@dataclass
+class MultiStreamHandlerABC(HandlerABC):
+    """
+    Обработчик нескольких потоков (камер), получаемых через один reader.
+
+    Потоки различаются темой ZeroMQ: камеры публикуют кадры с ZeroMQWriterConfig.topic, обработчик читает их
+    одним сокетом SUB (ZeroMQReaderConfig.addresses/topics), а GstReader сохраняет тему в GstMessage.stream. Так одна
+    загруженная модель обслуживает все камеры, а с BatchHandlerABC кадры разных камер попадают в одну пачку.
+
+    Перед обработкой каждого сообщения self.state указывает на состояние его потока (см. new_stream_state).
+    В пакетном режиме состояние кадра берется через stream_state(message.stream). Результаты получают
+    stream исходного сообщения, поэтому GstWriter(topic_frame=True) отправляет их с темой потока.
+    Конец потока удаляет только его состояние.
+    """
+
+    stop_on_last_eos: bool = False
+    """Останавливаться, когда завершились все известные потоки. Иначе обработчик ждет новые потоки"""
+
+    streams: dict[str | None, StreamState] = field(init=False, default_factory=dict)
+    """Состояния активных потоков"""
+
+    state: StreamState | None = field(init=False, default=None)
+    """Состояние потока обрабатываемого сообщения"""
+
+    def new_stream_state(self, stream: str | None) -> StreamState:
+        """Создает состояние нового потока. Переопределяется, чтобы хранить свои данные потока."""
+        return StreamState(stream)
+
+    def on_stream_end(self, state: StreamState) -> None:
+        """Вызывается при конце потока, перед удалением его состояния."""
+
+    def stream_state(self, stream: str | None) -> StreamState:
+        """Возвращает состояние потока, создавая его при первом сообщении потока."""
+        state = self.streams.get(stream)
+        if state is None:
+            state = self.streams[stream] = self.new_stream_state(stream)
+            logger.info("Новый поток: %s (всего %d)", stream, len(self.streams))
+        return state
+
+    def handle_message(self, message: GstMessage) -> GstMessage | None:
+        self.state = self.stream_state(message.stream)
+        self.state.last_seen = time.monotonic()
+        return super().handle_message(message)
+
+    def handle_caps_message(self, message: CapsMessage) -> GstMessage | None:
+        assert self.state is not None
+        self.state.caps = message
+        return message
+
+    def handle_eos_message(self, message: EndOfStreamMessage) -> GstMessage | None:
+        state = self.streams.pop(message.stream, None)
+        if state is not None:
+            self.on_stream_end(state)
+            logger.info("Поток завершен: %s (осталось %d)", message.stream, len(self.streams))
+
+        if self.stop_on_last_eos and not self.streams:
+            self.set_stop()
+        return message
+
+    def _observe(
+        self,
+        messages: list[GstMessage],
+        results: list[GstMessage | None],
+        started: float,
+        traces: list[list[TraceRecord] | None],
+    ) -> None:
+        super()._observe(messages, results, started, traces)
+
+        for message, result in zip(messages, results):
+            if isinstance(message, BufferMessage):
+                # В пакетном режиме кадры не проходят через handle_message
+                state = self.stream_state(message.stream)
+                state.frames += 1
+                state.last_seen = time.monotonic()
+            if result is not None and result is not message and result.stream is None:
+                result.set_stream(message.stream)
@@ -0,0 +1,124 @@
+import time
+from dataclasses import dataclass, field
+from typing import Optional
+
+from vipipe.handlers.base import HandlerABC
+from vipipe.logging import get_logger
+from vipipe.metrics import Histogram
+from vipipe.transport.gstreamer import BufferMessage, GstMessage
+from vipipe.transport.gstreamer.tracing import TraceRecord, get_trace
+
+logger = get_logger("vipipe.handler.tracing")
+
+
+@dataclass
+class StageStats:
+    """Статистика одного этапа по записям трассировки."""
+
+    parse: Histogram = field(default_factory=Histogram)
+    """Разбор сообщения (мс)"""
+    wait: Histogram = field(default_factory=Histogram)
+    """Ожидание в очереди перед обработкой (мс)"""
+    handle: Histogram = field(default_factory=Histogram)
+    """Обработка (мс)"""
+    transit: Histogram = field(default_factory=Histogram)
+    """Передача от предыдущего этапа: от его отправки до получения этим этапом (мс)"""
+    frames: int = 0
+    dropped: int = 0
+    """Кадры, отправленные этапом, но не дошедшие до сборщика"""
+    last_seq: int | None = None
+
+    def update(self, record: TraceRecord, previous: TraceRecord | None) -> None:
+        self.frames += 1
+
+        for name in ("parse", "wait", "handle"):
+            if name in record:
+                getattr(self, name).observe(record[name])
+
+        if previous is not None and "send" in previous and "recv" in record:
+            self.transit.observe(max(0.0, (record["recv"] - previous["send"]) * 1000))
+
+        seq = record.get("seq")
+        if seq is not None:
+            if self.last_seq is not None and seq > self.last_seq + 1:
+                self.dropped += seq - self.last_seq - 1
+            self.last_seq = seq
+
+
+@dataclass
+class TraceCollectorHandler(HandlerABC):
+    """
+    Собирает записи трассировки из кадров (см. trace_stage у HandlerABC, GstReader, GstWriter)
+    и периодически выводит p50/p99 по этапам. Ставится последним этапом или отдельным потребителем.
+    """
+
+    report_interval: float = 5.0
+    """Интервал вывода статистики (в секундах)"""
+
+    stages: dict[str, StageStats] = field(init=False, default_factory=dict)
+    latency: Histogram = field(init=False, default_factory=Histogram)
+    """Задержка от первого этапа до сборщика (мс)"""
+    last_report_time: float = field(init=False, default_factory=time.monotonic)
+
+    def collect(self, trace: list[TraceRecord]) -> None:
+        """Учитывает записи трассировки одного кадра."""
+        previous = None
+        for record in trace:
+            stage = record.get("stage")
+            if stage is None:
+                continue
+            self.stages.setdefault(stage, StageStats()).update(record, previous)
+            previous = record
+
+        # Источник может только отправлять кадры, тогда отсчет идет от его отправки
+        started_at = trace[0].get("recv", trace[0].get("send")) if trace else None
+        if started_at is not None:
+            self.latency.observe(max(0.0, (time.time() - started_at) * 1000))
+
+    def report(self) -> dict[str, dict[str, float]]:
+        """Возвращает p50/p99 (в мс) и количество потерянных кадров по этапам."""
+        result = {}
+        for stage, stats in self.stages.items():
+            result[stage] = {
+                "frames": stats.frames,
+                "dropped": stats.dropped,
+                **{
+                    f"{name}_p{int(q * 100)}": getattr(stats, name).quantile(q)
+                    for name in ("transit", "parse", "wait", "handle")
+                    for q in (0.5, 0.99)
+                },
+            }
+        return result
+
+    def log_report(self) -> None:
+        for stage, stats in self.report().items():
+            logger.info(
+                "%s: кадров %d, потеряно %d, передача %.1f/%.1f, разбор %.1f/%.1f, ожидание %.1f/%.1f, "
+                "обработка %.1f/%.1f мс (p50/p99)",
+                stage,
+                stats["frames"],
+                stats["dropped"],
+                stats["transit_p50"],
+                stats["transit_p99"],
+                stats["parse_p50"],
+                stats["parse_p99"],
+                stats["wait_p50"],
+                stats["wait_p99"],
+                stats["handle_p50"],
+                stats["handle_p99"],
+            )
+        logger.info("Полная задержка: %.1f/%.1f мс (p50/p99)", self.latency.quantile(0.5), self.latency.quantile(0.99))
+
+    def handle_buffer_message(self, message: BufferMessage) -> Optional[GstMessage]:
+        trace = get_trace(message)
+        if trace:
+            self.collect(trace)
+
+        if time.monotonic() - self.last_report_time >= self.report_interval:
+            self.log_report()
+            self.last_report_time = time.monotonic()
+
+        return message
+
+    def on_shutdown(self) -> None:
+        self.log_report()
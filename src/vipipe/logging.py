@@ -1,23 +1,144 @@
+import atexit
 import logging
+import logging.handlers
+import os
+import queue
+import threading
+import time
+from dataclasses import dataclass, field
 
-logging.basicConfig(
-    level=logging.DEBUG,
-    format="%(asctime)s - %(name)s:%(filename)s:%(lineno)d - %(levelname)s - %(message)s",
-)
+LOG_FORMAT = "%(asctime)s - %(name)s:%(filename)s:%(lineno)d - %(levelname)s - %(message)s"
 
+LOG_LEVEL_ENV = "VIPIPE_LOG_LEVEL"
+"""Переменная окружения с уровнями логирования: "INFO" или "INFO,vipipe.transport=DEBUG"."""
 
-def get_logger(name: str, level: int = logging.DEBUG) -> logging.Logger:
+LOG_QUEUE_ENV = "VIPIPE_LOG_QUEUE"
+"""Переменная окружения: "0" - писать логи синхронно, без фонового потока."""
+
+_listener: logging.handlers.QueueListener | None = None
+
+
+def _parse_levels(value: str) -> tuple[str, dict[str, str]]:
+    """Разбирает значение VIPIPE_LOG_LEVEL в уровень по умолчанию и уровни отдельных логгеров."""
+    default = "INFO"
+    levels = {}
+    for item in value.split(","):
+        item = item.strip()
+        if not item:
+            continue
+        if "=" in item:
+            name, level = item.split("=", 1)
+            levels[name.strip()] = level.strip().upper()
+        else:
+            default = item.upper()
+    return default, levels
+
+
+def setup_logging(level: str | int | None = None, use_queue: bool | None = None) -> None:
+    """
+    Настраивает корневой логгер, если приложение не настроило его само.
+
+    Записи форматируются и выводятся в фоновом потоке (QueueHandler/QueueListener),
+    поэтому медленный вывод не блокирует обработку кадров.
+
+    Args:
+        level: Уровень по умолчанию (по умолчанию из VIPIPE_LOG_LEVEL, иначе INFO)
+        use_queue: Выводить логи через фоновый поток (по умолчанию из VIPIPE_LOG_QUEUE, иначе да)
+    """
+    global _listener
+
+    root = logging.getLogger()
+    if root.handlers:
+        return
+
+    default, levels = _parse_levels(os.environ.get(LOG_LEVEL_ENV, ""))
+    root.setLevel(level if level is not None else default)
+    for name, logger_level in levels.items():
+        logging.getLogger(name).setLevel(logger_level)
+
+    handler = logging.StreamHandler()
+    handler.setFormatter(logging.Formatter(LOG_FORMAT))
+
+    if use_queue is None:
+        use_queue = os.environ.get(LOG_QUEUE_ENV, "1") != "0"
+    if not use_queue:
+        root.addHandler(handler)
+        return
+
+    log_queue: queue.SimpleQueue = queue.SimpleQueue()
+    root.addHandler(logging.handlers.QueueHandler(log_queue))
+    _listener = logging.handlers.QueueListener(log_queue, handler, respect_handler_level=True)
+    _listener.start()
+    atexit.register(_listener.stop)
+
+
+def get_logger(name: str, level: int | None = None) -> logging.Logger:
     """
     Получает логгер с заданным именем.
 
     Args:
         name: Имя логгера
-        level: Уровень логирования (по умолчанию DEBUG)
+        level: Уровень логирования (по умолчанию наследуется, см. VIPIPE_LOG_LEVEL)
 
     Returns:
         Логгер с заданным именем
     """
 
     logger = logging.getLogger(name)
-    logger.setLevel(level)
+    if level is not None:
+        logger.setLevel(level)
     return logger
+
+
+@dataclass
+class ThrottledLogger:
+    """
+    Ограничивает частоту сообщений, которые пишутся на каждом кадре.
+
+    Одно и то же сообщение (по шаблону) выводится не чаще раза в interval секунд,
+    к нему дописывается количество пропущенных повторов. Если уровень отключен,
+    вызов стоит одной проверки isEnabledFor.
+    """
+
+    logger: logging.Logger
+    interval: float = 1.0
+    """Минимальный интервал (в секундах) между одинаковыми сообщениями"""
+
+    last_emitted: dict[str, float] = field(init=False, default_factory=dict)
+    suppressed: dict[str, int] = field(init=False, default_factory=dict)
+    lock: threading.Lock = field(init=False, default_factory=threading.Lock, repr=False)
+
+    def log(self, level: int, msg: str, *args) -> None:
+        self._log(level, msg, args)
+
+    def _log(self, level: int, msg: str, args: tuple) -> None:
+        if not self.logger.isEnabledFor(level):
+            return
+
+        now = time.monotonic()
+        with self.lock:
+            if now - self.last_emitted.get(msg, float("-inf")) < self.interval:
+                self.suppressed[msg] = self.suppressed.get(msg, 0) + 1
+                return
+            self.last_emitted[msg] = now
+            suppressed = self.suppressed.pop(msg, 0)
+
+        if suppressed:
+            self.logger.log(level, msg + " (пропущено повторов: %d)", *args, suppressed, stacklevel=3)
+        else:
+            self.logger.log(level, msg, *args, stacklevel=3)
+
+    def debug(self, msg: str, *args) -> None:
+        self._log(logging.DEBUG, msg, args)
+
+    def info(self, msg: str, *args) -> None:
+        self._log(logging.INFO, msg, args)
+
+    def warning(self, msg: str, *args) -> None:
+        self._log(logging.WARNING, msg, args)
+
+    def error(self, msg: str, *args) -> None:
+        self._log(logging.ERROR, msg, args)
+
+
+setup_logging()
@@ -0,0 +1,265 @@
+import bisect
+import threading
+from dataclasses import dataclass, field
+from http.server import BaseHTTPRequestHandler, ThreadingHTTPServer
+
+from vipipe.logging import get_logger
+
+logger = get_logger("vipipe.metrics")
+
+DEFAULT_BUCKETS: tuple[float, ...] = (
+    0.1, 0.25, 0.5, 1, 2, 3, 5, 7.5, 10, 15, 20, 30, 50, 75, 100, 150, 250, 500, 1000, 2500, 5000, 10000,
+)  # fmt: skip
+"""Границы корзин гистограммы по умолчанию (в мс)."""
+
+
+@dataclass
+class Histogram:
+    """
+    Гистограмма с фиксированными границами корзин.
+
+    Хранит только количество значений в корзинах, поэтому подходит для постоянного
+    учета длительностей на каждом кадре. Квантили оцениваются линейной интерполяцией внутри корзины.
+    """
+
+    buckets: tuple[float, ...] = DEFAULT_BUCKETS
+    """Верхние границы корзин по возрастанию. Значения больше последней границы попадают в корзину +Inf"""
+
+    counts: list[int] = field(init=False)
+    count: int = field(init=False, default=0)
+    sum: float = field(init=False, default=0.0)
+    max: float = field(init=False, default=0.0)
+
+    lock: threading.Lock = field(init=False, default_factory=threading.Lock, repr=False)
+
+    def __post_init__(self):
+        self.counts = [0] * (len(self.buckets) + 1)
+
+    def observe(self, value: float) -> None:
+        """Добавляет значение."""
+        index = bisect.bisect_left(self.buckets, value)
+        with self.lock:
+            self.counts[index] += 1
+            self.count += 1
+            self.sum += value
+            if value > self.max:
+                self.max = value
+
+    def quantile(self, q: float) -> float:
+        """
+        Оценивает квантиль.
+
+        Args:
+            q: Уровень квантиля от 0 до 1
+        Returns:
+            Оценка квантиля (0, если значений нет)
+        """
+        with self.lock:
+            if self.count == 0:
+                return 0.0
+
+            rank = q * self.count
+            seen = 0
+            for index, bucket_count in enumerate(self.counts):
+                if bucket_count and seen + bucket_count >= rank:
+                    lower = self.buckets[index - 1] if index > 0 else 0.0
+                    upper = self.buckets[index] if index < len(self.buckets) else self.max
+                    return lower + (upper - lower) * (rank - seen) / bucket_count
+                seen += bucket_count
+
+            return self.max
+
+    @property
+    def mean(self) -> float:
+        return self.sum / self.count if self.count else 0.0
+
+    def reset(self) -> None:
+        """Сбрасывает накопленные значения."""
+        with self.lock:
+            self.counts = [0] * (len(self.buckets) + 1)
+            self.count = 0
+            self.sum = 0.0
+            self.max = 0.0
+
+
+@dataclass
+class Counter:
+    """Монотонно возрастающий счетчик."""
+
+    value: float = field(init=False, default=0.0)
+    lock: threading.Lock = field(init=False, default_factory=threading.Lock, repr=False)
+
+    def inc(self, amount: float = 1) -> None:
+        with self.lock:
+            self.value += amount
+
+
+@dataclass
+class Gauge:
+    """Текущее значение величины (глубина очереди, количество воркеров)."""
+
+    value: float = field(init=False, default=0.0)
+
+    def set(self, value: float) -> None:
+        self.value = value
+
+
+Metric = Counter | Gauge | Histogram
+
+
+def _format_labels(names: tuple[str, ...], values: tuple[str, ...], extra: str = "") -> str:
+    pairs = [f'{name}="{value}"' for name, value in zip(names, values)]
+    if extra:
+        pairs.append(extra)
+    return "{" + ",".join(pairs) + "}" if pairs else ""
+
+
+@dataclass
+class MetricFamily:
+    """Метрика с набором меток. Значения для конкретных меток создаются при первом обращении к labels."""
+
+    name: str
+    help: str
+    kind: str
+    """Тип метрики OpenMetrics: counter, gauge или histogram"""
+    label_names: tuple[str, ...] = ()
+
+    children: dict[tuple[str, ...], Metric] = field(init=False, default_factory=dict)
+    lock: threading.Lock = field(init=False, default_factory=threading.Lock, repr=False)
+
+    def labels(self, *values: str) -> Metric:
+        """
+        Получает значение метрики для меток.
+
+        Args:
+            values: Значения меток в порядке label_names
+        """
+        if len(values) != len(self.label_names):
+            raise ValueError(f"Метрика {self.name} ожидает метки {self.label_names}, получено {values}")
+
+        child = self.children.get(values)
+        if child is None:
+            with self.lock:
+                child = self.children.get(values)
+                if child is None:
+                    child = {"counter": Counter, "gauge": Gauge, "histogram": Histogram}[self.kind]()
+                    self.children[values] = child
+        return child
+
+    def render(self) -> list[str]:
+        lines = [f"# HELP {self.name} {self.help}", f"# TYPE {self.name} {self.kind}"]
+        for values, child in list(self.children.items()):
+            if isinstance(child, Histogram):
+                with child.lock:
+                    counts = list(child.counts)
+                    total, count = child.sum, child.count
+
+                cumulative = 0
+                for bucket, bucket_count in zip((*map(float, child.buckets), "+Inf"), counts):
+                    cumulative += bucket_count
+                    labels = _format_labels(self.label_names, values, f'le="{bucket}"')
+                    lines.append(f"{self.name}_bucket{labels} {cumulative}")
+                labels = _format_labels(self.label_names, values)
+                lines.append(f"{self.name}_sum{labels} {total}")
+                lines.append(f"{self.name}_count{labels} {count}")
+            else:
+                suffix = "_total" if self.kind == "counter" and not self.name.endswith("_total") else ""
+                lines.append(f"{self.name}{suffix}{_format_labels(self.label_names, values)} {child.value}")
+        return lines
+
+
+@dataclass
+class MetricsRegistry:
+    """Реестр метрик процесса."""
+
+    families: dict[str, MetricFamily] = field(default_factory=dict)
+    lock: threading.Lock = field(init=False, default_factory=threading.Lock, repr=False)
+
+    def _family(self, name: str, help: str, kind: str, labels: tuple[str, ...]) -> MetricFamily:
+        with self.lock:
+            family = self.families.get(name)
+            if family is None:
+                family = self.families[name] = MetricFamily(name, help, kind, labels)
+            elif family.kind != kind or family.label_names != labels:
+                raise ValueError(f"Метрика {name} уже зарегистрирована с другим типом или метками")
+            return family
+
+    def counter(self, name: str, help: str, labels: tuple[str, ...] = ()) -> MetricFamily:
+        return self._family(name, help, "counter", labels)
+
+    def gauge(self, name: str, help: str, labels: tuple[str, ...] = ()) -> MetricFamily:
+        return self._family(name, help, "gauge", labels)
+
+    def histogram(self, name: str, help: str, labels: tuple[str, ...] = ()) -> MetricFamily:
+        return self._family(name, help, "histogram", labels)
+
+    def render(self) -> str:
+        """Выводит метрики в текстовом формате Prometheus/OpenMetrics."""
+        lines = []
+        for family in list(self.families.values()):
+            lines.extend(family.render())
+        lines.append("# EOF")
+        return "\n".join(lines) + "\n"
+
+
+REGISTRY = MetricsRegistry()
+"""Реестр метрик процесса по умолчанию."""
+
+MESSAGES_RECEIVED = REGISTRY.counter("vipipe_messages_received", "Полученные сообщения", ("type",))
+MESSAGES_SENT = REGISTRY.counter("vipipe_messages_sent", "Отправленные сообщения", ("type",))
+BYTES_RECEIVED = REGISTRY.counter("vipipe_bytes_received", "Полученные байты сообщений")
+BYTES_SENT = REGISTRY.counter("vipipe_bytes_sent", "Отправленные байты сообщений")
+READ_TIMEOUTS = REGISTRY.counter("vipipe_read_timeouts", "Чтения, завершившиеся по таймауту без сообщения")
+DROPPED_BUFFERS = REGISTRY.counter("vipipe_dropped_buffers", "Отброшенные кадры", ("reason",))
+
+PARSE_TIME = REGISTRY.histogram("vipipe_parse_time_milliseconds", "Длительность разбора сообщений")
+SERIALIZE_TIME = REGISTRY.histogram("vipipe_serialize_time_milliseconds", "Длительность сериализации сообщений")
+HANDLE_TIME = REGISTRY.histogram("vipipe_handle_time_milliseconds", "Длительность обработки кадров")
+WAIT_TIME = REGISTRY.histogram("vipipe_wait_time_milliseconds", "Ожидание кадров в очереди перед обработкой")
+
+
+_servers: dict[int, ThreadingHTTPServer] = {}
+_servers_lock = threading.Lock()
+
+
+def start_metrics_server(port: int, registry: MetricsRegistry = REGISTRY) -> ThreadingHTTPServer:
+    """
+    Запускает в фоновом потоке HTTP-сервер, отдающий метрики по пути /metrics.
+
+    Повторный вызов с тем же портом возвращает уже запущенный сервер.
+
+    Args:
+        port: Порт
+        registry: Реестр метрик
+    Returns:
+        Запущенный сервер
+    """
+
+    class MetricsRequestHandler(BaseHTTPRequestHandler):
+        def do_GET(self):
+            if self.path.split("?")[0] not in ("/", "/metrics"):
+                self.send_error(404)
+                return
+
+            body = registry.render().encode("UTF-8")
+            self.send_response(200)
+            self.send_header("Content-Type", "application/openmetrics-text; version=1.0.0; charset=utf-8")
+            self.send_header("Content-Length", str(len(body)))
+            self.end_headers()
+            self.wfile.write(body)
+
+        def log_message(self, format, *args):
+            pass
+
+    with _servers_lock:
+        server = _servers.get(port)
+        if server is not None:
+            return server
+
+        server = ThreadingHTTPServer(("", port), MetricsRequestHandler)
+        server.daemon_threads = True
+        threading.Thread(target=server.serve_forever, name="vipipe-metrics", daemon=True).start()
+        _servers[port] = server
+
+    logger.info("Метрики доступны на порту %d", port)
+    return server
@@ -7,6 +7,7 @@ from .entity import (
     EndOfStreamMessage,
     GstMessage,
 )
+from .join import MetaJoinReader
 from .reader import GstReader
 from .writer import GstWriter
 
@@ -20,4 +21,5 @@ __all__ = [
     "BufferMetaMessage",
     "GstWriter",
     "GstReader",
+    "MetaJoinReader",
 ]
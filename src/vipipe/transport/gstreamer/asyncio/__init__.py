@@ -0,0 +1,4 @@
+from .reader import AsyncGstReader
+from .writer import AsyncGstWriter
+
+__all__ = ["AsyncGstReader", "AsyncGstWriter"]
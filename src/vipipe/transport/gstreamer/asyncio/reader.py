@@ -0,0 +1,27 @@
+from dataclasses import dataclass, field
+
+from vipipe.transport.interface.asyncio import AsyncMultipartReaderABC, AsyncReaderABC
+
+from ..entity import CapsMessage, GstMessage
+from ..reader import parse_stream_message
+
+
+@dataclass
+class AsyncGstReader(AsyncReaderABC[GstMessage]):
+    reader: AsyncMultipartReaderABC[bytes]
+
+    caps: dict[str | None, CapsMessage] = field(init=False, default_factory=dict)
+    """Последние капсы каждого потока (см. GstReader.caps)"""
+
+    async def start(self):
+        await self.reader.start()
+
+    async def stop(self):
+        await self.reader.stop()
+
+    async def read(self) -> GstMessage | None:
+        message_parts = await self.reader.read_multipart()
+        if message_parts is None:
+            return None
+
+        return parse_stream_message(message_parts, self.caps)
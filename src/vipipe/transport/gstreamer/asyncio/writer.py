@@ -0,0 +1,35 @@
+from dataclasses import dataclass
+from typing import Callable
+
+from vipipe.transport.interface.asyncio import AsyncMultipartWriterABC, AsyncWriterABC
+
+from ..entity import GstMessage
+
+
+@dataclass
+class AsyncGstWriter(AsyncWriterABC[GstMessage]):
+    writer: AsyncMultipartWriterABC[bytes]
+
+    async def start(self):
+        await self.writer.start()
+
+    async def stop(self):
+        await self.writer.stop()
+
+    async def write(self, message: GstMessage, on_release: Callable[[], None] | None = None) -> None:
+        """
+        Записывает сообщение.
+
+        Args:
+            message: Сообщение
+            on_release: Вызывается ровно один раз, когда транспорт больше не использует память сообщения
+                (в том числе при ошибке сериализации или записи)
+        """
+        try:
+            message_parts = message.toparts()
+        except Exception:
+            if on_release is not None:
+                on_release()
+            raise
+
+        await self.writer.write_multipart(message_parts, on_release=on_release)
@@ -0,0 +1,226 @@
+from __future__ import annotations
+
+import json
+import struct
+from abc import ABC
+from typing import Any, ClassVar
+
+try:
+    import numpy as np
+except ImportError:  # pragma: no cover
+    np = None
+
+try:
+    import orjson
+except ImportError:  # pragma: no cover
+    orjson = None
+
+try:
+    import msgpack
+except ImportError:  # pragma: no cover
+    msgpack = None
+
+
+class CustomMetaCodecABC(ABC):
+    """
+    Кодек сериализации кастомных метаданных.
+
+    Тег кодека передается первым байтом закодированных данных, поэтому получатель
+    определяет кодек по самому сообщению.
+    """
+
+    NAME: ClassVar[str]
+    """Имя кодека, указывается в CustomMetaMessage.codec"""
+
+    TAG: ClassVar[int]
+    """Тег кодека в бинарном формате (0-255)"""
+
+    def encode(self, metadata: dict[str, Any]) -> bytes:
+        raise NotImplementedError
+
+    def decode(self, data: bytes | memoryview) -> dict[str, Any]:
+        raise NotImplementedError
+
+
+CUSTOM_META_CODECS: dict[str, CustomMetaCodecABC] = {}
+"""Зарегистрированные кодеки по имени."""
+
+_CUSTOM_META_CODECS_BY_TAG: dict[int, CustomMetaCodecABC] = {}
+
+
+def register_custom_meta_codec(codec: CustomMetaCodecABC) -> CustomMetaCodecABC:
+    """
+    Регистрирует кодек кастомных метаданных.
+
+    Args:
+        codec: Экземпляр кодека
+    Returns:
+        Зарегистрированный кодек
+    Raises:
+        ValueError: Если имя или тег кодека уже заняты
+    """
+    if codec.NAME in CUSTOM_META_CODECS:
+        raise ValueError(f"Кодек {codec.NAME} уже зарегистрирован")
+    if codec.TAG in _CUSTOM_META_CODECS_BY_TAG:
+        raise ValueError(f"Тег кодека {codec.TAG} уже занят кодеком {_CUSTOM_META_CODECS_BY_TAG[codec.TAG].NAME}")
+
+    CUSTOM_META_CODECS[codec.NAME] = codec
+    _CUSTOM_META_CODECS_BY_TAG[codec.TAG] = codec
+    return codec
+
+
+def get_custom_meta_codec(name: str) -> CustomMetaCodecABC:
+    """Получает кодек по имени."""
+    try:
+        return CUSTOM_META_CODECS[name]
+    except KeyError:
+        raise ValueError(f"Неизвестный кодек кастомных метаданных: {name}") from None
+
+
+def get_custom_meta_codec_by_tag(tag: int) -> CustomMetaCodecABC:
+    """Получает кодек по тегу из бинарного формата."""
+    try:
+        return _CUSTOM_META_CODECS_BY_TAG[tag]
+    except KeyError:
+        raise ValueError(f"Неизвестный тег кодека кастомных метаданных: {tag}") from None
+
+
+def json_default(obj: Any) -> Any:
+    """Сериализует в JSON объекты, умеющие превращаться в список (массивы numpy, ObjectsArray)."""
+    if hasattr(obj, "tolist"):
+        return obj.tolist()
+    raise TypeError(f"Object of type {type(obj).__name__} is not JSON serializable")
+
+
+def _require(module: Any, name: str) -> Any:
+    if module is None:
+        raise ImportError(f"Для кодека кастомных метаданных требуется пакет {name}")
+    return module
+
+
+class JsonCodec(CustomMetaCodecABC):
+    """Стандартный json, совместим с получателями без поддержки кодеков."""
+
+    NAME = "json"
+    TAG = 0
+
+    def encode(self, metadata: dict[str, Any]) -> bytes:
+        return json.dumps(metadata, default=json_default).encode("UTF-8")
+
+    def decode(self, data: bytes | memoryview) -> dict[str, Any]:
+        return json.loads(bytes(data))
+
+
+class OrjsonCodec(CustomMetaCodecABC):
+    """JSON через orjson, умеет сериализовать массивы numpy."""
+
+    NAME = "orjson"
+    TAG = 1
+
+    def encode(self, metadata: dict[str, Any]) -> bytes:
+        return _require(orjson, "orjson").dumps(
+            metadata,
+            default=json_default,
+            option=orjson.OPT_SERIALIZE_NUMPY,  # type: ignore
+        )
+
+    def decode(self, data: bytes | memoryview) -> dict[str, Any]:
+        return _require(orjson, "orjson").loads(data)
+
+
+class MsgpackCodec(CustomMetaCodecABC):
+    """Бинарный формат msgpack."""
+
+    NAME = "msgpack"
+    TAG = 2
+
+    def encode(self, metadata: dict[str, Any]) -> bytes:
+        return _require(msgpack, "msgpack").packb(metadata, default=json_default, use_bin_type=True)
+
+    def decode(self, data: bytes | memoryview) -> dict[str, Any]:
+        return _require(msgpack, "msgpack").unpackb(data, raw=False)
+
+
+class ColumnarCodec(CustomMetaCodecABC):
+    """
+    Колоночный формат для метаданных с объектами (см. ObjectsMetaMessage).
+
+    Поля объектов упаковываются в массивы numpy: bbox (N x 4, float32), conf (float32),
+    class_id и индекс метки в таблице меток (int32, -1 - нет значения).
+    Остальные метаданные, таблица меток и атрибуты объектов передаются в JSON.
+    Объекты декодируются в ObjectsArray, массивы которого ссылаются на принятые данные.
+
+    Формат: заголовок (количество объектов, длина JSON), массивы, JSON.
+    """
+
+    NAME = "columnar"
+    TAG = 3
+
+    HEADER: ClassVar[struct.Struct] = struct.Struct("<II")
+
+    def encode(self, metadata: dict[str, Any]) -> bytes:
+        _require(np, "numpy")
+        from .objects import ObjectsArray
+
+        objects = ObjectsArray.from_objects(metadata.get("objects") or [])
+        rest = {key: value for key, value in metadata.items() if key != "objects"}
+
+        tail = json.dumps(
+            {
+                "metadata": rest,
+                "has_objects": "objects" in metadata,
+                "labels": objects.labels,
+                "attributes": objects.attributes,
+            },
+            default=json_default,
+        ).encode("UTF-8")
+
+        return b"".join(
+            (
+                self.HEADER.pack(len(objects), len(tail)),
+                objects.bboxes.astype(np.float32, copy=False).tobytes(),  # type: ignore
+                objects.confs.astype(np.float32, copy=False).tobytes(),  # type: ignore
+                objects.class_ids.astype(np.int32, copy=False).tobytes(),  # type: ignore
+                objects.label_ids.astype(np.int32, copy=False).tobytes(),  # type: ignore
+                tail,
+            )
+        )
+
+    def decode(self, data: bytes | memoryview) -> dict[str, Any]:
+        numpy = _require(np, "numpy")
+
+        count, tail_length = self.HEADER.unpack_from(data, 0)
+        offset = self.HEADER.size
+
+        bboxes = numpy.frombuffer(data, dtype=numpy.float32, count=count * 4, offset=offset).reshape(count, 4)
+        offset += bboxes.nbytes
+        confs = numpy.frombuffer(data, dtype=numpy.float32, count=count, offset=offset)
+        offset += confs.nbytes
+        class_ids = numpy.frombuffer(data, dtype=numpy.int32, count=count, offset=offset)
+        offset += class_ids.nbytes
+        label_ids = numpy.frombuffer(data, dtype=numpy.int32, count=count, offset=offset)
+        offset += label_ids.nbytes
+
+        tail = json.loads(bytes(data[offset : offset + tail_length]))
+
+        metadata = tail["metadata"]
+        if not tail["has_objects"]:
+            return metadata
+
+        from .objects import ObjectsArray
+
+        metadata["objects"] = ObjectsArray(
+            bboxes=bboxes,
+            confs=confs,
+            class_ids=class_ids,
+            label_ids=label_ids,
+            labels=tail["labels"],
+            attributes=tail["attributes"],
+        )
+        return metadata
+
+
+register_custom_meta_codec(JsonCodec())
+register_custom_meta_codec(OrjsonCodec())
+register_custom_meta_codec(MsgpackCodec())
+register_custom_meta_codec(ColumnarCodec())
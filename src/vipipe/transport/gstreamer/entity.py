@@ -1,6 +1,7 @@
 from __future__ import annotations
 
 import json
+import struct
 from dataclasses import asdict, dataclass
 from enum import IntEnum, auto
 from functools import cached_property
@@ -8,6 +9,9 @@ from typing import Any, ClassVar, TypedDict
 
 from vipipe.transport.interface.entity import MultipartSerializableProtocol
 
+from .codecs import JsonCodec, get_custom_meta_codec, get_custom_meta_codec_by_tag, json_default
+from .payload import format_from_caps, get_payload_codec, get_payload_codec_by_tag, get_payload_format
+
 
 class GST_MESSAGE_TYPES(IntEnum):
     """Типы сообщений GStreamer."""
@@ -17,6 +21,8 @@ class GST_MESSAGE_TYPES(IntEnum):
     BUFFER_META = auto()  # Метаданные буфера
     CUSTOM_META = auto()  # Кастомные метаданные
     EOS = auto()  # Конец потока
+    BUFFER_META_PACKED = auto()  # Метаданные буфера в бинарном формате
+    CUSTOM_META_ENCODED = auto()  # Кастомные метаданные, закодированные кодеком (тег кодека + данные)
 
 
 class GstMessage(MultipartSerializableProtocol):
@@ -36,6 +42,14 @@ class GstMessage(MultipartSerializableProtocol):
     PARTS_LENGTH: ClassVar[int] = 1
     """Количество частей сообщения по умолчанию."""
 
+    stream: str | None = None
+    """Идентификатор потока (тема ZeroMQ), из которого получено сообщение. Не входит в части сообщения:
+    передается отдельной частью перед ними (см. ZeroMQWriterConfig.topic и GstWriter.topic_frame)"""
+
+    def set_stream(self, stream: str | None) -> None:
+        """Задает идентификатор потока, в том числе для неизменяемых сообщений."""
+        object.__setattr__(self, "stream", stream)
+
     def __init_subclass__(cls, type: GST_MESSAGE_TYPES | None = None) -> None:
         """
         Автоматическая регистрация подклассов.
@@ -49,6 +63,11 @@ class GstMessage(MultipartSerializableProtocol):
         if type is None:
             if cls.MESSAGE_TYPE is None:
                 raise ValueError("Тип сообщения не указан и не может быть определен автоматически")
+
+            # dataclass(slots=True) пересоздает класс, регистрируем итоговый класс вместо исходного
+            registered = cls.registry.get(cls.MESSAGE_TYPE)
+            if registered is not None and registered.__qualname__ == cls.__qualname__:
+                cls.registry[cls.MESSAGE_TYPE] = cls
             return
 
         if type in cls.registry:
@@ -154,18 +173,45 @@ class CapsMessage(GstMessage, type=GST_MESSAGE_TYPES.CAPS):
     fps_n: float | None = None
     fps_d: float | None = None
     framerate: str | None = None
+    caps_id: int | None = None
+    """Идентификатор капсов, на который ссылаются метаданные буфера в бинарном формате"""
 
     def toparts(self) -> list[bytes]:
-        return [self.encoded_message_type, json.dumps(asdict(self)).encode("UTF-8")]
+        data = asdict(self)
+        if self.caps_id is None:
+            # Старые получатели не знают про caps_id
+            del data["caps_id"]
+        return [self.encoded_message_type, json.dumps(data).encode("UTF-8")]
 
     @classmethod
     def _parse_implementation(cls, parts: list[bytes] | tuple[bytes, ...]) -> CapsMessage:
-        return cls(**json.loads(parts[1].decode("UTF-8")))
+        return cls(**json.loads(bytes(parts[1])))
+
+
+CLOCK_TIME_NONE = 2**64 - 1
+"""Отсутствующая временная метка в бинарном формате (совпадает с Gst.CLOCK_TIME_NONE)."""
+
+PACKED_BUFFER_META_VERSION = 1
+"""Версия бинарного формата метаданных буфера."""
+
+PACKED_BUFFER_META_PAYLOAD_VERSION = 2
+"""Версия бинарного формата с тегом кодека медиаданных (байт после заголовка версии 1)."""
+
+PACKED_BUFFER_META_HEADER = struct.Struct("<BQQQIIIIH")
+"""Версия, pts, dts, duration, width, height, flags, caps_id, длина caps_str."""
 
 
 @dataclass(slots=True)
 class BufferMetaMessage(GstMessage, type=GST_MESSAGE_TYPES.BUFFER_META):
-    """Метаданные буфера."""
+    """
+    Метаданные буфера.
+
+    По умолчанию сериализуются в JSON. При packed=True сериализуются в компактный бинарный заголовок
+    с типом BUFFER_META_PACKED, а капсы передаются идентификатором caps_id последнего CapsMessage
+    (caps_str можно передавать периодически, чтобы новые получатели узнали капсы).
+
+    payload_codec - кодек, которым сжаты медиаданные буфера (см. vipipe.transport.gstreamer.payload).
+    """
 
     PARTS_LENGTH: ClassVar[int] = 2
 
@@ -176,43 +222,148 @@ class BufferMetaMessage(GstMessage, type=GST_MESSAGE_TYPES.BUFFER_META):
     dts: int | None = None
     duration: int | None = None
     caps_str: str | None = None
+    caps_id: int | None = None
+    packed: bool = False
+    payload_codec: str | None = None
+    """Кодек медиаданных буфера (None - несжатые данные)"""
 
     def toparts(self) -> list[bytes]:
-        return [self.encoded_message_type, json.dumps(asdict(self)).encode("UTF-8")]
+        if self.packed:
+            return PackedBufferMetaMessage.pack(self)
+
+        data = {
+            "pts": self.pts,
+            "width": self.width,
+            "height": self.height,
+            "flags": self.flags,
+            "dts": self.dts,
+            "duration": self.duration,
+            "caps_str": self.caps_str,
+        }
+        if self.payload_codec is not None:
+            # Старые получатели не знают про payload_codec
+            data["payload_codec"] = self.payload_codec
+        return [self.encoded_message_type, json.dumps(data).encode("UTF-8")]
 
     @classmethod
     def _parse_implementation(cls, parts: list[bytes] | tuple[bytes, ...]) -> BufferMetaMessage:
-        return cls(**json.loads(parts[1].decode("UTF-8")))
+        return cls(**json.loads(bytes(parts[1])))
+
+
+class PackedBufferMetaMessage(BufferMetaMessage, type=GST_MESSAGE_TYPES.BUFFER_META_PACKED):
+    """Бинарный формат BufferMetaMessage. Разбирается в BufferMetaMessage с packed=True."""
+
+    @staticmethod
+    def pack(message: BufferMetaMessage) -> list[bytes]:
+        caps = message.caps_str.encode("UTF-8") if message.caps_str else b""
+        if message.payload_codec is not None:
+            # Версия 1 сохраняется для несжатых данных, чтобы старые получатели продолжали работать
+            version = PACKED_BUFFER_META_PAYLOAD_VERSION
+            caps = get_payload_codec(message.payload_codec).TAG.to_bytes(1, "big") + caps
+        else:
+            version = PACKED_BUFFER_META_VERSION
+
+        header = PACKED_BUFFER_META_HEADER.pack(
+            version,
+            message.pts,
+            CLOCK_TIME_NONE if message.dts is None else message.dts,
+            CLOCK_TIME_NONE if message.duration is None else message.duration,
+            message.width,
+            message.height,
+            message.flags,
+            message.caps_id or 0,
+            len(caps) - (version == PACKED_BUFFER_META_PAYLOAD_VERSION),
+        )
+        return [PackedBufferMetaMessage.MESSAGE_TYPE.value.to_bytes(1, "big"), header + caps]
+
+    @classmethod
+    def _parse_implementation(cls, parts: list[bytes] | tuple[bytes, ...]) -> BufferMetaMessage:
+        data = parts[1]
+        if data[0] not in (PACKED_BUFFER_META_VERSION, PACKED_BUFFER_META_PAYLOAD_VERSION):
+            raise ValueError(f"Неподдерживаемая версия бинарных метаданных буфера: {data[0]}")
+
+        version, pts, dts, duration, width, height, flags, caps_id, caps_length = PACKED_BUFFER_META_HEADER.unpack_from(
+            data, 0
+        )
+        caps_start = PACKED_BUFFER_META_HEADER.size
+
+        payload_codec = None
+        if version == PACKED_BUFFER_META_PAYLOAD_VERSION:
+            payload_codec = get_payload_codec_by_tag(data[caps_start]).NAME
+            caps_start += 1
+
+        return BufferMetaMessage(
+            pts=pts,
+            width=width,
+            height=height,
+            flags=flags,
+            dts=None if dts == CLOCK_TIME_NONE else dts,
+            duration=None if duration == CLOCK_TIME_NONE else duration,
+            caps_str=str(data[caps_start : caps_start + caps_length], "UTF-8") if caps_length else None,
+            caps_id=caps_id or None,
+            packed=True,
+            payload_codec=payload_codec,
+        )
 
 
 @dataclass(slots=True)
 class CustomMetaMessage(GstMessage, type=GST_MESSAGE_TYPES.CUSTOM_META):
-    """Кастомные метаданные буфера."""
+    """
+    Кастомные метаданные буфера.
+
+    Метаданные в кодеке json передаются как раньше, с типом CUSTOM_META.
+    Остальные кодеки (см. vipipe.transport.gstreamer.codecs) передаются с типом CUSTOM_META_ENCODED,
+    первый байт данных - тег кодека.
+    """
 
     metadata: dict[str, Any]
+    codec: str = JsonCodec.NAME
+    """Кодек сериализации метаданных"""
 
     PARTS_LENGTH: ClassVar[int] = 2
 
     def toparts(self) -> list[bytes]:
-        return [self.encoded_message_type, json.dumps(self.metadata).encode("UTF-8")]
+        if self.codec == JsonCodec.NAME:
+            return [self.encoded_message_type, json.dumps(self.metadata, default=json_default).encode("UTF-8")]
+
+        return [EncodedCustomMetaMessage.MESSAGE_TYPE.value.to_bytes(1, "big"), self.tobytes()]
 
     @classmethod
     def _parse_implementation(cls, parts: list[bytes] | tuple[bytes, ...]) -> CustomMetaMessage:
         return cls(
-            metadata=json.loads(parts[1].decode("UTF-8")),
+            metadata=json.loads(bytes(parts[1])),
         )
 
+    def tobytes(self) -> bytes:
+        """Кодирует метаданные выбранным кодеком, первым байтом идет тег кодека."""
+        codec = get_custom_meta_codec(self.codec)
+        return codec.TAG.to_bytes(1, "big") + codec.encode(self.metadata)
+
+    @classmethod
+    def from_bytes(cls, data: bytes | memoryview) -> CustomMetaMessage:
+        """Декодирует метаданные, закодированные tobytes."""
+        codec = get_custom_meta_codec_by_tag(data[0])
+        return cls(metadata=codec.decode(data[1:]), codec=codec.NAME)
+
     def to_json(self) -> str:
-        return json.dumps(self.metadata)
+        return json.dumps(self.metadata, default=json_default)
 
     @classmethod
     def from_json(cls, json_str: str) -> CustomMetaMessage:
         return cls(metadata=json.loads(json_str))
 
 
+class EncodedCustomMetaMessage(CustomMetaMessage, type=GST_MESSAGE_TYPES.CUSTOM_META_ENCODED):
+    """Кастомные метаданные в кодеке, отличном от json. Разбираются в CustomMetaMessage."""
+
+    @classmethod
+    def _parse_implementation(cls, parts: list[bytes] | tuple[bytes, ...]) -> CustomMetaMessage:
+        return CustomMetaMessage.from_bytes(parts[1])
+
+
 class ObjectMeta(TypedDict):
     bbox: tuple[float, float, float, float]
-    conf: float
+    conf: float | None
     class_id: int | None
     label: str | None
     attributes: dict[str, Any] | None
@@ -256,32 +407,246 @@ class ObjectsMetaMessage(CustomMetaMessage):
         )
 
 
-@dataclass(slots=True)
 class BufferMessage(GstMessage, type=GST_MESSAGE_TYPES.BUFFER):
-    """Сообщение с медиаданными и метаданными."""
+    """
+    Сообщение с медиаданными и метаданными.
+
+    Разобранное сообщение хранит исходные части и декодирует buffer_meta, custom_meta и медиаданные
+    только при первом обращении. Части, к которым не обращались, toparts отправляет как есть,
+    поэтому этапы, которые только пересылают или считают кадры, почти ничего не тратят на кадр.
+
+    Если в метаданных буфера указан payload_codec, медиаданные передаются сжатыми.
+    Отправитель сжимает их при сериализации, получатель распаковывает только при обращении к buffer.
+    """
 
     PARTS_LENGTH: ClassVar[int] = 2 + BufferMetaMessage.PARTS_LENGTH + CustomMetaMessage.PARTS_LENGTH
 
-    buffer: bytes
-    buffer_meta: BufferMetaMessage | None = None
-    custom_meta: CustomMetaMessage | None = None
+    payload_format: str | None
+    """Формат несжатого кадра для кодека медиаданных (по умолчанию из caps_str метаданных буфера)"""
+
+    caps: CapsMessage | None
+    """Последние капсы потока кадра (задает GstReader). Не передаются: в бинарном формате метаданных
+    caps_str есть только в части кадров, остальные ссылаются на капсы по caps_id"""
+
+    def __init__(
+        self,
+        buffer: bytes | memoryview | None = None,
+        buffer_meta: BufferMetaMessage | None = None,
+        custom_meta: CustomMetaMessage | None = None,
+        *,
+        encoded: bytes | memoryview | None = None,
+        payload_format: str | None = None,
+    ):
+        """
+        Args:
+            buffer: Несжатые медиаданные
+            buffer_meta: Метаданные буфера
+            custom_meta: Кастомные метаданные
+            encoded: Медиаданные, сжатые кодеком buffer_meta.payload_codec (вместо buffer)
+            payload_format: Формат несжатого кадра для кодека медиаданных
+        """
+        if (buffer is None) == (encoded is None):
+            raise ValueError("Нужно указать либо buffer, либо encoded")
+
+        self._buffer = buffer
+        # Медиаданные в том виде, в котором они передаются (None - нужно сериализовать заново),
+        # и кодек, которым они сжаты
+        self._payload = encoded
+        self._payload_codec = buffer_meta.payload_codec if encoded is not None and buffer_meta else None
+
+        self._buffer_meta = buffer_meta
+        self._buffer_meta_parts: list[bytes] | tuple[bytes, ...] | None = None
+        self._custom_meta = custom_meta
+        self._custom_meta_parts: list[bytes] | tuple[bytes, ...] | None = None
+        self.payload_format = payload_format
+        self.caps = None
+
+    @property
+    def buffer_meta(self) -> BufferMetaMessage | None:
+        """Метаданные буфера. Декодируются при первом обращении"""
+        if self._buffer_meta_parts is not None:
+            # Метаданные могут прийти как в JSON, так и в бинарном формате
+            self._buffer_meta = GstMessage.parse(self._buffer_meta_parts)  # type: ignore
+            self._buffer_meta_parts = None
+            self._payload_codec = self._buffer_meta.payload_codec  # type: ignore
+        return self._buffer_meta
+
+    @buffer_meta.setter
+    def buffer_meta(self, value: BufferMetaMessage | None) -> None:
+        if self._buffer_meta_parts is not None and self._payload is not None:
+            # Кодек принятых медиаданных указан в заменяемых метаданных
+            self.buffer_meta  # noqa: B018
+        self._buffer_meta = value
+        self._buffer_meta_parts = None
+
+    @property
+    def custom_meta(self) -> CustomMetaMessage | None:
+        """Кастомные метаданные. Декодируются при первом обращении"""
+        if self._custom_meta_parts is not None:
+            self._custom_meta = GstMessage.parse(self._custom_meta_parts)  # type: ignore
+            self._custom_meta_parts = None
+        return self._custom_meta
+
+    @custom_meta.setter
+    def custom_meta(self, value: CustomMetaMessage | None) -> None:
+        self._custom_meta = value
+        self._custom_meta_parts = None
+
+    def take_custom_meta(self, other: BufferMessage) -> None:
+        """Переносит кастомные метаданные из другого сообщения, не декодируя их (см. MetaJoinReader)."""
+        self._custom_meta, self._custom_meta_parts = other._custom_meta, other._custom_meta_parts
+
+    @property
+    def buffer(self) -> bytes | memoryview:
+        """Медиаданные. При чтении без копирования - memoryview на память принятого сообщения"""
+        if self._buffer is None:
+            self._buffer = self._decode_payload()
+        return self._buffer
+
+    @buffer.setter
+    def buffer(self, value: bytes | memoryview) -> None:
+        self._buffer = value
+        self._payload = None
+
+    @property
+    def is_decoded(self) -> bool:
+        """Медиаданные уже распакованы (или не были сжаты)."""
+        return self._buffer is not None
+
+    @property
+    def frame_format(self) -> str | None:
+        """Формат кадра: payload_format, формат из caps_str метаданных буфера или из капсов caps_id."""
+        if self.payload_format is not None:
+            return self.payload_format
+
+        buffer_meta = self.buffer_meta
+        if buffer_meta is None:
+            return None
+        if buffer_meta.caps_str:
+            return format_from_caps(buffer_meta.caps_str)
+
+        caps = self.caps
+        if caps is None or (buffer_meta.caps_id is not None and caps.caps_id != buffer_meta.caps_id):
+            return None
+        return caps.format or format_from_caps(caps.caps_str)
+
+    def _frame_args(self, format: str | None, writable: bool) -> tuple[Any, int, int, str]:
+        buffer_meta = self.buffer_meta
+        if buffer_meta is None:
+            raise ValueError("Для представления кадра нужны метаданные буфера")
+
+        format = format or self.frame_format
+        if format is None:
+            raise ValueError("Неизвестен формат кадра: укажите format, payload_format, caps_str или caps")
+
+        buffer = self.buffer
+        if writable:
+            if isinstance(buffer, bytes) or memoryview(buffer).readonly:
+                # Единственная копия: дальше кадр меняется на месте
+                buffer = bytearray(buffer)
+            # Медиаданные будут изменены, отправлять полученную копию нельзя
+            self.buffer = buffer
+        return buffer, buffer_meta.width, buffer_meta.height, format
+
+    def as_array(self, format: str | None = None, writable: bool = False) -> Any:
+        """
+        Представляет кадр массивом numpy H x W x C (H x W для GRAY8) без копирования.
+
+        Размеры берутся из метаданных буфера, формат - из капсов, шаг строки - по размеру буфера.
+
+        Args:
+            format: Формат кадра (по умолчанию frame_format)
+            writable: Массив для изменения кадра на месте. Если медиаданные доступны только для чтения,
+                они один раз копируются. Изменения отправляются без повторной сериализации кадра
+        Returns:
+            numpy.ndarray
+        """
+        from .frame import frame_array
+
+        return frame_array(*self._frame_args(format, writable))
+
+    def as_planes(self, format: str | None = None, writable: bool = False) -> list[Any]:
+        """
+        Представляет кадр плоскостями numpy без копирования (NV12, I420 и т.д., см. frame.frame_planes).
+
+        Args:
+            format: Формат кадра (по умолчанию frame_format)
+            writable: Плоскости для изменения кадра на месте (см. as_array)
+        """
+        from .frame import frame_planes
+
+        return frame_planes(*self._frame_args(format, writable))
+
+    def as_image(self, format: str | None = None) -> Any:
+        """
+        Создает изображение PIL из кадра (RGB, BGR, RGBA, BGRA, GRAY8). Данные копируются,
+        изменения записываются обратно через write_image.
+        """
+        from .frame import array_to_image
+
+        format = format or self.frame_format
+        return array_to_image(self.as_array(format), format)  # type: ignore
+
+    def write_image(self, image: Any, format: str | None = None) -> None:
+        """Записывает изображение PIL в кадр на месте, без пересоздания медиаданных."""
+        from .frame import image_to_array
+
+        format = format or self.frame_format
+        image_to_array(image, self.as_array(format, writable=True), format)  # type: ignore
+
+    def _decode_payload(self) -> bytes | memoryview:
+        buffer_meta = self.buffer_meta
+        assert self._payload is not None
+
+        if self._payload_codec is None:
+            return self._payload
+        if buffer_meta is None:
+            raise ValueError("Медиаданные сжаты, но метаданные буфера отсутствуют")
+
+        if self.payload_format is None:
+            self.payload_format = get_payload_format(self._payload)
+        return get_payload_codec(self._payload_codec).decode(self._payload, buffer_meta.width, buffer_meta.height)
+
+    def _encode_payload(self) -> bytes | memoryview:
+        if self._payload is not None and self._buffer_meta_parts is not None:
+            # Ни медиаданные, ни метаданные буфера не трогали - пересылаем как есть
+            return self._payload
+
+        buffer_meta = self.buffer_meta
+        codec_name = buffer_meta.payload_codec if buffer_meta else None
+        if self._payload is not None and codec_name == self._payload_codec:
+            return self._payload
+        if codec_name is None or buffer_meta is None:
+            return self.buffer
+
+        format = self.payload_format or format_from_caps(buffer_meta.caps_str)
+        if format is None:
+            raise ValueError("Неизвестен формат кадра для кодека медиаданных: укажите payload_format или caps_str")
+
+        self._payload = get_payload_codec(codec_name).encode(self.buffer, buffer_meta.width, buffer_meta.height, format)
+        self._payload_codec = codec_name
+        return self._payload
 
     def toparts(self) -> list[bytes]:
         """Преобразует сообщение в список байтовых частей."""
 
         parts = [self.encoded_message_type]
 
-        if self.buffer_meta:
-            parts.extend(self.buffer_meta.toparts())
+        if self._buffer_meta_parts is not None:
+            parts.extend(self._buffer_meta_parts)
+        elif self._buffer_meta:
+            parts.extend(self._buffer_meta.toparts())
         else:
             parts.extend([b""] * BufferMetaMessage.PARTS_LENGTH)
 
-        if self.custom_meta:
-            parts.extend(self.custom_meta.toparts())
+        if self._custom_meta_parts is not None:
+            parts.extend(self._custom_meta_parts)
+        elif self._custom_meta:
+            parts.extend(self._custom_meta.toparts())
         else:
             parts.extend([b""] * CustomMetaMessage.PARTS_LENGTH)
 
-        parts.extend([self.buffer])
+        parts.append(self._encode_payload())  # type: ignore
         return parts
 
     @classmethod
@@ -289,16 +654,24 @@ class BufferMessage(GstMessage, type=GST_MESSAGE_TYPES.BUFFER):
         buffer_meta_parts = parts[1 : 1 + BufferMetaMessage.PARTS_LENGTH]
         custom_meta_parts = parts[1 + BufferMetaMessage.PARTS_LENGTH : cls.PARTS_LENGTH - 1]
 
-        buffer_meta = None
-        if buffer_meta_parts[0] != b"":
-            buffer_meta = BufferMetaMessage.parse(buffer_meta_parts)
-
-        custom_meta = None
-        if custom_meta_parts[0] != b"":
-            custom_meta = CustomMetaMessage.parse(custom_meta_parts)
+        message = cls(encoded=parts[-1])
+        # Части метаданных декодируются при первом обращении, пустые части - отсутствующие метаданные
+        message._buffer_meta_parts = buffer_meta_parts if len(buffer_meta_parts[0]) > 0 else None
+        message._custom_meta_parts = custom_meta_parts if len(custom_meta_parts[0]) > 0 else None
+        return message
+
+    def __eq__(self, other: object) -> bool:
+        if not isinstance(other, BufferMessage):
+            return NotImplemented
+        return (
+            self.buffer_meta == other.buffer_meta
+            and self.custom_meta == other.custom_meta
+            and bytes(self.buffer) == bytes(other.buffer)
+        )
 
-        return cls(
-            buffer=parts[-1],
-            buffer_meta=buffer_meta,  # type: ignore
-            custom_meta=custom_meta,  # type: ignore
+    def __repr__(self) -> str:
+        size = len(self._buffer) if self._buffer is not None else len(self._payload)  # type: ignore
+        return (
+            f"{type(self).__name__}(buffer=<{size} bytes{'' if self.is_decoded else ', encoded'}>, "
+            f"buffer_meta={self.buffer_meta!r}, custom_meta={self.custom_meta!r})"
         )
@@ -0,0 +1,166 @@
+from __future__ import annotations
+
+from typing import Any
+
+import numpy as np
+
+try:
+    from PIL import Image
+except ImportError:  # pragma: no cover
+    Image = None
+
+
+PACKED_FORMATS: dict[str, int] = {
+    "RGB": 3,
+    "BGR": 3,
+    "RGBA": 4,
+    "BGRA": 4,
+    "RGBx": 4,
+    "BGRx": 4,
+    "GRAY8": 1,
+}
+"""Форматы с одной плоскостью и количество байт на пиксель."""
+
+PLANAR_FORMATS = ("NV12", "NV21", "I420", "YV12")
+"""Форматы YUV 4:2:0 с несколькими плоскостями."""
+
+IMAGE_MODES: dict[str, tuple[str, str]] = {
+    # Формат GStreamer: (режим PIL, порядок каналов кадра относительно режима PIL)
+    "RGB": ("RGB", "RGB"),
+    "BGR": ("RGB", "BGR"),
+    "RGBA": ("RGBA", "RGBA"),
+    "BGRA": ("RGBA", "BGRA"),
+    "GRAY8": ("L", "L"),
+}
+"""Форматы, которые можно представить изображением PIL."""
+
+
+def _round_up(value: int, multiple: int) -> int:
+    return (value + multiple - 1) // multiple * multiple
+
+
+def _packed_stride(size: int, width: int, height: int, pixel_size: int) -> int:
+    """
+    Определяет шаг строки кадра с одной плоскостью.
+
+    GStreamer выравнивает строки по 4 байта, а кадры, собранные обработчиками (tobytes), идут без выравнивания,
+    поэтому шаг определяется по размеру буфера.
+    """
+    row = width * pixel_size
+    stride = size // height if height else row
+    if stride < row:
+        raise ValueError(f"Размер буфера {size} меньше кадра {width}x{height} по {pixel_size} байт на пиксель")
+    return stride
+
+
+def _planar_layout(size: int, width: int, height: int, format: str) -> list[tuple[int, int, int, int, int]]:
+    """
+    Раскладка плоскостей YUV 4:2:0 как у GStreamer по умолчанию.
+
+    Returns:
+        Плоскости: (смещение, шаг строки, высота, ширина, количество каналов)
+    """
+    chroma_width = _round_up(width, 2) // 2
+    chroma_height = _round_up(height, 2) // 2
+
+    for align in (4, 1):
+        luma_stride = _round_up(width, align)
+        luma_size = luma_stride * _round_up(height, 2)
+
+        if format in ("NV12", "NV21"):
+            # Строка UV содержит пары U, V на каждые два пикселя
+            chroma_stride = _round_up(width, max(align, 2))
+            planes = [(0, luma_stride, height, width, 1), (luma_size, chroma_stride, chroma_height, chroma_width, 2)]
+            total = luma_size + chroma_stride * chroma_height
+        else:
+            chroma_stride = _round_up(chroma_width, align)
+            chroma_size = chroma_stride * chroma_height
+            planes = [
+                (0, luma_stride, height, width, 1),
+                (luma_size, chroma_stride, chroma_height, chroma_width, 1),
+                (luma_size + chroma_size, chroma_stride, chroma_height, chroma_width, 1),
+            ]
+            total = luma_size + 2 * chroma_size
+
+        # Если размер не совпал с раскладкой GStreamer, пробуем раскладку без выравнивания
+        if size == total or (align == 1 and size >= total):
+            return planes
+
+    raise ValueError(f"Размер буфера {size} не соответствует кадру {format} {width}x{height}")
+
+
+def _plane(data: np.ndarray, offset: int, stride: int, height: int, width: int, channels: int) -> np.ndarray:
+    rows = data[offset : offset + stride * height].reshape(height, stride)[:, : width * channels]
+    return rows.reshape(height, width, channels) if channels > 1 else rows
+
+
+def frame_planes(buffer: Any, width: int, height: int, format: str) -> list[np.ndarray]:
+    """
+    Представляет медиаданные кадра плоскостями numpy без копирования.
+
+    Args:
+        buffer: Медиаданные (bytes, bytearray, memoryview)
+        width: Ширина кадра
+        height: Высота кадра
+        format: Формат кадра GStreamer
+    Returns:
+        Плоскости кадра: одна H x W x C (H x W для GRAY8) для форматов из PACKED_FORMATS,
+        Y, UV (H/2 x W/2 x 2) для NV12/NV21 и Y, U, V для I420/YV12 (для YV12 - Y, V, U).
+        Массивы доступны для записи, если доступен для записи buffer
+    Raises:
+        ValueError: Если формат не поддерживается или размер буфера не соответствует кадру
+    """
+    data = np.frombuffer(buffer, dtype=np.uint8)
+
+    if format in PACKED_FORMATS:
+        pixel_size = PACKED_FORMATS[format]
+        stride = _packed_stride(data.size, width, height, pixel_size)
+        return [_plane(data, 0, stride, height, width, pixel_size)]
+
+    if format in PLANAR_FORMATS:
+        return [_plane(data, *layout) for layout in _planar_layout(data.size, width, height, format)]
+
+    raise ValueError(f"Неподдерживаемый формат кадра: {format}")
+
+
+def frame_array(buffer: Any, width: int, height: int, format: str) -> np.ndarray:
+    """
+    Представляет кадр с одной плоскостью массивом numpy H x W x C (H x W для GRAY8) без копирования.
+
+    Raises:
+        ValueError: Для форматов с несколькими плоскостями (см. frame_planes)
+    """
+    if format not in PACKED_FORMATS:
+        raise ValueError(f"Формат {format} не представляется одним массивом, используйте frame_planes")
+    return frame_planes(buffer, width, height, format)[0]
+
+
+def _require_pil() -> Any:
+    if Image is None:
+        raise ImportError("Для представления кадра изображением требуется пакет pillow")
+    return Image
+
+
+def array_to_image(array: np.ndarray, format: str) -> Any:
+    """Создает изображение PIL из кадра (копия данных)."""
+    pil = _require_pil()
+    if format not in IMAGE_MODES:
+        raise ValueError(f"Формат {format} не представляется изображением PIL")
+
+    mode, order = IMAGE_MODES[format]
+    if order != mode:
+        # BGR(A) -> RGB(A)
+        array = array[..., [2, 1, 0, *range(3, array.shape[-1])]]
+    return pil.fromarray(np.ascontiguousarray(array))
+
+
+def image_to_array(image: Any, array: np.ndarray, format: str) -> None:
+    """Записывает изображение PIL в кадр array на месте."""
+    if format not in IMAGE_MODES:
+        raise ValueError(f"Формат {format} не представляется изображением PIL")
+
+    mode, order = IMAGE_MODES[format]
+    pixels = np.asarray(image if image.mode == mode else image.convert(mode))
+    if order != mode:
+        pixels = pixels[..., [2, 1, 0, *range(3, pixels.shape[-1])]]
+    array[...] = pixels
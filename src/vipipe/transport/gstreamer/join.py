@@ -0,0 +1,114 @@
+import time
+from collections import OrderedDict
+from dataclasses import dataclass, field
+
+from vipipe.logging import ThrottledLogger, get_logger
+from vipipe.metrics import REGISTRY
+from vipipe.transport.interface import ReaderABC
+
+from .entity import BufferMessage, GstMessage
+from .reader import GstReader
+
+logger = get_logger("vipipe.transport.gstreamer.join")
+frame_logger = ThrottledLogger(logger)
+"""Логгер для сообщений, которые пишутся на каждом кадре"""
+
+UNJOINED_FRAMES = REGISTRY.counter(
+    "vipipe_unjoined_frames", "Кадры, для которых метаданные бокового канала не пришли вовремя"
+)
+
+
+@dataclass
+class MetaJoinReader(ReaderABC[GstMessage]):
+    """
+    Соединяет кадры основного канала с метаданными бокового канала (см. GstWriter.meta_writer) по pts.
+
+    Метаданные обычно приходят раньше кадров, поэтому хранятся до прихода кадра с тем же pts
+    (и тем же GstMessage.stream, если каналы передают несколько потоков).
+    Если метаданные кадра не пришли за join_timeout, кадр отдается без них.
+    Капсы и конец потока берутся из основного канала.
+    Транспорт бокового канала должен поддерживать poll (например, ZeroMQReader).
+    """
+
+    frames: GstReader
+    """Основной канал: кадры"""
+
+    meta: GstReader
+    """Боковой канал: BufferMessage без медиаданных"""
+
+    join_timeout: int = 20
+    """Максимальное время ожидания метаданных кадра (в мс)"""
+
+    max_pending: int = 256
+    """Максимальное количество метаданных, ожидающих свой кадр"""
+
+    pending: OrderedDict[tuple[str | None, int], BufferMessage] = field(init=False, default_factory=OrderedDict)
+    joined: int = field(init=False, default=0)
+    unjoined: int = field(init=False, default=0)
+
+    def start(self) -> None:
+        if not callable(getattr(self.meta.reader, "poll", None)):
+            # Без poll нельзя проверить, есть ли метаданные, не блокируясь на таймаут транспорта
+            raise ValueError(f"Транспорт бокового канала не поддерживает poll: {type(self.meta.reader).__name__}")
+        self.frames.start()
+        self.meta.start()
+
+    def stop(self) -> None:
+        self.frames.stop()
+        self.meta.stop()
+
+    def _read_meta(self, timeout: int) -> None:
+        """Забирает из бокового канала все пришедшие метаданные, ожидая первое не дольше timeout мс."""
+        while self.meta.reader.poll(timeout):  # type: ignore[attr-defined]
+            message = self.meta.read()
+            if message is None:
+                return
+            timeout = 0
+
+            if not isinstance(message, BufferMessage) or message.buffer_meta is None:
+                continue
+
+            self.pending[(message.stream, message.buffer_meta.pts)] = message
+            while len(self.pending) > self.max_pending:
+                self.pending.popitem(last=False)
+
+    def _take_meta(self, stream: str | None, pts: int) -> BufferMessage | None:
+        meta = self.pending.pop((stream, pts), None)
+        if meta is not None:
+            # Метаданные более ранних кадров этого потока уже не понадобятся
+            for key in [key for key in self.pending if key[0] == stream and key[1] < pts]:
+                del self.pending[key]
+        return meta
+
+    def join(self, frame: BufferMessage) -> BufferMessage:
+        """Добавляет в кадр кастомные метаданные из бокового канала."""
+        if frame.buffer_meta is None:
+            return frame
+
+        pts = frame.buffer_meta.pts
+        self._read_meta(0)
+        meta = self._take_meta(frame.stream, pts)
+
+        deadline = time.monotonic() + self.join_timeout / 1000
+        while meta is None:
+            remaining = int((deadline - time.monotonic()) * 1000)
+            if remaining <= 0:
+                break
+            self._read_meta(remaining)
+            meta = self._take_meta(frame.stream, pts)
+
+        if meta is None:
+            self.unjoined += 1
+            UNJOINED_FRAMES.labels().inc()  # type: ignore
+            frame_logger.debug("Метаданные кадра pts %d не пришли за %d мс", pts, self.join_timeout)
+            return frame
+
+        self.joined += 1
+        frame.take_custom_meta(meta)
+        return frame
+
+    def read(self) -> GstMessage | None:
+        message = self.frames.read()
+        if isinstance(message, BufferMessage):
+            return self.join(message)
+        return message
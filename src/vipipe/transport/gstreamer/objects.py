@@ -0,0 +1,221 @@
+from __future__ import annotations
+
+from dataclasses import dataclass, field
+from typing import Any, Iterator, Mapping, Sequence, overload
+
+import numpy as np
+
+from .entity import ObjectMeta, ObjectsMetaMessage
+
+
+def _empty(dtype: Any, *shape: int) -> np.ndarray:
+    return np.empty((0, *shape), dtype=dtype)
+
+
+def _conf(obj: ObjectMeta) -> float:
+    """Уверенность объекта для массива confs: отсутствующая уверенность хранится как NaN."""
+    conf = obj.get("conf")
+    return np.nan if conf is None else conf
+
+
+@dataclass(slots=True)
+class ObjectsArray(Sequence[ObjectMeta]):
+    """
+    Объекты кадра в виде непрерывных массивов numpy.
+
+    Для совместимости ведет себя как список ObjectMeta: словари объектов создаются
+    только при обращении по индексу или итерации.
+    """
+
+    bboxes: np.ndarray = field(default_factory=lambda: _empty(np.float32, 4))
+    """Координаты объектов [x1, y1, x2, y2], N x 4, float32"""
+
+    confs: np.ndarray = field(default_factory=lambda: _empty(np.float32))
+    """Уверенность, N, float32 (NaN - нет уверенности)"""
+
+    class_ids: np.ndarray = field(default_factory=lambda: _empty(np.int32))
+    """Идентификаторы классов, N, int32 (-1 - нет класса)"""
+
+    label_ids: np.ndarray = field(default_factory=lambda: _empty(np.int32))
+    """Индексы меток в таблице labels, N, int32 (-1 - нет метки)"""
+
+    labels: list[str] = field(default_factory=list)
+    """Таблица меток"""
+
+    attributes: list[dict[str, Any] | None] | None = None
+    """Атрибуты объектов (None - атрибутов нет ни у одного объекта)"""
+
+    def __len__(self) -> int:
+        return len(self.confs)
+
+    @overload
+    def __getitem__(self, index: int) -> ObjectMeta: ...
+
+    @overload
+    def __getitem__(self, index: slice) -> list[ObjectMeta]: ...
+
+    def __getitem__(self, index: int | slice) -> ObjectMeta | list[ObjectMeta]:
+        if isinstance(index, slice):
+            return [self[i] for i in range(*index.indices(len(self)))]
+
+        conf = float(self.confs[index])
+        class_id = int(self.class_ids[index])
+        label_id = int(self.label_ids[index])
+        return {
+            "bbox": tuple(self.bboxes[index].tolist()),  # type: ignore
+            "conf": None if np.isnan(conf) else conf,
+            "class_id": None if class_id < 0 else class_id,
+            "label": None if label_id < 0 else self.labels[label_id],
+            "attributes": None if self.attributes is None else self.attributes[index],
+        }
+
+    def __iter__(self) -> Iterator[ObjectMeta]:
+        for i in range(len(self)):
+            yield self[i]
+
+    def tolist(self) -> list[ObjectMeta]:
+        """Возвращает объекты в виде списка словарей (для JSON и старого кода)."""
+        return list(self)
+
+    def label_list(self) -> list[str | None]:
+        """Возвращает метки объектов."""
+        return [None if label_id < 0 else self.labels[label_id] for label_id in self.label_ids.tolist()]
+
+    def _label_id(self, label: str | None) -> int:
+        if label is None:
+            return -1
+        try:
+            return self.labels.index(label)
+        except ValueError:
+            self.labels.append(label)
+            return len(self.labels) - 1
+
+    def extend(
+        self,
+        bboxes: Any,
+        confs: Any,
+        class_ids: Any | None = None,
+        names: Mapping[int, str] | Sequence[str] | None = None,
+        attributes: Sequence[dict[str, Any] | None] | None = None,
+    ) -> None:
+        """
+        Добавляет объекты целыми массивами, например выходами модели.
+
+        Args:
+            bboxes: Координаты [x1, y1, x2, y2], N x 4
+            confs: Уверенность, N (NaN или None - нет уверенности)
+            class_ids: Идентификаторы классов, N
+            names: Метки классов по идентификатору класса
+            attributes: Атрибуты объектов, N
+        """
+        bboxes = np.asarray(bboxes, dtype=np.float32).reshape(-1, 4)
+        count = len(bboxes)
+        confs = np.asarray(confs, dtype=np.float32).reshape(count)
+        class_ids = (
+            np.full(count, -1, dtype=np.int32)
+            if class_ids is None
+            else np.asarray(class_ids, dtype=np.int32).reshape(count)
+        )
+
+        label_ids = np.full(count, -1, dtype=np.int32)
+        if names is not None:
+            # Таблица меток строится по уникальным классам, а не по объектам
+            for class_id in np.unique(class_ids).tolist():
+                if class_id < 0 or (isinstance(names, Mapping) and class_id not in names):
+                    continue
+                if not isinstance(names, Mapping) and class_id >= len(names):
+                    continue
+                label_ids[class_ids == class_id] = self._label_id(names[class_id])
+
+        if attributes is not None or self.attributes is not None:
+            self.attributes = [
+                *(self.attributes or [None] * len(self)),
+                *(attributes or [None] * count),
+            ]
+
+        self.bboxes = np.concatenate((self.bboxes, bboxes))
+        self.confs = np.concatenate((self.confs, confs))
+        self.class_ids = np.concatenate((self.class_ids, class_ids))
+        self.label_ids = np.concatenate((self.label_ids, label_ids))
+
+    def append(self, obj: ObjectMeta) -> None:
+        """Добавляет один объект. Для большого количества объектов используйте extend."""
+        self.extend(
+            [obj["bbox"]],
+            [_conf(obj)],
+            [-1 if obj.get("class_id") is None else obj["class_id"]],
+            attributes=[obj.get("attributes")] if obj.get("attributes") is not None else None,
+        )
+        self.label_ids[-1] = self._label_id(obj.get("label"))
+
+    @classmethod
+    def from_objects(cls, objects: Sequence[ObjectMeta]) -> ObjectsArray:
+        """Создает массивы из списка словарей объектов."""
+        if isinstance(objects, ObjectsArray):
+            return objects
+
+        array = cls()
+        if not objects:
+            return array
+
+        array.extend(
+            [obj["bbox"] for obj in objects],
+            [_conf(obj) for obj in objects],
+            [-1 if obj.get("class_id") is None else obj["class_id"] for obj in objects],
+        )
+        array.label_ids[:] = [array._label_id(obj.get("label")) for obj in objects]
+
+        attributes = [obj.get("attributes") for obj in objects]
+        if any(attr is not None for attr in attributes):
+            array.attributes = attributes
+        return array
+
+
+@dataclass(slots=True)
+class ObjectsArrayMetaMessage(ObjectsMetaMessage):
+    """
+    Метаданные с объектами, хранящимися в массивах numpy (см. ObjectsArray).
+
+    Объекты лучше передавать в кодеке columnar: тогда массивы сериализуются без поэлементного обхода.
+    """
+
+    @property
+    def objects(self) -> ObjectsArray:  # type: ignore[override]
+        """Возвращает объекты в виде массивов."""
+        objects = self.metadata.get("objects")
+        if not isinstance(objects, ObjectsArray):
+            objects = ObjectsArray.from_objects(objects or [])
+            self.metadata["objects"] = objects
+        return objects
+
+    @objects.setter
+    def objects(self, value: Sequence[ObjectMeta]) -> None:
+        self.metadata["objects"] = ObjectsArray.from_objects(value)
+
+    def add_object(
+        self,
+        bbox: tuple[float, float, float, float],
+        conf: float,
+        class_id: int | None = None,
+        label: str | None = None,
+        attributes: dict[str, Any] | None = None,
+    ) -> None:
+        self.objects.append(
+            {"bbox": bbox, "conf": conf, "class_id": class_id, "label": label, "attributes": attributes}
+        )
+
+    def add_objects(
+        self,
+        bboxes: Any,
+        confs: Any,
+        class_ids: Any | None = None,
+        names: Mapping[int, str] | Sequence[str] | None = None,
+        attributes: Sequence[dict[str, Any] | None] | None = None,
+    ) -> None:
+        """Добавляет объекты целыми массивами (см. ObjectsArray.extend)."""
+        self.objects.extend(bboxes, confs, class_ids, names, attributes)
+
+    @classmethod
+    def from_custom_meta(cls, message: ObjectsMetaMessage | Any) -> ObjectsArrayMetaMessage:
+        """Создает сообщение из кастомных метаданных, не копируя словарь метаданных."""
+        return cls(metadata=message.metadata, codec=message.codec)
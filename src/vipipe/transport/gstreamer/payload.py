@@ -0,0 +1,178 @@
+from __future__ import annotations
+
+import io
+from abc import ABC
+from typing import Any, ClassVar
+
+try:
+    from PIL import Image
+except ImportError:  # pragma: no cover
+    Image = None
+
+
+PAYLOAD_FORMATS: dict[str, tuple[int, str, str]] = {
+    # Формат GStreamer: (тег, режим PIL, raw-режим PIL)
+    "RGB": (1, "RGB", "RGB"),
+    "BGR": (2, "RGB", "BGR"),
+    "RGBA": (3, "RGBA", "RGBA"),
+    "BGRA": (4, "RGBA", "BGRA"),
+    "GRAY8": (5, "L", "L"),
+}
+"""Форматы несжатых кадров, которые умеют сжимать кодеки медиаданных."""
+
+_PAYLOAD_FORMATS_BY_TAG = {tag: name for name, (tag, _, _) in PAYLOAD_FORMATS.items()}
+
+
+class PayloadCodecABC(ABC):
+    """
+    Кодек сжатия медиаданных кадра для передачи по сети.
+
+    Закодированные данные начинаются с байта формата несжатого кадра (см. PAYLOAD_FORMATS),
+    поэтому получателю достаточно знать кодек (BufferMetaMessage.payload_codec) и размер кадра.
+    """
+
+    NAME: ClassVar[str]
+    """Имя кодека, указывается в BufferMetaMessage.payload_codec"""
+
+    TAG: ClassVar[int]
+    """Тег кодека в бинарном формате метаданных буфера (1-255, 0 - несжатые данные)"""
+
+    def encode(self, data: bytes | memoryview, width: int, height: int, format: str) -> bytes:
+        raise NotImplementedError
+
+    def decode(self, data: bytes | memoryview, width: int, height: int) -> bytes:
+        raise NotImplementedError
+
+
+PAYLOAD_CODECS: dict[str, PayloadCodecABC] = {}
+"""Зарегистрированные кодеки медиаданных по имени."""
+
+_PAYLOAD_CODECS_BY_TAG: dict[int, PayloadCodecABC] = {}
+
+
+def register_payload_codec(codec: PayloadCodecABC) -> PayloadCodecABC:
+    """
+    Регистрирует кодек медиаданных.
+
+    Args:
+        codec: Экземпляр кодека
+    Returns:
+        Зарегистрированный кодек
+    Raises:
+        ValueError: Если имя или тег кодека уже заняты
+    """
+    if codec.NAME in PAYLOAD_CODECS:
+        raise ValueError(f"Кодек медиаданных {codec.NAME} уже зарегистрирован")
+    if not 0 < codec.TAG < 256 or codec.TAG in _PAYLOAD_CODECS_BY_TAG:
+        raise ValueError(f"Тег кодека медиаданных {codec.TAG} недопустим или уже занят")
+
+    PAYLOAD_CODECS[codec.NAME] = codec
+    _PAYLOAD_CODECS_BY_TAG[codec.TAG] = codec
+    return codec
+
+
+def get_payload_codec(name: str) -> PayloadCodecABC:
+    """Получает кодек медиаданных по имени."""
+    try:
+        return PAYLOAD_CODECS[name]
+    except KeyError:
+        raise ValueError(f"Неизвестный кодек медиаданных: {name}") from None
+
+
+def get_payload_codec_by_tag(tag: int) -> PayloadCodecABC:
+    """Получает кодек медиаданных по тегу из бинарного формата."""
+    try:
+        return _PAYLOAD_CODECS_BY_TAG[tag]
+    except KeyError:
+        raise ValueError(f"Неизвестный тег кодека медиаданных: {tag}") from None
+
+
+def format_from_caps(caps_str: str | None) -> str | None:
+    """Извлекает формат кадра (format=...) из строки капсов."""
+    if not caps_str:
+        return None
+    for field in caps_str.split(","):
+        name, _, value = field.strip().partition("=")
+        if name.strip() == "format":
+            return value.split(")")[-1].strip()
+    return None
+
+
+def get_payload_format(data: bytes | memoryview) -> str:
+    """Получает формат несжатого кадра по первому байту сжатых медиаданных."""
+    try:
+        return _PAYLOAD_FORMATS_BY_TAG[data[0]]
+    except KeyError:
+        raise ValueError(f"Неизвестный тег формата кадра: {data[0]}") from None
+
+
+def _require_pil() -> Any:
+    if Image is None:
+        raise ImportError("Для кодека медиаданных требуется пакет pillow")
+    return Image
+
+
+class PillowCodec(PayloadCodecABC):
+    """Сжатие кадров средствами Pillow (libjpeg-turbo для JPEG в сборках Pillow)."""
+
+    PIL_FORMAT: ClassVar[str]
+    SUPPORTED_FORMATS: ClassVar[tuple[str, ...]] = tuple(PAYLOAD_FORMATS)
+
+    def save_options(self) -> dict[str, Any]:
+        return {}
+
+    def encode(self, data: bytes | memoryview, width: int, height: int, format: str) -> bytes:
+        pil = _require_pil()
+        if format not in self.SUPPORTED_FORMATS:
+            raise ValueError(f"Кодек {self.NAME} не поддерживает формат кадра {format}")
+
+        tag, mode, raw_mode = PAYLOAD_FORMATS[format]
+        image = pil.frombuffer(mode, (width, height), data, "raw", raw_mode, 0, 1)
+
+        output = io.BytesIO()
+        output.write(tag.to_bytes(1, "big"))
+        image.save(output, format=self.PIL_FORMAT, **self.save_options())
+        return output.getvalue()
+
+    def decode(self, data: bytes | memoryview, width: int, height: int) -> bytes:
+        pil = _require_pil()
+
+        _, mode, raw_mode = PAYLOAD_FORMATS[get_payload_format(data)]
+
+        image = pil.open(io.BytesIO(data[1:]))
+        if image.mode != mode:
+            image = image.convert(mode)
+        if image.size != (width, height):
+            raise ValueError(f"Размер кадра {image.size} не совпадает с метаданными {(width, height)}")
+        return image.tobytes("raw", raw_mode)
+
+
+class JpegCodec(PillowCodec):
+    """JPEG, сжатие с потерями. Кадры с альфа-каналом не поддерживаются."""
+
+    NAME = "jpeg"
+    TAG = 1
+    PIL_FORMAT = "JPEG"
+    SUPPORTED_FORMATS = ("RGB", "BGR", "GRAY8")
+
+    def __init__(self, quality: int = 85):
+        self.quality = quality
+
+    def save_options(self) -> dict[str, Any]:
+        return {"quality": self.quality}
+
+
+class PngCodec(PillowCodec):
+    """PNG, сжатие без потерь."""
+
+    NAME = "png"
+    TAG = 2
+    PIL_FORMAT = "PNG"
+
+    def save_options(self) -> dict[str, Any]:
+        # Быстрое сжатие: кадры кодируются на каждом кадре
+        return {"compress_level": 1}
+
+
+register_payload_codec(JpegCodec())
+register_payload_codec(PngCodec())
@@ -1,14 +1,49 @@
-from dataclasses import dataclass
+import time
+from dataclasses import dataclass, field
 
-from vipipe.transport.interface import MultipartReaderABC, ReaderABC
+from vipipe.metrics import BYTES_RECEIVED, MESSAGES_RECEIVED, PARSE_TIME, Histogram
+from vipipe.transport.interface import MultipartReaderABC, ReaderABC, decode_topic, split_topic
 
-from .entity import GstMessage
+from .entity import GST_MESSAGE_TYPES, BufferMessage, CapsMessage, GstMessage
+from .tracing import stage_record
+
+
+def parse_stream_message(message_parts: list[bytes], caps: dict[str | None, CapsMessage]) -> GstMessage:
+    """
+    Разбирает сообщение потока: отделяет тему и сохраняет ее в GstMessage.stream, запоминает капсы потока
+    и передает их кадрам (BufferMessage.caps).
+
+    Args:
+        message_parts: Части сообщения, возможно с темой первой частью
+        caps: Последние капсы каждого потока, обновляются при получении капсов
+    """
+    # Тема (ZeroMQWriterConfig.topic или GstWriter.topic_frame) - не часть сообщения, а идентификатор потока
+    topic, message_parts = split_topic(message_parts)
+    message = GstMessage.parse(message_parts)
+    if topic:
+        message.set_stream(decode_topic(topic) or None)
+
+    if isinstance(message, BufferMessage):
+        message.caps = caps.get(message.stream)
+    elif isinstance(message, CapsMessage):
+        caps[message.stream] = message
+    return message
 
 
 @dataclass
 class GstReader(ReaderABC[GstMessage]):
     reader: MultipartReaderABC[bytes]
 
+    trace_stage: str | None = None
+    """Имя этапа трассировки. Если задано, в кадр добавляется запись со временем получения и разбора"""
+
+    parse_time: Histogram = field(init=False, default_factory=lambda: PARSE_TIME.labels(), repr=False)  # type: ignore
+    """Длительность разбора сообщений (в мс)"""
+
+    caps: dict[str | None, CapsMessage] = field(init=False, default_factory=dict)
+    """Последние капсы каждого потока. Кадры получают их в BufferMessage.caps: в бинарном формате
+    метаданных буфера формат кадра известен только по caps_id"""
+
     def start(self):
         self.reader.start()
 
@@ -20,4 +55,44 @@ class GstReader(ReaderABC[GstMessage]):
         if message_parts is None:
             return None
 
-        return GstMessage.parse(message_parts)
+        return self._parse(message_parts)
+
+    def read_parts(self) -> list[bytes] | None:
+        """
+        Читает сообщение частями без разбора, для пересылки (см. HandlerPool). Тема остается первой частью.
+
+        Метрики и капсы потоков учитываются как в read. Кадр разбирается и сериализуется заново,
+        только если задан trace_stage: записи трассировки хранятся в кастомных метаданных.
+        """
+        message_parts = self.reader.read_multipart()
+        if message_parts is None:
+            return None
+
+        topic, body = split_topic(message_parts)
+        message_type = GstMessage.decode_message_type(body[0])
+        if message_type == GST_MESSAGE_TYPES.CAPS:
+            self._parse(message_parts)
+        elif message_type == GST_MESSAGE_TYPES.BUFFER and self.trace_stage is not None:
+            message_parts = [*([topic] if topic else []), *self._parse(message_parts).toparts()]
+        else:
+            MESSAGES_RECEIVED.labels(message_type.name).inc()  # type: ignore
+            BYTES_RECEIVED.labels().inc(sum(len(part) for part in message_parts))  # type: ignore
+
+        return message_parts
+
+    def _parse(self, message_parts: list[bytes]) -> GstMessage:
+        received_at = time.time()
+        started = time.perf_counter()
+        message = parse_stream_message(message_parts, self.caps)
+        parse_time = (time.perf_counter() - started) * 1000
+        self.parse_time.observe(parse_time)
+        MESSAGES_RECEIVED.labels(message.MESSAGE_TYPE.name).inc()  # type: ignore
+        BYTES_RECEIVED.labels().inc(sum(len(part) for part in message_parts))  # type: ignore
+
+        if self.trace_stage is not None:
+            record = stage_record(message, self.trace_stage, create=True)
+            if record is not None:
+                record["recv"] = received_at
+                record["parse"] = parse_time
+
+        return message
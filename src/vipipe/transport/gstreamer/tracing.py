@@ -0,0 +1,103 @@
+from __future__ import annotations
+
+from typing import Any, TypedDict
+
+from .entity import BufferMessage, CustomMetaMessage, GstMessage
+
+TRACE_KEY = "trace"
+"""Ключ кастомных метаданных кадра, под которым хранятся записи трассировки."""
+
+
+class TraceRecord(TypedDict, total=False):
+    """
+    Запись трассировки одного этапа обработки кадра.
+
+    Временные метки - время Unix (time.time()) в секундах, длительности - в мс.
+    """
+
+    stage: str
+    """Имя этапа"""
+    recv: float
+    """Время получения кадра этапом"""
+    parse: float
+    """Длительность разбора сообщения"""
+    wait: float
+    """Время ожидания в очереди перед обработкой"""
+    handle: float
+    """Длительность обработки"""
+    send: float
+    """Время отправки кадра этапом"""
+    seq: int
+    """Номер кадра среди отправленных этапом (по пропускам считаются потерянные кадры)"""
+
+
+def get_trace(message: GstMessage | None, create: bool = False) -> list[TraceRecord] | None:
+    """
+    Получает записи трассировки кадра.
+
+    Args:
+        message: Сообщение
+        create: Создать пустой список (и кастомные метаданные), если записей нет
+    Returns:
+        Записи трассировки или None, если сообщение не кадр или записей нет
+    """
+    if not isinstance(message, BufferMessage):
+        return None
+
+    if message.custom_meta is None:
+        if not create:
+            return None
+        message.custom_meta = CustomMetaMessage(metadata={})
+
+    trace = message.custom_meta.metadata.get(TRACE_KEY)
+    if trace is None and create:
+        trace = message.custom_meta.metadata[TRACE_KEY] = []
+    return trace
+
+
+def stage_record(message: GstMessage | None, stage: str, create: bool = False) -> TraceRecord | None:
+    """
+    Получает последнюю запись трассировки этапа.
+
+    Args:
+        message: Сообщение
+        stage: Имя этапа
+        create: Добавить запись, если у этапа ее нет
+    """
+    trace = get_trace(message, create=create)
+    if trace is None:
+        return None
+
+    if trace and trace[-1].get("stage") == stage:
+        return trace[-1]
+
+    if not create:
+        return None
+
+    record: TraceRecord = {"stage": stage}
+    trace.append(record)
+    return record
+
+
+def carry_trace(trace: list[TraceRecord] | None, target: GstMessage | Any) -> None:
+    """
+    Возвращает записи трассировки в результат обработки.
+
+    Обработчик может заменить кастомные метаданные кадра (или создать новый кадр), и записи,
+    хранящиеся в них, теряются. Поэтому записи снимаются до обработки и переносятся в результат,
+    если его записи - уже не тот же список.
+
+    Args:
+        trace: Записи трассировки исходного кадра, полученные до обработки (get_trace)
+        target: Результат обработки
+    """
+    if not trace or not isinstance(target, BufferMessage):
+        return
+
+    target_trace = get_trace(target, create=True)
+    assert target_trace is not None
+    if target_trace is trace:
+        return
+
+    # Записи предыдущих этапов идут перед записями, которые обработчик добавил сам
+    target_trace[:0] = [record for record in trace if record not in target_trace]
@@ -1,19 +1,149 @@
-from dataclasses import dataclass
+import time
+from dataclasses import dataclass, field
+from typing import Callable
 
-from vipipe.transport.interface import MultipartWriterABC, WriterABC
+from vipipe.metrics import BYTES_SENT, MESSAGES_SENT, SERIALIZE_TIME, Histogram
+from vipipe.transport.interface import MultipartWriterABC, WriterABC, decode_topic, encode_topic, split_topic
 
-from .entity import GstMessage
+from .entity import GST_MESSAGE_TYPES, BufferMetaMessage, CustomMetaMessage, GstMessage
+from .tracing import stage_record
 
 
 @dataclass
 class GstWriter(WriterABC[GstMessage]):
     writer: MultipartWriterABC[bytes]
 
+    trace_stage: str | None = None
+    """Имя этапа трассировки. Если задано, в запись этапа в кадре добавляется время отправки"""
+
+    meta_writer: MultipartWriterABC[bytes] | None = None
+    """Боковой канал метаданных. Для каждого кадра в него отправляется BufferMessage без медиаданных
+    (метаданные буфера с pts и кастомные метаданные), капсы и конец потока дублируются.
+    Потребители, которым нужны только метаданные, подписываются на него и не получают кадры,
+    а этапы, которым нужно и то, и другое, соединяют каналы через MetaJoinReader"""
+
+    split_meta: bool = True
+    """При заданном meta_writer не передавать кастомные метаданные в основном канале"""
+
+    topic_frame: bool = False
+    """Отправлять перед сообщением часть с идентификатором потока сообщения (GstMessage.stream).
+    Так один сокет PUB передает результаты нескольких потоков. Для одного потока проще задать
+    ZeroMQWriterConfig.topic: тогда тема остается первой частью и при записи через ShmWriter"""
+
+    serialize_time: Histogram = field(init=False, default_factory=lambda: SERIALIZE_TIME.labels(), repr=False)  # type: ignore
+    """Длительность сериализации сообщений (в мс)"""
+
+    sent: int = field(default=0, init=False)
+    """Количество отправленных кадров с трассировкой"""
+
     def start(self):
         self.writer.start()
+        if self.meta_writer is not None:
+            self.meta_writer.start()
 
     def stop(self):
         self.writer.stop()
+        if self.meta_writer is not None:
+            self.meta_writer.stop()
+
+    def write(self, message: GstMessage, on_release: Callable[[], None] | None = None) -> None:
+        """
+        Записывает сообщение.
+
+        Args:
+            message: Сообщение
+            on_release: Вызывается ровно один раз, когда транспорт больше не использует память сообщения
+                (в том числе при ошибке сериализации или записи)
+        """
+        try:
+            self._stamp(message)
+            message_parts = self._serialize(message)
+        except Exception:
+            # До основного канала память сообщения не дошла, транспорт ее не освободит
+            if on_release is not None:
+                on_release()
+            raise
+
+        self._send(message.MESSAGE_TYPE, message.stream, message_parts, on_release)
+
+    def write_parts(self, message_parts: list[bytes], on_release: Callable[[], None] | None = None) -> None:
+        """
+        Записывает уже сериализованное сообщение без разбора, для пересылки (см. HandlerPool).
+
+        Боковой канал, тема и метрики обрабатываются как в write. Кадр разбирается и сериализуется заново,
+        только если задан trace_stage: записи трассировки хранятся в кастомных метаданных.
+
+        Args:
+            message_parts: Части GstMessage, возможно с темой первой частью (см. GstReader.read_parts)
+            on_release: Вызывается ровно один раз, когда транспорт больше не использует память сообщения
+        """
+        try:
+            topic, message_parts = split_topic(message_parts)
+            stream = (decode_topic(topic) or None) if topic else None
+            message_type = GstMessage.decode_message_type(message_parts[0])
+            if message_type == GST_MESSAGE_TYPES.BUFFER and self.trace_stage is not None:
+                message = GstMessage.parse(message_parts)
+                self._stamp(message)
+                message_parts = self._serialize(message)
+        except Exception:
+            if on_release is not None:
+                on_release()
+            raise
+
+        self._send(message_type, stream, message_parts, on_release)
+
+    def _stamp(self, message: GstMessage) -> None:
+        if self.trace_stage is not None:
+            record = stage_record(message, self.trace_stage, create=True)
+            if record is not None:
+                self.sent += 1
+                record["seq"] = self.sent
+                record["send"] = time.time()
+
+    def _serialize(self, message: GstMessage) -> list[bytes]:
+        started = time.perf_counter()
+        message_parts = message.toparts()
+        self.serialize_time.observe((time.perf_counter() - started) * 1000)
+        return message_parts
+
+    def _send(
+        self,
+        message_type: GST_MESSAGE_TYPES,
+        stream: str | None,
+        message_parts: list[bytes],
+        on_release: Callable[[], None] | None,
+    ) -> None:
+        try:
+            if self.meta_writer is not None:
+                message_parts = self._write_meta(message_type, stream, message_parts)
+        except Exception:
+            if on_release is not None:
+                on_release()
+            raise
+
+        self.writer.write_multipart(self._with_topic(stream, message_parts), on_release=on_release)
+        MESSAGES_SENT.labels(message_type.name).inc()  # type: ignore
+        BYTES_SENT.labels().inc(sum(memoryview(part).nbytes for part in message_parts))  # type: ignore
+
+    def _write_meta(
+        self, message_type: GST_MESSAGE_TYPES, stream: str | None, message_parts: list[bytes]
+    ) -> list[bytes]:
+        """Отправляет метаданные в боковой канал. Возвращает части для основного канала."""
+        assert self.meta_writer is not None
+
+        if message_type != GST_MESSAGE_TYPES.BUFFER:
+            self.meta_writer.write_multipart(self._with_topic(stream, message_parts))
+            return message_parts
+
+        # Части BufferMessage: тип, метаданные буфера, кастомные метаданные, медиаданные
+        custom_meta_start = 1 + BufferMetaMessage.PARTS_LENGTH
+        self.meta_writer.write_multipart(self._with_topic(stream, [*message_parts[:-1], b""]))
+
+        if not self.split_meta:
+            return message_parts
+        return [*message_parts[:custom_meta_start], *[b""] * CustomMetaMessage.PARTS_LENGTH, message_parts[-1]]
 
-    def write(self, message: GstMessage) -> None:
-        self.writer.write_multipart(message.toparts())
+    def _with_topic(self, stream: str | None, message_parts: list[bytes]) -> list[bytes]:
+        if not self.topic_frame:
+            return message_parts
+        return [encode_topic(stream or ""), *message_parts]
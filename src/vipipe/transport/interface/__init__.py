@@ -1,4 +1,12 @@
-from .entity import MultipartSerializableProtocol, SerializableProtocol
+from .entity import (
+    TOPIC_TERMINATOR,
+    MultipartSerializableProtocol,
+    SerializableProtocol,
+    decode_topic,
+    encode_topic,
+    is_topic_frame,
+    split_topic,
+)
 from .reader import MultipartReaderABC, ReaderABC
 from .writer import MultipartWriterABC, WriterABC
 
@@ -9,4 +17,9 @@ __all__ = [
     "MultipartReaderABC",
     "WriterABC",
     "MultipartWriterABC",
+    "TOPIC_TERMINATOR",
+    "encode_topic",
+    "decode_topic",
+    "is_topic_frame",
+    "split_topic",
 ]
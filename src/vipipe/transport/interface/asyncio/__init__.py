@@ -0,0 +1,9 @@
+from .reader import AsyncMultipartReaderABC, AsyncReaderABC
+from .writer import AsyncMultipartWriterABC, AsyncWriterABC
+
+__all__ = [
+    "AsyncReaderABC",
+    "AsyncMultipartReaderABC",
+    "AsyncWriterABC",
+    "AsyncMultipartWriterABC",
+]
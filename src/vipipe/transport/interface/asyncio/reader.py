@@ -0,0 +1,64 @@
+from abc import ABC
+from dataclasses import dataclass
+from typing import AsyncIterator, Generic
+
+from ..entity import T
+
+
+class AsyncReaderABC(ABC, Generic[T]):
+    async def __aenter__(self) -> "AsyncReaderABC":
+        await self.start()
+        return self
+
+    async def __aexit__(self, type, value, traceback) -> None:
+        await self.stop()
+
+    def iread(self, with_none: bool = True) -> AsyncIterator[T | None]:
+        return AsyncReadIterator(self, with_none=with_none)
+
+    async def start(self) -> None:
+        raise NotImplementedError
+
+    async def stop(self) -> None:
+        raise NotImplementedError
+
+    async def read(self) -> T | None:
+        raise NotImplementedError
+
+
+@dataclass(slots=True)
+class AsyncReadIterator(Generic[T]):
+    reader: AsyncReaderABC[T]
+    with_none: bool = True
+
+    def __aiter__(self) -> "AsyncReadIterator":
+        return self
+
+    async def __anext__(self) -> T | None:
+        message = await self.reader.read()
+        if not self.with_none and message is None:
+            raise StopAsyncIteration
+        return message
+
+
+class AsyncMultipartReaderABC(AsyncReaderABC[T]):
+    def iread_multipart(self, with_none: bool = True) -> AsyncIterator[list[T] | None]:
+        return AsyncReadMultipartIterator(self, with_none=with_none)
+
+    async def read_multipart(self) -> list[T] | None:
+        raise NotImplementedError
+
+
+@dataclass(slots=True)
+class AsyncReadMultipartIterator(Generic[T]):
+    reader: AsyncMultipartReaderABC[T]
+    with_none: bool = True
+
+    def __aiter__(self) -> "AsyncReadMultipartIterator":
+        return self
+
+    async def __anext__(self) -> list[T] | None:
+        message = await self.reader.read_multipart()
+        if not self.with_none and message is None:
+            raise StopAsyncIteration
+        return message
@@ -0,0 +1,35 @@
+from abc import ABC
+from typing import Callable, Generic
+
+from ..entity import T
+
+
+class AsyncWriterABC(ABC, Generic[T]):
+    async def __aenter__(self) -> "AsyncWriterABC":
+        await self.start()
+        return self
+
+    async def __aexit__(self, type, value, traceback) -> None:
+        await self.stop()
+
+    async def start(self) -> None:
+        raise NotImplementedError
+
+    async def stop(self) -> None:
+        raise NotImplementedError
+
+    async def write(self, message: T) -> None:
+        raise NotImplementedError
+
+
+class AsyncMultipartWriterABC(AsyncWriterABC[T]):
+    async def write_multipart(self, message_parts: list[T], on_release: Callable[[], None] | None = None) -> None:
+        """
+        Записывает сообщение из нескольких частей.
+
+        Args:
+            message_parts: Части сообщения
+            on_release: Вызывается ровно один раз, когда writer больше не использует память частей
+                (в том числе при ошибке записи)
+        """
+        raise NotImplementedError
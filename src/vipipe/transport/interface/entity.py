@@ -21,3 +21,31 @@ class MultipartSerializableProtocol(Protocol):
     @classmethod
     def parse(cls, parts: list[bytes]) -> MultipartSerializableProtocol:
         raise NotImplementedError
+
+
+TOPIC_TERMINATOR = b"\0"
+"""Завершает часть с темой. ZeroMQ сравнивает подписки по префиксу, а с завершающим байтом
+подписка на тему cam1 не совпадает с темой cam10. Тип сообщения GstMessage никогда не равен нулю,
+поэтому часть с темой отличима от первой части сообщения без темы."""
+
+
+def encode_topic(topic: str) -> bytes:
+    """Кодирует тему в часть сообщения (и в подписку SUB)."""
+    return topic.encode() + TOPIC_TERMINATOR
+
+
+def is_topic_frame(part: bytes | memoryview) -> bool:
+    """Проверяет, является ли часть сообщения темой."""
+    return len(part) > 0 and part[-1:] == TOPIC_TERMINATOR
+
+
+def decode_topic(part: bytes | memoryview) -> str:
+    """Декодирует тему из части сообщения."""
+    return bytes(part[:-1]).decode()
+
+
+def split_topic(message_parts: list[bytes]) -> tuple[bytes, list[bytes]]:
+    """Отделяет часть с темой от частей сообщения. Если темы нет, возвращает пустую часть."""
+    if message_parts and is_topic_frame(message_parts[0]):
+        return message_parts[0], message_parts[1:]
+    return b"", message_parts
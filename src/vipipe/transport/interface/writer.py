@@ -1,5 +1,5 @@
 from abc import ABC
-from typing import Generic
+from typing import Callable, Generic
 
 from .entity import T
 
@@ -23,5 +23,13 @@ class WriterABC(ABC, Generic[T]):
 
 
 class MultipartWriterABC(WriterABC[T]):
-    def write_multipart(self, message_parts: list[T]) -> None:
+    def write_multipart(self, message_parts: list[T], on_release: Callable[[], None] | None = None) -> None:
+        """
+        Записывает сообщение из нескольких частей.
+
+        Args:
+            message_parts: Части сообщения
+            on_release: Вызывается ровно один раз, когда writer больше не использует память частей
+                (в том числе при ошибке записи)
+        """
         raise NotImplementedError
@@ -1,31 +1,262 @@
+import queue
+import threading
+import time
 from dataclasses import dataclass, field
+from typing import Any, Callable
 
 import sqlalchemy
+import sqlalchemy.orm
+from vipipe.logging import ThrottledLogger, get_logger
+from vipipe.metrics import DROPPED_BUFFERS, REGISTRY
 from vipipe.transport.interface import MultipartWriterABC
 
+logger = get_logger("vipipe.transport.postgres.writer")
+throttled_logger = ThrottledLogger(logger)
+"""Логгер для сообщений, которые могут повторяться на каждой строке"""
+
+FLUSH_TIME = REGISTRY.histogram("vipipe_db_flush_time_milliseconds", "Длительность записи пачки строк в базу данных")
+ROWS_WRITTEN = REGISTRY.counter("vipipe_db_rows_written", "Строки, записанные в базу данных")
+FLUSH_ERRORS = REGISTRY.counter("vipipe_db_flush_errors", "Пачки строк, которые не удалось записать в базу данных")
+QUEUE_DEPTH = REGISTRY.gauge("vipipe_db_queue_depth", "Строки в очереди на запись в базу данных")
+
+Row = dict[str, Any]
+TableLike = sqlalchemy.Table | type[sqlalchemy.orm.DeclarativeBase]
+
 
 @dataclass
 class PostgresWriterConfig:
     connection_string: str
     """Строка подключения к базе данных"""
 
+    batch_size: int = 1000
+    """Количество строк, при котором пачка записывается, не дожидаясь flush_interval"""
+
+    flush_interval: float = 0.5
+    """Максимальное время (в секундах) между получением строки и ее записью"""
+
+    queue_size: int = 100000
+    """Максимальное количество строк в очереди на запись"""
+
+    drop_when_full: bool = False
+    """Отбрасывать строки при заполненной очереди вместо ожидания места в ней"""
+
+    background: bool = True
+    """Записывать пачки в фоновом потоке. Иначе пачка записывается в потоке, вызвавшем write"""
+
+    use_copy: bool = True
+    """Записывать пачки через COPY, если драйвер его поддерживает (psycopg 3). Иначе - executemany"""
+
+    pool_size: int = 2
+    """Размер пула соединений"""
+
+
+_STOP = object()
+_FLUSH = object()
+
 
 @dataclass
 class PostgresWriter(MultipartWriterABC[sqlalchemy.orm.DeclarativeBase]):
+    """
+    Записывает строки в базу данных пачками.
+
+    Строки копятся до batch_size или flush_interval и записываются одной транзакцией:
+    через COPY для PostgreSQL с драйвером psycopg 3, иначе через executemany (insertmanyvalues в SQLAlchemy 2).
+    Подходит любая база, поддерживаемая SQLAlchemy, например SQLite для локальной проверки.
+    """
+
     config: PostgresWriterConfig
 
     engine: sqlalchemy.Engine = field(init=False)
-    connection: sqlalchemy.Connection = field(init=False)
+
+    rows: queue.Queue = field(init=False)
+    thread: threading.Thread | None = field(init=False, default=None)
+
+    pending: dict[tuple[sqlalchemy.Table, tuple[str, ...]], list[Row]] = field(init=False, default_factory=dict)
+    pending_count: int = field(init=False, default=0)
+    first_pending_time: float | None = field(init=False, default=None)
+    lock: threading.Lock = field(init=False, default_factory=threading.Lock, repr=False)
 
     def __post_init__(self):
-        self.engine = sqlalchemy.create_engine(self.config.connection_string)
-        self.connection = self.engine.connect()
+        options: dict[str, Any] = {"pool_pre_ping": True}
+        if not self.config.connection_string.startswith("sqlite"):
+            options["pool_size"] = self.config.pool_size
+        self.engine = sqlalchemy.create_engine(self.config.connection_string, **options)
+        self.rows = queue.Queue(maxsize=self.config.queue_size)
+
+    def start(self) -> None:
+        if self.config.background and self.thread is None:
+            self.thread = threading.Thread(target=self._flush_loop, name="vipipe-db-writer", daemon=True)
+            self.thread.start()
+
+    def stop(self) -> None:
+        """Записывает накопленные строки и останавливает фоновый поток."""
+        if self.thread is not None:
+            self.rows.put(_STOP)
+            self.thread.join()
+            self.thread = None
+        self._flush()
+        self.engine.dispose()
+
+    def flush(self) -> None:
+        """Дожидается записи всех переданных строк."""
+        if self.thread is not None:
+            self.rows.put(_FLUSH)
+            self.rows.join()
+        else:
+            self._flush()
 
     def write(self, message: sqlalchemy.orm.DeclarativeBase) -> None:
-        self.connection.execute(sqlalchemy.insert(message.__table__), message)
+        self._put(message.__table__, self._orm_row(message))  # type: ignore
+
+    def write_multipart(
+        self, message_parts: list[sqlalchemy.orm.DeclarativeBase], on_release: Callable[[], None] | None = None
+    ) -> None:
+        try:
+            for message in message_parts:
+                self.write(message)
+        finally:
+            if on_release is not None:
+                on_release()
 
-    def write_multipart(self, message_parts: list[sqlalchemy.orm.DeclarativeBase]) -> None:
-        if len(message_parts) == 0:
+    def write_rows(self, table: TableLike, rows: list[Row]) -> None:
+        """
+        Записывает строки таблицы без создания объектов ORM.
+
+        Args:
+            table: Таблица или класс модели
+            rows: Строки в виде словарей "столбец - значение"
+        """
+        table = getattr(table, "__table__", table)
+        for row in rows:
+            self._put(table, row)  # type: ignore
+
+    @staticmethod
+    def _orm_row(message: sqlalchemy.orm.DeclarativeBase) -> Row:
+        state = sqlalchemy.inspect(message)
+        row = {}
+        for attribute in state.mapper.column_attrs:
+            value = getattr(message, attribute.key)
+            # Пустой первичный ключ заполняет база данных
+            if value is None and any(column.primary_key for column in attribute.columns):
+                continue
+            row[attribute.columns[0].key] = value
+        return row
+
+    def _put(self, table: sqlalchemy.Table, row: Row) -> None:
+        if not self.config.background:
+            self._add(table, row)
+            if self._due():
+                self._flush()
+            return
+
+        try:
+            self.rows.put((table, row), block=not self.config.drop_when_full)
+        except queue.Full:
+            DROPPED_BUFFERS.labels("db_queue_full").inc()  # type: ignore
+            throttled_logger.warning("Очередь записи в базу данных заполнена, строка отброшена")
+            return
+
+        QUEUE_DEPTH.labels().set(self.rows.qsize())  # type: ignore
+
+    def _add(self, table: sqlalchemy.Table, row: Row) -> None:
+        with self.lock:
+            # executemany и COPY требуют одинаковый набор столбцов в пачке
+            self.pending.setdefault((table, tuple(row)), []).append(row)
+            self.pending_count += 1
+            if self.first_pending_time is None:
+                self.first_pending_time = time.monotonic()
+
+    def _due(self) -> bool:
+        if self.pending_count >= self.config.batch_size:
+            return True
+        return (
+            self.first_pending_time is not None
+            and time.monotonic() - self.first_pending_time >= self.config.flush_interval
+        )
+
+    def _flush_loop(self) -> None:
+        stopping = False
+        flushing = False
+        # Строки из очереди, которые еще не записаны: task_done вызывается только после записи,
+        # чтобы flush дожидался именно записи в базу
+        unflushed = 0
+        while not stopping:
+            timeout = None
+            if self.first_pending_time is not None:
+                timeout = max(0.0, self.first_pending_time + self.config.flush_interval - time.monotonic())
+
+            try:
+                item = self.rows.get(timeout=timeout)
+                while True:
+                    unflushed += 1
+                    if item is _STOP:
+                        stopping = True
+                        break
+                    if item is _FLUSH:
+                        flushing = True
+                        break
+                    self._add(*item)
+                    if self.pending_count >= self.config.batch_size:
+                        break
+                    # Забираем без ожидания все, что уже накопилось в очереди
+                    item = self.rows.get_nowait()
+            except queue.Empty:
+                pass
+
+            if not (stopping or flushing or self._due()):
+                continue
+
+            try:
+                self._flush()
+            finally:
+                for _ in range(unflushed):
+                    self.rows.task_done()
+                unflushed = 0
+                flushing = False
+                QUEUE_DEPTH.labels().set(self.rows.qsize())  # type: ignore
+
+    def _flush(self) -> None:
+        with self.lock:
+            pending, self.pending = self.pending, {}
+            count, self.pending_count = self.pending_count, 0
+            self.first_pending_time = None
+
+        if not pending:
             return
 
-        self.connection.execute(sqlalchemy.insert(message_parts[0].__table__), message_parts)
+        started_at = time.perf_counter()
+        try:
+            with self.engine.begin() as connection:
+                for (table, columns), rows in pending.items():
+                    if self._can_copy():
+                        self._copy(connection, table, columns, rows)
+                    else:
+                        connection.execute(sqlalchemy.insert(table), rows)
+        except Exception as e:
+            FLUSH_ERRORS.labels().inc()  # type: ignore
+            logger.error("Ошибка записи %d строк в базу данных: %s", count, e)
+            return
+
+        FLUSH_TIME.labels().observe((time.perf_counter() - started_at) * 1000)  # type: ignore
+        ROWS_WRITTEN.labels().inc(count)  # type: ignore
+
+    def _can_copy(self) -> bool:
+        return (
+            self.config.use_copy
+            and self.engine.dialect.name == "postgresql"
+            and self.engine.dialect.driver == "psycopg"
+        )
+
+    def _copy(
+        self, connection: sqlalchemy.Connection, table: sqlalchemy.Table, columns: tuple[str, ...], rows: list[Row]
+    ) -> None:
+        """Записывает строки через COPY FROM STDIN (psycopg 3) в транзакции connection."""
+        preparer = self.engine.dialect.identifier_preparer
+        statement = "COPY {} ({}) FROM STDIN".format(
+            preparer.format_table(table), ", ".join(preparer.quote(column) for column in columns)
+        )
+
+        driver_connection = connection.connection.driver_connection
+        with driver_connection.cursor() as cursor, cursor.copy(statement) as copy:  # type: ignore
+            for row in rows:
+                copy.write_row([row[column] for column in columns])
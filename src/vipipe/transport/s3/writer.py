@@ -1,8 +1,34 @@
+import io
+import math
+import queue
+import random
+import threading
+import time
+from concurrent.futures import Future, ThreadPoolExecutor, wait
 from dataclasses import dataclass, field
+from typing import Any, Callable
 
 import botocore.session
+from botocore.config import Config
+from botocore.exceptions import BotoCoreError, ClientError
+from vipipe.logging import ThrottledLogger, get_logger
+from vipipe.metrics import DROPPED_BUFFERS, REGISTRY
 from vipipe.transport.interface import WriterABC
 
+logger = get_logger("vipipe.transport.s3.writer")
+throttled_logger = ThrottledLogger(logger)
+"""Логгер для сообщений, которые могут повторяться на каждом объекте"""
+
+MIN_PART_SIZE = 5 * 1024 * 1024
+"""Минимальный размер части многочастевой загрузки S3 (кроме последней)."""
+
+MAX_PARTS = 10000
+"""Максимальное количество частей многочастевой загрузки S3."""
+
+UPLOAD_TIME = REGISTRY.histogram("vipipe_s3_upload_time_milliseconds", "Длительность загрузки объектов в S3")
+UPLOAD_ERRORS = REGISTRY.counter("vipipe_s3_upload_errors", "Объекты, которые не удалось загрузить в S3")
+QUEUE_DEPTH = REGISTRY.gauge("vipipe_s3_queue_depth", "Объекты в очереди на загрузку в S3")
+
 
 @dataclass
 class S3WriterConfig:
@@ -21,67 +47,292 @@ class S3WriterConfig:
     multipart_threshold: int = 8 * 1024 * 1024
     """Порог для многочастевой загрузки (в байтах)"""
 
+    multipart_chunksize: int = 8 * 1024 * 1024
+    """Размер части многочастевой загрузки (в байтах, не меньше 5 МБ)"""
+
+    endpoint_url: str | None = None
+    """Адрес S3-совместимого хранилища (MinIO, moto). По умолчанию - AWS"""
+
+    background: bool = True
+    """Загружать объекты в фоновых потоках. Иначе write загружает объект сам"""
+
+    queue_size: int = 64
+    """Максимальное количество объектов в очереди на загрузку"""
+
+    drop_when_full: bool = False
+    """Отбрасывать объекты при заполненной очереди вместо ожидания места в ней"""
+
+    workers: int = 2
+    """Количество потоков, загружающих объекты из очереди"""
+
+    max_concurrency: int = 8
+    """Количество частей многочастевых загрузок, отправляемых одновременно"""
+
+    copy: bool = False
+    """Копировать данные объекта в write. Без копирования память объекта (например, memoryview на кадр)
+    должна оставаться неизменной до вызова S3Object.on_release"""
+
+    max_retries: int = 4
+    """Количество повторов запроса при ошибке"""
+
+    retry_backoff: float = 0.2
+    """Начальная пауза перед повтором (в секундах), удваивается с каждым повтором"""
+
 
 @dataclass
 class S3Object:
     key: str
     """Ключ в S3"""
 
-    message: bytes
+    message: bytes | bytearray | memoryview
     """Сообщение"""
 
+    content_type: str | None = None
+    """Тип содержимого объекта"""
+
+    on_release: Callable[[], None] | None = None
+    """Вызывается ровно один раз, когда writer больше не использует память сообщения (в том числе при ошибке)"""
+
+
+class MemoryviewBody(io.RawIOBase):
+    """Тело запроса поверх memoryview: части объекта отправляются без копирования."""
+
+    def __init__(self, data: bytes | bytearray | memoryview):
+        self.data = memoryview(data).cast("B")
+        self.position = 0
+
+    def readable(self) -> bool:
+        return True
+
+    def seekable(self) -> bool:
+        return True
+
+    def readinto(self, buffer: Any) -> int:
+        size = min(len(buffer), len(self.data) - self.position)
+        buffer[:size] = self.data[self.position : self.position + size]
+        self.position += size
+        return size
+
+    def seek(self, offset: int, whence: int = io.SEEK_SET) -> int:
+        base = {io.SEEK_SET: 0, io.SEEK_CUR: self.position, io.SEEK_END: len(self.data)}[whence]
+        self.position = max(0, base + offset)
+        return self.position
+
+    def tell(self) -> int:
+        return self.position
+
+    def __len__(self) -> int:
+        return len(self.data)
+
+
+_STOP = object()
+
 
 @dataclass
 class S3Writer(WriterABC[S3Object]):
+    """
+    Загружает объекты в S3.
+
+    В фоновом режиме write только кладет объект в ограниченную очередь, загрузку выполняют потоки writer'а,
+    поэтому медленный S3 не останавливает обработку кадров. Крупные объекты загружаются по частям
+    multipart_chunksize, части отправляются параллельно. Запросы повторяются с экспоненциальной паузой.
+    """
+
     config: S3WriterConfig
 
     session: botocore.session.Session = field(init=False)
     s3_client: botocore.client.BaseClient = field(init=False)  # type: ignore
 
+    uploads: queue.Queue = field(init=False)
+    threads: list[threading.Thread] = field(init=False, default_factory=list)
+    parts_executor: ThreadPoolExecutor | None = field(init=False, default=None)
+
     def __post_init__(self):
         self.session = botocore.session.get_session()
         self.s3_client = self.session.create_client(
             "s3",
             region_name=self.config.region_name,
+            endpoint_url=self.config.endpoint_url,
             aws_access_key_id=self.config.access_key,
             aws_secret_access_key=self.config.secret_key,
+            config=Config(
+                # Клиент потокобезопасен, одно соединение на каждую одновременную загрузку
+                max_pool_connections=self.config.workers + self.config.max_concurrency,
+                # Повторы выполняет writer, чтобы не умножать их на повторы botocore
+                retries={"total_max_attempts": 1},
+            ),
         )
+        self.uploads = queue.Queue(maxsize=self.config.queue_size)
 
     def start(self) -> None:
-        pass
+        self.parts_executor = ThreadPoolExecutor(self.config.max_concurrency, thread_name_prefix="vipipe-s3-part")
+
+        if not self.config.background:
+            return
+
+        self.threads = [
+            threading.Thread(target=self._upload_loop, name=f"vipipe-s3-{i}", daemon=True)
+            for i in range(self.config.workers)
+        ]
+        for thread in self.threads:
+            thread.start()
 
     def stop(self) -> None:
-        pass
+        """Дожидается загрузки объектов из очереди и останавливает потоки."""
+        for _ in self.threads:
+            self.uploads.put(_STOP)
+        for thread in self.threads:
+            thread.join()
+        self.threads = []
+
+        if self.parts_executor is not None:
+            self.parts_executor.shutdown(wait=True)
+            self.parts_executor = None
+
+    def flush(self) -> None:
+        """Дожидается загрузки всех объектов, переданных в write."""
+        if self.config.background:
+            self.uploads.join()
 
     def write(self, message: S3Object) -> None:
-        if len(message.message) < self.config.multipart_threshold:
-            self.s3_client.put_object(Bucket=self.config.bucket_name, Key=message.key, Body=message.message)
-        else:
-            self._write_message_multipart(message)
+        if self.config.copy and not isinstance(message.message, bytes):
+            message = self._copy(message)
+
+        if not self.config.background:
+            self._upload(message)
+            return
+
+        try:
+            self.uploads.put(message, block=not self.config.drop_when_full)
+        except queue.Full:
+            DROPPED_BUFFERS.labels("s3_queue_full").inc()  # type: ignore
+            throttled_logger.warning("Очередь загрузки в S3 заполнена, объект отброшен")
+            self._release(message)
+            return
+
+        QUEUE_DEPTH.labels().set(self.uploads.qsize())  # type: ignore
+
+    @staticmethod
+    def _copy(message: S3Object) -> S3Object:
+        """Копирует данные объекта и сразу освобождает исходную память."""
+        copied = S3Object(key=message.key, message=bytes(message.message), content_type=message.content_type)
+        S3Writer._release(message)
+        return copied
+
+    @staticmethod
+    def _release(message: S3Object) -> None:
+        if message.on_release is not None:
+            on_release, message.on_release = message.on_release, None
+            on_release()
+
+    def _upload_loop(self) -> None:
+        while True:
+            message = self.uploads.get()
+            try:
+                if message is _STOP:
+                    return
+                self._upload(message)
+            except Exception as e:
+                UPLOAD_ERRORS.labels().inc()  # type: ignore
+                logger.error("Ошибка загрузки объекта %s в S3: %s", message.key, e)
+            finally:
+                self.uploads.task_done()
+                QUEUE_DEPTH.labels().set(self.uploads.qsize())  # type: ignore
+
+    def _upload(self, message: S3Object) -> None:
+        started_at = time.perf_counter()
+        try:
+            if len(message.message) < self.config.multipart_threshold:
+                extra = {"ContentType": message.content_type} if message.content_type else {}
+                self._retry(
+                    lambda: self.s3_client.put_object(
+                        Bucket=self.config.bucket_name, Key=message.key, Body=MemoryviewBody(message.message), **extra
+                    )
+                )
+            else:
+                self._write_message_multipart(message)
+        finally:
+            self._release(message)
+
+        UPLOAD_TIME.labels().observe((time.perf_counter() - started_at) * 1000)  # type: ignore
+
+    def _retry(self, request: Callable[[], Any]) -> Any:
+        """Выполняет запрос, повторяя его при временных ошибках."""
+        for attempt in range(self.config.max_retries + 1):
+            try:
+                return request()
+            except Exception as e:
+                if attempt == self.config.max_retries or not self._is_retryable(e):
+                    raise
+
+                delay = self.config.retry_backoff * 2**attempt
+                throttled_logger.warning("Ошибка запроса к S3, повтор через %.2f с: %s", delay, e)
+                # Случайная добавка, чтобы повторы разных потоков не совпадали
+                time.sleep(delay * (1 + random.random() / 2))
+
+    @staticmethod
+    def _is_retryable(error: Exception) -> bool:
+        if isinstance(error, ClientError):
+            status = error.response.get("ResponseMetadata", {}).get("HTTPStatusCode")
+            # Ошибки клиента (нет бакета, нет доступа) повтор не исправит, кроме ограничения частоты запросов
+            return status is None or status >= 500 or status in (408, 429)
+        # Сетевые ошибки и ошибки соединения
+        return isinstance(error, (BotoCoreError, OSError))
+
+    def _part_size(self, size: int) -> int:
+        part_size = max(self.config.multipart_chunksize, MIN_PART_SIZE)
+        return max(part_size, math.ceil(size / MAX_PARTS))
+
+    def _upload_part(self, upload_id: str, key: str, number: int, data: memoryview) -> dict[str, Any]:
+        response = self._retry(
+            lambda: self.s3_client.upload_part(
+                Bucket=self.config.bucket_name,
+                Key=key,
+                PartNumber=number,
+                UploadId=upload_id,
+                Body=MemoryviewBody(data),
+            )
+        )
+        return {"PartNumber": number, "ETag": response["ETag"]}
 
     def _write_message_multipart(self, message: S3Object) -> None:
-        response = self.s3_client.create_multipart_upload(Bucket=self.config.bucket_name, Key=message.key)
+        extra = {"ContentType": message.content_type} if message.content_type else {}
+        response = self._retry(
+            lambda: self.s3_client.create_multipart_upload(Bucket=self.config.bucket_name, Key=message.key, **extra)
+        )
         upload_id = response["UploadId"]
 
+        data = memoryview(message.message).cast("B")
+        part_size = self._part_size(len(data))
+        chunks = [
+            (number, data[offset : offset + part_size])
+            for number, offset in enumerate(range(0, len(data), part_size), start=1)
+        ]
+
+        futures: list[Future] = []
         try:
-            parts = []
-            for i, part in enumerate(message.message):
-                part_response = self.s3_client.upload_part(
+            if self.parts_executor is None:
+                # Writer не запущен: части отправляются по очереди в текущем потоке
+                parts = [self._upload_part(upload_id, message.key, number, chunk) for number, chunk in chunks]
+            else:
+                futures = [
+                    self.parts_executor.submit(self._upload_part, upload_id, message.key, number, chunk)
+                    for number, chunk in chunks
+                ]
+                parts = [future.result() for future in futures]
+
+            self._retry(
+                lambda: self.s3_client.complete_multipart_upload(
                     Bucket=self.config.bucket_name,
                     Key=message.key,
-                    PartNumber=i + 1,
                     UploadId=upload_id,
-                    Body=part,
+                    MultipartUpload={"Parts": parts},
                 )
-                parts.append({"PartNumber": i + 1, "ETag": part_response["ETag"]})
-
-            # Complete multipart upload
-            self.s3_client.complete_multipart_upload(
-                Bucket=self.config.bucket_name,
-                Key=message.key,
-                UploadId=upload_id,
-                MultipartUpload={"Parts": parts},
             )
-        except Exception as e:
+        except Exception:
+            for future in futures:
+                future.cancel()
+            # Память объекта освобождается после выхода, поэтому дожидаемся уже отправляемых частей
+            wait(futures)
             self.s3_client.abort_multipart_upload(Bucket=self.config.bucket_name, Key=message.key, UploadId=upload_id)
-            raise e
+            raise
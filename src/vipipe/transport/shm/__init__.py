@@ -0,0 +1,4 @@
+from .reader import ShmReader, ShmReaderConfig
+from .writer import ShmWriter, ShmWriterConfig
+
+__all__ = ["ShmReaderConfig", "ShmReader", "ShmWriterConfig", "ShmWriter"]
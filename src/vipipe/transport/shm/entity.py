@@ -0,0 +1,93 @@
+from __future__ import annotations
+
+import struct
+from dataclasses import dataclass
+
+SHM_MAGIC = b"VSHM"
+"""Сигнатура дескриптора сообщения, части которого лежат в разделяемой памяти."""
+
+SHM_VERSION = 1
+"""Версия формата дескриптора."""
+
+SLOT_HEADER = struct.Struct("<Q")
+"""Заголовок слота: номер записи, которая сейчас лежит в слоте (0 - слот пишется)."""
+
+DESCRIPTOR_HEADER = struct.Struct("<4sBIQH")
+"""Заголовок дескриптора: сигнатура, версия, номер слота, номер записи, количество частей."""
+
+PART_DESCRIPTOR = struct.Struct("<BQQ")
+"""Описание части: расположение, смещение внутри слота, длина."""
+
+PART_INLINE = 0
+"""Часть передана через сокет следом за дескриптором."""
+
+PART_SHARED = 1
+"""Часть лежит в слоте разделяемой памяти."""
+
+
+@dataclass(slots=True)
+class ShmPartDescriptor:
+    location: int
+    """Расположение части (PART_INLINE или PART_SHARED)"""
+
+    offset: int = 0
+    """Смещение от начала данных слота (в байтах)"""
+
+    length: int = 0
+    """Длина части (в байтах)"""
+
+
+@dataclass(slots=True)
+class ShmDescriptor:
+    """Дескриптор сообщения, отправляемый через сокет вместо крупных частей."""
+
+    slot: int
+    """Номер слота в кольце"""
+
+    sequence: int
+    """Номер записи, по нему читатель проверяет, что слот не перезаписан"""
+
+    parts: list[ShmPartDescriptor]
+    """Описание частей сообщения в исходном порядке"""
+
+    def tobytes(self) -> bytes:
+        data = bytearray(DESCRIPTOR_HEADER.size + PART_DESCRIPTOR.size * len(self.parts))
+        DESCRIPTOR_HEADER.pack_into(data, 0, SHM_MAGIC, SHM_VERSION, self.slot, self.sequence, len(self.parts))
+
+        for i, part in enumerate(self.parts):
+            PART_DESCRIPTOR.pack_into(
+                data, DESCRIPTOR_HEADER.size + PART_DESCRIPTOR.size * i, part.location, part.offset, part.length
+            )
+
+        return bytes(data)
+
+    @classmethod
+    def is_descriptor(cls, data: bytes | memoryview) -> bool:
+        """Проверяет, является ли часть сообщения дескриптором разделяемой памяти."""
+        return len(data) >= DESCRIPTOR_HEADER.size and bytes(data[: len(SHM_MAGIC)]) == SHM_MAGIC
+
+    @classmethod
+    def parse(cls, data: bytes | memoryview) -> ShmDescriptor:
+        """
+        Разбирает дескриптор из байтового представления.
+
+        Args:
+            data: Первая часть сообщения
+        Returns:
+            Дескриптор сообщения
+        Raises:
+            ValueError: При неизвестной версии формата или некорректной длине
+        """
+        magic, version, slot, sequence, parts_count = DESCRIPTOR_HEADER.unpack_from(data, 0)
+        if magic != SHM_MAGIC:
+            raise ValueError("Часть сообщения не является дескриптором разделяемой памяти")
+        if version != SHM_VERSION:
+            raise ValueError(f"Неподдерживаемая версия дескриптора: {version}")
+        if len(data) != DESCRIPTOR_HEADER.size + PART_DESCRIPTOR.size * parts_count:
+            raise ValueError("Некорректная длина дескриптора разделяемой памяти")
+
+        parts = [
+            ShmPartDescriptor(*PART_DESCRIPTOR.unpack_from(data, DESCRIPTOR_HEADER.size + PART_DESCRIPTOR.size * i))
+            for i in range(parts_count)
+        ]
+        return cls(slot=slot, sequence=sequence, parts=parts)
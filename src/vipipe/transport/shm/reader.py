@@ -0,0 +1,143 @@
+from dataclasses import dataclass, field
+from multiprocessing import resource_tracker
+from multiprocessing.shared_memory import SharedMemory
+
+from vipipe.logging import ThrottledLogger, get_logger
+from vipipe.transport.interface import MultipartReaderABC
+
+from .entity import PART_SHARED, SLOT_HEADER, ShmDescriptor
+
+logger = get_logger("vipipe.transport.shm.reader")
+frame_logger = ThrottledLogger(logger)
+
+
+@dataclass
+class ShmReaderConfig:
+    name: str
+    """Имя сегмента разделяемой памяти (без ведущего '/'), совпадает с ShmWriterConfig.name"""
+
+    slot_size: int = 1024 * 1024 * 8
+    """Размер одного слота (в байтах), совпадает с ShmWriterConfig.slot_size"""
+
+    copy: bool = False
+    """Копировать части из разделяемой памяти. Без копирования части являются memoryview на слот
+    и остаются корректными, пока писатель не перезапишет слот: не дольше, чем до slots следующих записей.
+    Потребитель, который держит части дольше, проверяет их через ShmReader.is_valid после использования"""
+
+
+@dataclass
+class ShmReader(MultipartReaderABC[bytes]):
+    """
+    Читает сообщения, записанные ShmWriter: получает дескриптор через вложенный reader
+    и возвращает крупные части как memoryview на слоты разделяемой памяти.
+    Сообщения без дескриптора возвращаются без изменений.
+    """
+
+    config: ShmReaderConfig
+    reader: MultipartReaderABC[bytes]
+
+    memory: SharedMemory | None = field(init=False, default=None)
+    last_descriptor: ShmDescriptor | None = field(init=False, default=None)
+    """Дескриптор последнего прочитанного из разделяемой памяти сообщения"""
+
+    @property
+    def slot_stride(self) -> int:
+        return SLOT_HEADER.size + self.config.slot_size
+
+    def start(self):
+        self.reader.start()
+
+    def stop(self):
+        self.reader.stop()
+
+        if self.memory is not None:
+            try:
+                self.memory.close()
+            except BufferError:
+                # На слоты еще ссылаются прочитанные сообщения, отображение освободится вместе с процессом
+                logger.debug("Сегмент %s используется, пропускаем закрытие", self.config.name)
+            self.memory = None
+
+    def _attach(self) -> SharedMemory:
+        """Подключается к сегменту, созданному писателем."""
+        memory = SharedMemory(name=self.config.name)
+        # Сегментом владеет писатель: без этого resource_tracker удалит его при завершении читателя
+        resource_tracker.unregister(memory._name, "shared_memory")  # type: ignore
+        return memory
+
+    def read_multipart(self) -> list[bytes] | None:
+        message_parts = self.reader.read_multipart()
+        self.last_descriptor = None
+        if not message_parts:
+            return message_parts
+
+        # Тема ZeroMQ (ZeroMQWriterConfig.topic) передается перед дескриптором и возвращается как есть
+        topic_parts: list[bytes] = []
+        if len(message_parts) > 1 and ShmDescriptor.is_descriptor(message_parts[1]):
+            topic_parts, message_parts = message_parts[:1], message_parts[1:]
+
+        if not ShmDescriptor.is_descriptor(message_parts[0]):
+            return message_parts
+
+        descriptor = ShmDescriptor.parse(message_parts[0])
+
+        if self.memory is None:
+            self.memory = self._attach()
+
+        if not self._check_slot(descriptor):
+            return None
+
+        data_start = descriptor.slot * self.slot_stride + SLOT_HEADER.size
+
+        inline_parts = iter(message_parts[1:])
+        parts = []
+        for part in descriptor.parts:
+            if part.location != PART_SHARED:
+                parts.append(next(inline_parts))
+                continue
+
+            view = self.memory.buf[data_start + part.offset : data_start + part.offset + part.length]
+            parts.append(bytes(view) if self.config.copy else view)
+
+        # Писатель обнуляет номер записи слота перед записью, поэтому совпадение номера после копирования
+        # означает, что слот не начали перезаписывать во время копирования
+        if self.config.copy and not self._check_slot(descriptor):
+            return None
+
+        self.last_descriptor = descriptor
+        return [*topic_parts, *parts]
+
+    def _slot_sequence(self, slot: int) -> int:
+        assert self.memory is not None
+        (sequence,) = SLOT_HEADER.unpack_from(self.memory.buf, slot * self.slot_stride)
+        return sequence
+
+    def _check_slot(self, descriptor: ShmDescriptor) -> bool:
+        sequence = self._slot_sequence(descriptor.slot)
+        if sequence == descriptor.sequence:
+            return True
+
+        frame_logger.warning(
+            "Слот %d перезаписан (ожидалась запись %d, в слоте %d), сообщение пропущено",
+            descriptor.slot,
+            descriptor.sequence,
+            sequence,
+        )
+        return False
+
+    def is_valid(self, descriptor: ShmDescriptor | None = None) -> bool:
+        """
+        Проверяет, что писатель не начал перезаписывать слот сообщения.
+
+        Части, прочитанные без копирования, нужно проверять после их использования (копирования в буфер,
+        обработки): если слот перезаписан, данные могли быть испорчены и результат следует отбросить.
+
+        Args:
+            descriptor: Дескриптор сообщения, по умолчанию - последнего прочитанного (last_descriptor)
+        Returns:
+            True, если данные слота не изменились или сообщение передано без разделяемой памяти
+        """
+        descriptor = descriptor or self.last_descriptor
+        if descriptor is None or self.memory is None:
+            return True
+        return self._slot_sequence(descriptor.slot) == descriptor.sequence
@@ -0,0 +1,108 @@
+from dataclasses import dataclass, field
+from multiprocessing.shared_memory import SharedMemory
+from typing import Callable
+
+from vipipe.logging import get_logger
+from vipipe.transport.interface import MultipartWriterABC
+
+from .entity import PART_INLINE, PART_SHARED, SLOT_HEADER, ShmDescriptor, ShmPartDescriptor
+
+logger = get_logger("vipipe.transport.shm.writer")
+
+
+@dataclass
+class ShmWriterConfig:
+    name: str
+    """Имя сегмента разделяемой памяти (без ведущего '/')"""
+
+    slots: int = 16
+    """Количество слотов в кольце. Должно превышать число сообщений, одновременно находящихся в очередях сокетов
+    и в обработке у читателя, иначе слот будет перезаписан до того, как его прочитают"""
+
+    slot_size: int = 1024 * 1024 * 8
+    """Размер одного слота (в байтах). По умолчанию 8 МБ, достаточно для кадра 1080p RGBA"""
+
+    min_part_size: int = 64 * 1024
+    """Части меньше этого размера (в байтах) передаются через сокет как есть"""
+
+
+@dataclass
+class ShmWriter(MultipartWriterABC[bytes]):
+    """
+    Кладет крупные части сообщений в кольцо слотов разделяемой памяти POSIX,
+    а через вложенный writer отправляет только дескриптор и мелкие части.
+    """
+
+    config: ShmWriterConfig
+    writer: MultipartWriterABC[bytes]
+
+    memory: SharedMemory | None = field(init=False, default=None)
+    sequence: int = field(init=False, default=0)
+
+    @property
+    def slot_stride(self) -> int:
+        return SLOT_HEADER.size + self.config.slot_size
+
+    def start(self):
+        assert self.memory is None
+
+        size = self.slot_stride * self.config.slots
+        try:
+            self.memory = SharedMemory(name=self.config.name, create=True, size=size)
+        except FileExistsError:
+            # Сегмент остался от аварийно завершенного процесса
+            logger.warning("Сегмент разделяемой памяти %s уже существует, пересоздаем", self.config.name)
+            stale = SharedMemory(name=self.config.name)
+            stale.close()
+            stale.unlink()
+            self.memory = SharedMemory(name=self.config.name, create=True, size=size)
+
+        self.writer.start()
+
+    def stop(self):
+        assert self.memory is not None
+
+        self.writer.stop()
+
+        self.memory.close()
+        self.memory.unlink()
+        self.memory = None
+
+    def write_multipart(self, message_parts: list[bytes], on_release: Callable[[], None] | None = None) -> None:
+        assert self.memory is not None
+
+        self.sequence += 1
+        slot = self.sequence % self.config.slots
+        slot_start = slot * self.slot_stride
+        data_start = slot_start + SLOT_HEADER.size
+
+        descriptors = []
+        inline_parts = []
+        offset = 0
+        for part in message_parts:
+            view = memoryview(part).cast("B")
+            size = view.nbytes
+
+            if size < self.config.min_part_size or offset + size > self.config.slot_size:
+                descriptors.append(ShmPartDescriptor(PART_INLINE))
+                inline_parts.append(part)
+                continue
+
+            if offset == 0:
+                # Помечаем слот как записываемый, чтобы читатель не принял старые данные за новые
+                SLOT_HEADER.pack_into(self.memory.buf, slot_start, 0)
+
+            self.memory.buf[data_start + offset : data_start + offset + size] = view
+            descriptors.append(ShmPartDescriptor(PART_SHARED, offset, size))
+            offset += size
+
+        if offset == 0:
+            # В разделяемую память ничего не попало, отправляем сообщение как есть
+            self.sequence -= 1
+            self.writer.write_multipart(message_parts, on_release=on_release)
+            return
+
+        SLOT_HEADER.pack_into(self.memory.buf, slot_start, self.sequence)
+
+        descriptor = ShmDescriptor(slot=slot, sequence=self.sequence, parts=descriptors)
+        self.writer.write_multipart([descriptor.tobytes(), *inline_parts], on_release=on_release)
@@ -0,0 +1,4 @@
+from .reader import AsyncZeroMQReader
+from .writer import AsyncZeroMQWriter
+
+__all__ = ["AsyncZeroMQReader", "AsyncZeroMQWriter"]
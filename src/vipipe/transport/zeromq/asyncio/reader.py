@@ -0,0 +1,49 @@
+from dataclasses import dataclass, field
+
+import zmq
+import zmq.asyncio
+from vipipe.metrics import READ_TIMEOUTS
+from vipipe.transport.interface.asyncio import AsyncMultipartReaderABC
+
+from ..reader import ZeroMQReaderConfig
+from ..sockets import check_reader_config, received_parts, setup_reader_socket
+
+
+@dataclass
+class AsyncZeroMQReader(AsyncMultipartReaderABC[bytes]):
+    """Асинхронный вариант ZeroMQReader на zmq.asyncio. Настраивается тем же ZeroMQReaderConfig."""
+
+    config: ZeroMQReaderConfig
+
+    context: zmq.asyncio.Context | None = field(init=False, default=None)
+    socket: zmq.asyncio.Socket | None = field(init=False, default=None)
+
+    def __post_init__(self):
+        check_reader_config(self.config)
+
+    async def start(self):
+        assert self.context is None
+        assert self.socket is None
+
+        self.context = zmq.asyncio.Context()
+        self.socket = self.context.socket(self.config.socket_type)
+        setup_reader_socket(self.socket, self.config)
+
+    async def stop(self):
+        assert self.context is not None
+        assert self.socket is not None
+
+        self.socket.close()
+        self.context.term()
+
+    async def read_multipart(self) -> list[bytes] | None:
+        assert self.socket is not None
+
+        flags = zmq.DONTWAIT if self.config.dontwait else 0
+        try:
+            frames = await self.socket.recv_multipart(flags=flags, copy=not self.config.zero_copy)
+        except zmq.Again:
+            READ_TIMEOUTS.labels().inc()  # type: ignore
+            return None
+
+        return received_parts(frames, self.config)
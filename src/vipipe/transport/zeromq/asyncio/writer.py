@@ -0,0 +1,63 @@
+from collections import deque
+from dataclasses import dataclass, field
+from typing import Callable
+
+import zmq
+import zmq.asyncio
+from vipipe.transport.interface.asyncio import AsyncMultipartWriterABC
+
+from ..sockets import PendingMessages, outgoing_parts, release_all, release_sent, setup_writer_socket
+from ..writer import ZeroMQWriterConfig
+
+
+@dataclass
+class AsyncZeroMQWriter(AsyncMultipartWriterABC[bytes]):
+    """Асинхронный вариант ZeroMQWriter на zmq.asyncio. Настраивается тем же ZeroMQWriterConfig."""
+
+    config: ZeroMQWriterConfig
+
+    context: zmq.asyncio.Context | None = field(init=False, default=None)
+    socket: zmq.asyncio.Socket | None = field(init=False, default=None)
+    pending: PendingMessages = field(init=False, default_factory=deque)
+    """Отправленные без копирования сообщения, память которых еще использует libzmq"""
+
+    async def start(self):
+        assert self.context is None
+        assert self.socket is None
+
+        self.context = zmq.asyncio.Context()
+        self.socket = self.context.socket(self.config.socket_type)
+        setup_writer_socket(self.socket, self.config)
+
+    async def stop(self):
+        assert self.context is not None
+        assert self.socket is not None
+
+        self.socket.close()
+        self.context.term()
+
+        release_all(self.pending)
+
+    async def write_multipart(self, message_parts: list[bytes], on_release: Callable[[], None] | None = None) -> None:
+        assert self.socket is not None
+
+        flags = zmq.DONTWAIT if self.config.dontwait else 0
+        release_sent(self.pending)
+
+        parts, tracker = outgoing_parts(message_parts, self.config, self.config.zero_copy and on_release is not None)
+        if tracker is None:
+            try:
+                await self.socket.send_multipart(parts, flags=flags)
+            finally:
+                if on_release is not None:
+                    on_release()
+            return
+
+        assert on_release is not None
+        try:
+            await self.socket.send_multipart(parts, flags=flags, copy=False)
+        except Exception:
+            on_release()
+            raise
+
+        self.pending.append((tracker, on_release))
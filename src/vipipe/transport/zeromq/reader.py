@@ -1,7 +1,11 @@
+import threading
 from dataclasses import dataclass, field
 
 import zmq
-from vipipe.transport.interface import MultipartReaderABC
+from vipipe.metrics import READ_TIMEOUTS
+from vipipe.transport.interface import MultipartReaderABC, encode_topic
+
+from .sockets import check_reader_config, received_parts, setup_reader_socket
 
 
 @dataclass
@@ -30,6 +34,27 @@ class ZeroMQReaderConfig:
     dontwait: bool = False
     """Неблокирующее чтение. Не ждать если очередь полна"""
 
+    bind: bool = False
+    """Привязать сокет к адресу (bind) вместо подключения (connect)"""
+
+    zero_copy: bool = False
+    """Чтение без копирования. Крупные части возвращаются как memoryview на zmq.Frame"""
+
+    zero_copy_threshold: int = 64 * 1024
+    """Части меньше этого размера (в байтах) при чтении без копирования все равно копируются в bytes"""
+
+    topics: list[str] = field(default_factory=list)
+    """Дополнительные темы подписки, только для socket_type=zmq.SUB"""
+
+    addresses: list[str] = field(default_factory=list)
+    """Дополнительные адреса. Сокет подключается ко всем адресам (или привязывается к ним),
+    сообщения из разных адресов чередуются. Так один SUB-сокет принимает потоки нескольких камер"""
+
+    @property
+    def subscriptions(self) -> list[bytes]:
+        """Темы подписки сокета SUB (тема сравнивается целиком, см. TOPIC_TERMINATOR). Без тем - все сообщения"""
+        return [encode_topic(topic) for topic in (self.topic, *self.topics) if topic] or [b""]
+
 
 @dataclass
 class ZeroMQReader(MultipartReaderABC[bytes]):
@@ -38,9 +63,14 @@ class ZeroMQReader(MultipartReaderABC[bytes]):
     context: zmq.SyncContext | None = field(init=False, default=None)
     socket: zmq.SyncSocket | None = field(init=False, default=None)
 
+    poller: zmq.Poller | None = field(init=False, default=None)
+    wakeup_receiver: zmq.SyncSocket | None = field(init=False, default=None)
+    wakeup_sender: zmq.SyncSocket | None = field(init=False, default=None)
+    """Пара inproc-сокетов, через которую interrupt() прерывает ожидание в poll()"""
+    wakeup_lock: threading.Lock = field(init=False, default_factory=threading.Lock, repr=False)
+
     def __post_init__(self):
-        if self.config.topic and self.config.socket_type != zmq.SocketType.SUB:
-            raise ValueError("topic is valid only for socket_type == SUB")
+        check_reader_config(self.config)
 
     def start(self):
         assert self.context is None
@@ -48,28 +78,72 @@ class ZeroMQReader(MultipartReaderABC[bytes]):
 
         self.context = zmq.Context()
         self.socket = self.context.socket(self.config.socket_type)
+        setup_reader_socket(self.socket, self.config)
 
-        if self.config.socket_type == zmq.SUB:
-            self.socket.setsockopt(zmq.SUBSCRIBE, self.config.topic.encode() or b"")
-
-        self.socket.setsockopt(zmq.RCVHWM, self.config.buffer_length)
-        self.socket.setsockopt(zmq.RCVBUF, self.config.buffer_size_os)
-        self.socket.setsockopt(zmq.RCVTIMEO, self.config.read_timeout)
-        self.socket.setsockopt(zmq.CONFLATE, self.config.conflate)
+        wakeup_address = f"inproc://vipipe-reader-wakeup-{id(self)}"
+        self.wakeup_receiver = self.context.socket(zmq.PAIR)
+        self.wakeup_receiver.bind(wakeup_address)
+        self.wakeup_sender = self.context.socket(zmq.PAIR)
+        self.wakeup_sender.connect(wakeup_address)
 
-        self.socket.connect(self.config.address)
+        self.poller = zmq.Poller()
+        self.poller.register(self.socket, zmq.POLLIN)
+        self.poller.register(self.wakeup_receiver, zmq.POLLIN)
 
     def stop(self):
         assert self.context is not None
         assert self.socket is not None
 
+        if self.wakeup_receiver is not None and self.wakeup_sender is not None:
+            with self.wakeup_lock:
+                self.wakeup_sender.close()
+                self.wakeup_receiver.close()
+
         self.socket.close()
         self.context.term()
 
+    def poll(self, timeout: int | None = None) -> bool:
+        """
+        Ждет входящее сообщение, не расходуя процессор.
+
+        Args:
+            timeout: Максимальное время ожидания (в мс), None - без ограничения
+        Returns:
+            True, если сообщение можно прочитать без ожидания. False по таймауту или после interrupt()
+        """
+        assert self.poller is not None
+        assert self.wakeup_receiver is not None
+
+        events = dict(self.poller.poll(timeout))
+        if self.wakeup_receiver in events:
+            while True:
+                try:
+                    self.wakeup_receiver.recv(zmq.DONTWAIT)
+                except zmq.Again:
+                    break
+            return False
+
+        return self.socket in events
+
+    def interrupt(self) -> None:
+        """Прерывает ожидание в poll(). Можно вызывать из другого потока."""
+        with self.wakeup_lock:
+            if self.wakeup_sender is None or self.wakeup_sender.closed:
+                return
+            try:
+                self.wakeup_sender.send(b"", zmq.DONTWAIT)
+            except zmq.Again:
+                # Ожидание уже прервано предыдущим сигналом
+                pass
+
     def read_multipart(self) -> list[bytes] | None:
         assert self.socket is not None
 
+        flags = zmq.DONTWAIT if self.config.dontwait else 0
         try:
-            return self.socket.recv_multipart(flags=zmq.DONTWAIT if self.config.dontwait else 0)
+            frames = self.socket.recv_multipart(flags=flags, copy=not self.config.zero_copy)
         except zmq.Again:
-            pass
+            READ_TIMEOUTS.labels().inc()  # type: ignore
+            return None
+
+        return received_parts(frames, self.config)
@@ -0,0 +1,106 @@
+"""Общая настройка сокетов и обработка частей сообщений для синхронных и асинхронных ZeroMQ reader/writer."""
+
+from __future__ import annotations
+
+from collections import deque
+from typing import TYPE_CHECKING, Any, Callable
+
+import zmq
+
+if TYPE_CHECKING:
+    from .reader import ZeroMQReaderConfig
+    from .writer import ZeroMQWriterConfig
+
+PendingMessages = deque[tuple[zmq.MessageTracker, Callable[[], None]]]
+"""Отправленные без копирования сообщения, память которых еще использует libzmq"""
+
+
+def check_reader_config(config: ZeroMQReaderConfig) -> None:
+    """Проверяет конфигурацию читателя."""
+    if (config.topic or config.topics) and config.socket_type != zmq.SocketType.SUB:
+        raise ValueError("topic is valid only for socket_type == SUB")
+
+
+def _attach(socket: zmq.Socket, addresses: list[str], bind: bool) -> None:
+    for address in addresses:
+        if bind:
+            socket.bind(address)
+        else:
+            socket.connect(address)
+
+
+def setup_reader_socket(socket: zmq.Socket, config: ZeroMQReaderConfig) -> None:
+    """Подписывает сокет на темы, задает параметры чтения и подключает (привязывает) его ко всем адресам."""
+    if config.socket_type == zmq.SUB:
+        for subscription in config.subscriptions:
+            socket.setsockopt(zmq.SUBSCRIBE, subscription)
+
+    socket.setsockopt(zmq.RCVHWM, config.buffer_length)
+    socket.setsockopt(zmq.RCVBUF, config.buffer_size_os)
+    socket.setsockopt(zmq.RCVTIMEO, config.read_timeout)
+    socket.setsockopt(zmq.CONFLATE, config.conflate)
+
+    _attach(socket, [config.address, *config.addresses], config.bind)
+
+
+def setup_writer_socket(socket: zmq.Socket, config: ZeroMQWriterConfig) -> None:
+    """Задает параметры записи и подключает (привязывает) сокет к адресу."""
+    socket.setsockopt(zmq.SNDHWM, config.buffer_length)
+    socket.setsockopt(zmq.SNDBUF, config.buffer_size_os)
+    socket.setsockopt(zmq.SNDTIMEO, config.send_timeout)
+    socket.setsockopt(zmq.IMMEDIATE, config.immediate)
+    socket.setsockopt(zmq.CONFLATE, config.conflate)
+    socket.setsockopt(zmq.LINGER, config.linger)
+
+    _attach(socket, [config.address], config.bind)
+
+
+def received_parts(frames: list[Any], config: ZeroMQReaderConfig) -> list[bytes]:
+    """
+    Переводит принятые части в части сообщения. Без zero_copy части уже bytes.
+
+    При чтении без копирования крупные части возвращаются как memoryview: он держит ссылку на zmq.Frame,
+    поэтому память сообщения живет, пока жива часть.
+    """
+    if not config.zero_copy:
+        return frames
+
+    threshold = config.zero_copy_threshold
+    return [frame.buffer if len(frame) >= threshold else frame.bytes for frame in frames]
+
+
+def outgoing_parts(
+    message_parts: list[bytes], config: ZeroMQWriterConfig, zero_copy: bool
+) -> tuple[list[Any], zmq.MessageTracker | None]:
+    """
+    Готовит части к отправке: добавляет тему (см. ZeroMQWriterConfig.topic_frame) и при zero_copy
+    оборачивает крупные части в zmq.Frame без копирования.
+
+    Returns:
+        Части и MessageTracker, по которому видно, что libzmq больше не использует память частей
+        (None, если части копируются при отправке)
+    """
+    topic_frame = config.topic_frame
+    if topic_frame is not None:
+        message_parts = [topic_frame, *message_parts]
+
+    if not zero_copy:
+        return message_parts, None
+
+    threshold = config.zero_copy_threshold
+    parts = [zmq.Frame(part, track=True) if memoryview(part).nbytes >= threshold else part for part in message_parts]
+    return parts, zmq.MessageTracker(*(part for part in parts if isinstance(part, zmq.Frame)))
+
+
+def release_sent(pending: PendingMessages) -> None:
+    """Освобождает память сообщений, которые libzmq уже отправил."""
+    while pending and pending[0][0].done:
+        _, on_release = pending.popleft()
+        on_release()
+
+
+def release_all(pending: PendingMessages) -> None:
+    """Освобождает память всех сообщений. Вызывается после завершения контекста, когда libzmq ее уже не использует."""
+    while pending:
+        _, on_release = pending.popleft()
+        on_release()
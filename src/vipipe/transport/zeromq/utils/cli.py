@@ -13,11 +13,14 @@ def parse_zmq_config_cli() -> tuple[ZeroMQReaderConfig, ZeroMQWriterConfig]:
     parser.add_argument("--reader_address", type=str, required=True, help="Socket address")
     parser.add_argument("--reader_socket-type", type=str, default="SUB", choices=["SUB", "PULL"], help="Socket type")
     parser.add_argument("--reader_topic", type=str, default="", help="Topic for SUB socket")
+    parser.add_argument("--reader_topics", type=str, nargs="*", default=[], help="Additional topics for SUB socket")
+    parser.add_argument("--reader_addresses", type=str, nargs="*", default=[], help="Additional socket addresses")
     parser.add_argument("--reader_buffer-length", type=int, default=10, help="Buffer length")
     parser.add_argument("--reader_buffer-size-oc", type=int, default=1024 * 1024 * 30, help="Buffer size in OS")
     parser.add_argument("--reader_read-timeout", type=int, default=100, help="Read timeout in ms")
     parser.add_argument("--reader_conflate", action="store_true", help="Conflate messages")
     parser.add_argument("--reader_dontwait", action="store_true", help="Non-blocking read")
+    parser.add_argument("--reader_zero-copy", action="store_true", help="Zero-copy read of large message parts")
 
     parser.add_argument("--writer_address", type=str, required=True, help="Socket address")
     parser.add_argument("--writer_socket-type", type=str, default="PUB", choices=["PUB", "PUSH"], help="Socket type")
@@ -28,6 +31,7 @@ def parse_zmq_config_cli() -> tuple[ZeroMQReaderConfig, ZeroMQWriterConfig]:
     parser.add_argument("--writer_conflate", action="store_true", help="Conflate messages")
     parser.add_argument("--writer_linger", type=int, default=500, help="Linger time in ms")
     parser.add_argument("--writer_dontwait", action="store_true", help="Non-blocking send")
+    parser.add_argument("--writer_topic", type=str, default="", help="Topic frame prepended to every message")
 
     args = parser.parse_args()
 
@@ -35,11 +39,14 @@ def parse_zmq_config_cli() -> tuple[ZeroMQReaderConfig, ZeroMQWriterConfig]:
         address=args.reader_address,
         socket_type=zmq.SocketType[args.reader_socket_type],
         topic=args.reader_topic,
+        topics=args.reader_topics,
+        addresses=args.reader_addresses,
         buffer_length=args.reader_buffer_length,
         buffer_size_os=args.reader_buffer_size_oc,
         read_timeout=args.reader_read_timeout,
         conflate=args.reader_conflate,
         dontwait=args.reader_dontwait,
+        zero_copy=args.reader_zero_copy,
     ), ZeroMQWriterConfig(
         address=args.writer_address,
         socket_type=zmq.SocketType[args.writer_socket_type],
@@ -50,6 +57,7 @@ def parse_zmq_config_cli() -> tuple[ZeroMQReaderConfig, ZeroMQWriterConfig]:
         conflate=args.writer_conflate,
         linger=args.writer_linger,
         dontwait=args.writer_dontwait,
+        topic=args.writer_topic,
     )
 
 
@@ -60,11 +68,14 @@ def parse_zmq_reader_config_cli() -> ZeroMQReaderConfig:
     parser.add_argument("--reader_address", type=str, required=True, help="Socket address")
     parser.add_argument("--reader_socket-type", type=str, default="SUB", choices=["SUB", "PULL"], help="Socket type")
     parser.add_argument("--reader_topic", type=str, default="", help="Topic for SUB socket")
+    parser.add_argument("--reader_topics", type=str, nargs="*", default=[], help="Additional topics for SUB socket")
+    parser.add_argument("--reader_addresses", type=str, nargs="*", default=[], help="Additional socket addresses")
     parser.add_argument("--reader_buffer-length", type=int, default=10, help="Buffer length")
     parser.add_argument("--reader_buffer-size-oc", type=int, default=1024 * 1024 * 30, help="Buffer size in OS")
     parser.add_argument("--reader_read-timeout", type=int, default=100, help="Read timeout in ms")
     parser.add_argument("--reader_conflate", action="store_true", help="Conflate messages")
     parser.add_argument("--reader_dontwait", action="store_true", help="Non-blocking read")
+    parser.add_argument("--reader_zero-copy", action="store_true", help="Zero-copy read of large message parts")
 
     args = parser.parse_args()
 
@@ -72,9 +83,12 @@ def parse_zmq_reader_config_cli() -> ZeroMQReaderConfig:
         address=args.reader_address,
         socket_type=zmq.SocketType[args.reader_socket_type],
         topic=args.reader_topic,
+        topics=args.reader_topics,
+        addresses=args.reader_addresses,
         buffer_length=args.reader_buffer_length,
         buffer_size_os=args.reader_buffer_size_oc,
         read_timeout=args.reader_read_timeout,
         conflate=args.reader_conflate,
         dontwait=args.reader_dontwait,
+        zero_copy=args.reader_zero_copy,
     )
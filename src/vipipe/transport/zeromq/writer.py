@@ -1,7 +1,11 @@
+from collections import deque
 from dataclasses import dataclass, field
+from typing import Callable
 
 import zmq
-from vipipe.transport.interface import MultipartWriterABC
+from vipipe.transport.interface import MultipartWriterABC, encode_topic
+
+from .sockets import PendingMessages, outgoing_parts, release_all, release_sent, setup_writer_socket
 
 
 @dataclass
@@ -34,6 +38,25 @@ class ZeroMQWriterConfig:
     dontwait: bool = False
     """Неблокирующая запись. Не ждать если нет готовых данных"""
 
+    bind: bool = True
+    """Привязать сокет к адресу (bind) вместо подключения (connect)"""
+
+    zero_copy: bool = False
+    """Запись без копирования. Крупные части передаются в libzmq по ссылке,
+    память освобождается через on_release после фактической отправки"""
+
+    zero_copy_threshold: int = 64 * 1024
+    """Части меньше этого размера (в байтах) при записи без копирования все равно копируются"""
+
+    topic: str = ""
+    """Тема сообщений. Если задана, отправляется первой частью каждого сообщения: подписчики SUB
+    фильтруют по ней, а GstReader сохраняет ее в GstMessage.stream"""
+
+    @property
+    def topic_frame(self) -> bytes | None:
+        """Первая часть сообщений или None, если тема не задана"""
+        return encode_topic(self.topic) if self.topic else None
+
 
 @dataclass
 class ZeroMQWriter(MultipartWriterABC[bytes]):
@@ -41,6 +64,8 @@ class ZeroMQWriter(MultipartWriterABC[bytes]):
 
     context: zmq.SyncContext | None = field(init=False, default=None)
     socket: zmq.SyncSocket | None = field(init=False, default=None)
+    pending: PendingMessages = field(init=False, default_factory=deque)
+    """Отправленные без копирования сообщения, память которых еще использует libzmq"""
 
     def start(self):
         assert self.context is None
@@ -48,15 +73,7 @@ class ZeroMQWriter(MultipartWriterABC[bytes]):
 
         self.context = zmq.Context()
         self.socket = self.context.socket(self.config.socket_type)
-
-        self.socket.setsockopt(zmq.SNDHWM, self.config.buffer_length)
-        self.socket.setsockopt(zmq.SNDBUF, self.config.buffer_size_os)
-        self.socket.setsockopt(zmq.SNDTIMEO, self.config.send_timeout)
-        self.socket.setsockopt(zmq.IMMEDIATE, self.config.immediate)
-        self.socket.setsockopt(zmq.CONFLATE, self.config.conflate)
-        self.socket.setsockopt(zmq.LINGER, self.config.linger)
-
-        self.socket.bind(self.config.address)
+        setup_writer_socket(self.socket, self.config)
 
     def stop(self):
         assert self.context is not None
@@ -65,7 +82,29 @@ class ZeroMQWriter(MultipartWriterABC[bytes]):
         self.socket.close()
         self.context.term()
 
-    def write_multipart(self, message_parts: list[bytes]) -> None:
+        # После завершения контекста libzmq больше не обращается к памяти сообщений
+        release_all(self.pending)
+
+    def write_multipart(self, message_parts: list[bytes], on_release: Callable[[], None] | None = None) -> None:
         assert self.socket is not None
 
-        self.socket.send_multipart(message_parts, flags=zmq.DONTWAIT if self.config.dontwait else 0)
+        flags = zmq.DONTWAIT if self.config.dontwait else 0
+        release_sent(self.pending)
+
+        parts, tracker = outgoing_parts(message_parts, self.config, self.config.zero_copy and on_release is not None)
+        if tracker is None:
+            try:
+                self.socket.send_multipart(parts, flags=flags)
+            finally:
+                if on_release is not None:
+                    on_release()
+            return
+
+        assert on_release is not None
+        try:
+            self.socket.send_multipart(parts, flags=flags, copy=False)
+        except Exception:
+            on_release()
+            raise
+
+        self.pending.append((tracker, on_release))